@@ -11,6 +11,13 @@ def build_executable():
     """실행 파일 빌드"""
     project_root = Path(__file__).parent
     
+    # 라이선스 임대 공개키 확인 (비어 있으면 임대 없이 24시간마다 온라인 확인)
+    sys.path.insert(0, str(project_root / 'src'))
+    from lease_public_key import LEASE_PUBLIC_KEY
+    if not LEASE_PUBLIC_KEY:
+        print("⚠️ src/lease_public_key.py에 공개키가 없습니다. 라이선스 임대를 사용하려면 빌드 전에 생성하세요:")
+        print("  LICENSE_LEASE_PRIVATE_KEY=... python server/license_lease.py pubkey --output src/lease_public_key.py")
+    
     # PyInstaller 옵션
     options = [
         'src/gui_app.py',  # 메인 파일
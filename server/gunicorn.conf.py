@@ -0,0 +1,16 @@
+"""
+gunicorn 설정 (Procfile에서 사용)
+"""
+import os
+
+# 앱을 마스터에서 한 번 불러온 뒤 워커를 fork (DB 초기화/캐시 준비를 한 번만 실행)
+preload_app = True
+
+# 요청 제한 시간(최대 30초)보다 여유 있게
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+
+
+def post_fork(server, worker):
+    """워커 시작 직후 마스터에서 물려받은 DB 연결 풀 상태 초기화"""
+    from license_server import reset_db_pools
+    reset_db_pools()
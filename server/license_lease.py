@@ -0,0 +1,120 @@
+"""
+라이선스 임대(lease) 서명 모듈
+서버가 Ed25519 개인키로 (라이선스 키, 하드웨어 ID, 임대 만료 시각)을 서명하면
+클라이언트는 프로그램에 내장된 공개키로 인터넷 연결 없이 확인
+
+사용법:
+    python license_lease.py keygen
+    → 개인키는 서버 환경 변수 LICENSE_LEASE_PRIVATE_KEY로 설정
+    LICENSE_LEASE_PRIVATE_KEY=... python license_lease.py pubkey --output ../src/lease_public_key.py
+    → 클라이언트에 내장할 공개키 모듈 생성 (릴리스 빌드 전)
+
+cryptography 패키지 필요 (없으면 임대를 발급하지 않음)
+"""
+
+import re
+import sys
+import json
+import time
+import base64
+import datetime
+import argparse
+from typing import Dict, Optional
+
+LEASE_VERSION = 1
+
+
+def b64encode(data: bytes) -> str:
+    """URL-safe base64 (패딩 없음)"""
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def load_private_key(encoded: str):
+    """base64 개인키(32바이트)로 서명 키 생성"""
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    return Ed25519PrivateKey.from_private_bytes(b64decode(encoded.strip()))
+
+
+def public_key_of(private_key) -> str:
+    """서명 키의 base64 공개키"""
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+    return b64encode(private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw))
+
+
+def issue_lease(private_key, license_key: str, hardware_id: str, license_expiry: datetime.datetime,
+                lease_seconds: float, now: Optional[float] = None) -> Dict[str, str]:
+    """
+    서명된 임대 발급
+
+    Args:
+        private_key: load_private_key()로 만든 서명 키
+        license_expiry: 라이선스 만료일 (임대는 이 시각을 넘지 않음)
+        lease_seconds: 임대 기간 (초)
+        now: 발급 시각 (유닉스 시간, 기본값: 현재)
+
+    Returns:
+        {'payload': base64 JSON, 'signature': base64 서명}
+        - payload: {'v', 'license_key', 'hardware_id', 'license_expiry', 'issued_at', 'expires_at'}
+    """
+    issued_at = int(now if now is not None else time.time())
+    expires_at = min(issued_at + int(lease_seconds), int(license_expiry.timestamp()))
+    payload = json.dumps({
+        'v': LEASE_VERSION,
+        'license_key': license_key,
+        'hardware_id': hardware_id,
+        'license_expiry': license_expiry.isoformat(),
+        'issued_at': issued_at,
+        'expires_at': expires_at
+    }, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return {
+        'payload': b64encode(payload),
+        'signature': b64encode(private_key.sign(payload))
+    }
+
+
+def write_public_key_module(path: str, public_key: str):
+    """클라이언트 공개키 모듈의 LEASE_PUBLIC_KEY 값 교체 (설명 주석은 유지)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    source, count = re.subn(r'^LEASE_PUBLIC_KEY = .*$', f'LEASE_PUBLIC_KEY = "{public_key}"', source, flags=re.M)
+    if count != 1:
+        raise ValueError(f"{path}에서 LEASE_PUBLIC_KEY를 찾을 수 없습니다.")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='라이선스 임대 서명 키 관리')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('keygen', help='Ed25519 키 쌍 생성')
+    pubkey_parser = subparsers.add_parser('pubkey', help='LICENSE_LEASE_PRIVATE_KEY의 공개키 출력')
+    pubkey_parser.add_argument('--output', help='클라이언트 공개키 모듈(src/lease_public_key.py)에 기록')
+    args = parser.parse_args()
+
+    if args.command == 'keygen':
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+        from cryptography.hazmat.primitives.serialization import Encoding, PrivateFormat, NoEncryption
+        private_key = Ed25519PrivateKey.generate()
+        raw = private_key.private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption())
+        print(f"LICENSE_LEASE_PRIVATE_KEY={b64encode(raw)}")
+        print(f"LEASE_PUBLIC_KEY={public_key_of(private_key)}")
+    elif args.command == 'pubkey':
+        import os
+        encoded = os.environ.get('LICENSE_LEASE_PRIVATE_KEY', '')
+        if not encoded:
+            print("LICENSE_LEASE_PRIVATE_KEY 환경 변수가 설정되지 않았습니다.", file=sys.stderr)
+            sys.exit(1)
+        public_key = public_key_of(load_private_key(encoded))
+        if args.output:
+            write_public_key_module(args.output, public_key)
+            print(f"{args.output}에 공개키를 기록했습니다.")
+        else:
+            print(public_key)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,19 +3,33 @@
 온라인 라이선스 인증 및 구독 관리 서버
 """
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import sqlite3
 import psycopg2
+import psycopg2.errors
+import psycopg2.pool
 from psycopg2.extras import RealDictCursor
 import hashlib
 import secrets
+import base64
+import csv
+import io
+import gzip
+import math
+import decimal
 import datetime
 from pathlib import Path
+from urllib.parse import urlparse
 import json
 import os
-import bcrypt
-import requests
+import threading
+import time
+from usage_archive import USAGE_TABLES, UsageArchiveReader, add_months, create_month_partitions, new_usage_summary
+from rate_limit import RateLimiter, RateRule, create_bucket_backend, retry_after_header
+from license_lease import issue_lease, load_private_key
 
 # 템플릿 폴더 경로 (현재 파일 기준)
 template_dir = Path(__file__).parent / 'templates'
@@ -34,6 +48,267 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# JSON 직렬화 (orjson이 있으면 사용, 없으면 표준 json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Brotli 압축 (선택사항, 없으면 gzip만 사용)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def json_default(value):
+    """기본 JSON 인코더가 처리하지 못하는 값 변환 (datetime/date -> ISO 문자열, Decimal -> 숫자)"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"JSON으로 변환할 수 없는 값입니다: {type(value).__name__}")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    jsonify 응답용 JSON 변환기
+    DB에서 읽은 datetime/Decimal 값을 그대로 넘겨도 ISO 문자열/숫자로 직렬화
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        kwargs.setdefault('default', json_default)
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is not None:
+            # 문자열을 거치지 않고 바로 bytes로 직렬화
+            body = orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            body = self.dumps(obj, separators=(',', ':')).encode('utf-8')
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+app.json = FastJSONProvider(app)
+
+# 서버 지표 (워커 프로세스별 누적 카운터)
+_server_metrics = {}
+_server_metrics_lock = threading.Lock()
+
+def increment_metric(name: str, label: str = ''):
+    """지표 카운터 1 증가"""
+    with _server_metrics_lock:
+        counters = _server_metrics.setdefault(name, {})
+        counters[label] = counters.get(label, 0) + 1
+
+def snapshot_metrics() -> dict:
+    """지표 카운터 복사본"""
+    with _server_metrics_lock:
+        return {name: dict(counters) for name, counters in _server_metrics.items()}
+
+# 응답 압축 설정 (COMPRESS_MIN_SIZE 바이트 이상인 응답만 압축)
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_MIMETYPES = {'application/json', 'text/html'}
+GZIP_COMPRESS_LEVEL = 5
+BROTLI_COMPRESS_QUALITY = 4
+
+def choose_content_encoding(accept_encodings) -> str:
+    """Accept-Encoding 헤더에 따라 압축 방식 선택 (br 우선, 다음 gzip, 없으면 빈 문자열)"""
+    br_quality = accept_encodings['br'] if brotli is not None else 0
+    gzip_quality = accept_encodings['gzip']
+    if br_quality > 0 and br_quality >= gzip_quality:
+        return 'br'
+    if gzip_quality > 0:
+        return 'gzip'
+    return ''
+
+@app.after_request
+def compress_response(response):
+    """큰 JSON/HTML 응답을 gzip 또는 brotli로 압축 (스트리밍 응답은 제외)"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESS_MIMETYPES
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = choose_content_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=BROTLI_COMPRESS_QUALITY))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# 프록시(Railway 엣지) 뒤에서 실제 클라이언트 IP 사용
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.environ.get('TRUSTED_PROXY_COUNT', '1')))
+
+# 요청 한도 설정
+# RATE_LIMIT_BACKEND: memory(기본값) / sqlite / sqlite:///경로 / redis://...
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1').lower() not in ('0', 'false', 'no')
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+
+# 라우트별 한도 (scope, 횟수, 기간(초)) - bcrypt를 쓰는 로그인/가입은 엄격하게
+RATE_LIMIT_ROUTES = {
+    '/api/login': [RateRule('ip', 20, 60), RateRule('user_id', 10, 60)],
+    '/api/register': [RateRule('ip', 5, 600)],
+    '/api/request_device_change': [RateRule('ip', 10, 60), RateRule('user_id', 5, 60)],
+    '/api/activate': [RateRule('ip', 20, 60)],
+    '/api/verify': [RateRule('ip', 120, 60)],
+    '/api/verify_token': [RateRule('ip', 120, 60), RateRule('token_hash', 60, 60)],
+    '/api/check_token_owner': [RateRule('ip', 120, 60), RateRule('token_hash', 60, 60)],
+    '/api/check_version': [RateRule('ip', 60, 60)],
+    '/api/record_usage': [RateRule('ip', 60, 60)],
+    '/api/record_user_usage': [RateRule('ip', 60, 60), RateRule('user_id', 30, 60)],
+    '/api/record_user_usage_bulk': [RateRule('ip', 30, 60), RateRule('user_id', 20, 60)],
+    '/api/send_admin_message': [RateRule('ip', 5, 60)],
+    '/api/request_payment_confirmation': [RateRule('ip', 5, 60)],
+}
+RATE_LIMIT_DEFAULT = [RateRule('ip', 300, 60)]
+# 헬스 체크 등 한도를 적용하지 않는 경로
+RATE_LIMIT_EXEMPT = {'/api/health', '/api/health/live', '/api/health/ready'}
+
+rate_limiter = RateLimiter(
+    create_bucket_backend(RATE_LIMIT_BACKEND, Path(os.environ.get('RAILWAY_VOLUME_MOUNT_PATH', '/app/data')) / 'rate_limits.db'),
+    RATE_LIMIT_ROUTES,
+    RATE_LIMIT_DEFAULT
+)
+
+def get_rate_limit_identities() -> dict:
+    """요청 한도 키 (IP, 요청 본문의 user_id, access_token 해시)"""
+    identities = {'ip': request.remote_addr or 'unknown'}
+    data = request.get_json(silent=True) if request.is_json else None
+    if isinstance(data, dict):
+        user_id = data.get('user_id')
+        if isinstance(user_id, str) and user_id.strip():
+            identities['user_id'] = user_id.strip()
+        access_token = data.get('access_token')
+        if isinstance(access_token, str) and access_token.strip():
+            identities['token_hash'] = hash_token(access_token.strip())
+    return identities
+
+@app.before_request
+def enforce_rate_limit():
+    """요청 한도 초과 시 DB 접근 전에 429 응답"""
+    if not RATE_LIMIT_ENABLED or request.method == 'OPTIONS' or request.path in RATE_LIMIT_EXEMPT:
+        return None
+
+    retry_after = rate_limiter.check(request.path, get_rate_limit_identities())
+    if retry_after <= 0:
+        return None
+
+    increment_metric('rate_limited', request.path)
+    logger.info(f"요청 한도 초과: {request.path} ip={request.remote_addr} retry_after={retry_after:.1f}s")
+    response = jsonify({
+        'success': False,
+        'message': f'요청이 너무 많습니다. {retry_after_header(retry_after)}초 후 다시 시도하세요.',
+        'retry_after': math.ceil(retry_after)
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = retry_after_header(retry_after)
+    return response
+
+# 라우트 분류별 요청 제한 시간 (초) - DB 문장은 남은 시간이 지나면 취소됨
+REQUEST_DEADLINES = {
+    'hot': float(os.environ.get('DEADLINE_HOT_SECONDS', '3')),
+    'login': float(os.environ.get('DEADLINE_LOGIN_SECONDS', '8')),
+    'admin': float(os.environ.get('DEADLINE_ADMIN_SECONDS', '30')),
+    'default': float(os.environ.get('DEADLINE_DEFAULT_SECONDS', '10'))
+}
+ROUTE_DEADLINE_CLASSES = {
+    '/api/health': 'hot',
+    '/api/health/ready': 'hot',
+    '/api/verify': 'hot',
+    '/api/activate': 'hot',
+    '/api/verify_token': 'hot',
+    '/api/check_token_owner': 'hot',
+    '/api/check_version': 'hot',
+    '/api/record_usage': 'hot',
+    '/api/record_user_usage': 'hot',
+    '/api/user_info': 'hot',
+    '/api/login': 'login',
+    '/api/register': 'login',
+    '/api/request_device_change': 'login',
+    '/api/batch': 'login',
+    '/api/list_users': 'admin',
+    '/api/list_licenses': 'admin',
+    '/api/usage_stats': 'admin',
+    '/api/archived_usage': 'admin',
+    '/api/stats': 'admin',
+    '/api/get_payment_statistics': 'admin',
+    '/api/list_payments': 'admin',
+    '/api/get_user_logs': 'admin',
+}
+# 클라이언트가 보낸 자체 제한 시간 (초) - 클라이언트가 포기한 뒤에는 서버도 작업 중단
+REQUEST_TIMEOUT_HEADER = 'X-Request-Timeout'
+# 제한 시간 초과로 취소된 503 응답 표시 (src/http_client.py와 동일)
+DEADLINE_EXCEEDED_HEADER = 'X-Deadline-Exceeded'
+# SQLite 진행 콜백 호출 간격 (VM 명령 수)
+SQLITE_PROGRESS_STEPS = 1000
+
+@app.before_request
+def start_request_deadline():
+    """요청 제한 시간 설정 (라우트 분류 예산과 클라이언트 제한 시간 중 짧은 쪽)"""
+    route_class = ROUTE_DEADLINE_CLASSES.get(request.path, 'default')
+    budget = REQUEST_DEADLINES[route_class]
+    try:
+        client_timeout = float(request.headers.get(REQUEST_TIMEOUT_HEADER, 0))
+    except ValueError:
+        client_timeout = 0
+    if client_timeout > 0:
+        budget = min(budget, client_timeout)
+    g.deadline_class = route_class
+    g.request_deadline = time.monotonic() + budget
+
+def request_deadline_passed() -> bool:
+    """현재 요청의 제한 시간이 지났는지 확인"""
+    deadline = g.get('request_deadline') if has_request_context() else None
+    return deadline is not None and time.monotonic() > deadline
+
+def deadline_exceeded_response():
+    """제한 시간 초과로 취소된 요청 응답"""
+    response = jsonify({
+        'success': False,
+        'message': '요청 처리 시간이 초과되었습니다. 잠시 후 다시 시도하세요.'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    # 클라이언트가 같은 요청을 다시 보내지 않도록 표시 (일시적 장애 503과 구분)
+    response.headers[DEADLINE_EXCEEDED_HEADER] = '1'
+    return response
+
+@app.errorhandler(psycopg2.errors.QueryCanceled)
+@app.errorhandler(sqlite3.OperationalError)
+def handle_query_cancelled(e):
+    """제한 시간으로 취소된 DB 문장 처리 (그 외 DB 오류는 기본 처리)"""
+    if not request_deadline_passed():
+        raise e
+    return deadline_exceeded_response()
+
+@app.after_request
+def record_request_deadline(response):
+    """제한 시간 초과 집계 (실패한 요청은 503으로 응답)"""
+    if not request_deadline_passed():
+        return response
+
+    route_class = g.get('deadline_class', 'default')
+    increment_metric('deadline_exceeded', route_class)
+    if response.status_code >= 500:
+        increment_metric('deadline_cancelled', route_class)
+        logger.warning(f"요청 제한 시간 초과로 취소: {request.path} ({route_class})")
+        return deadline_exceeded_response()
+    return response
+
 # 데이터베이스 연결 설정
 # Railway PostgreSQL 사용 (DATABASE_URL 환경변수)
 # 없으면 로컬 SQLite 사용
@@ -48,12 +323,274 @@ if not USE_POSTGRESQL:
     DB_DIR.mkdir(parents=True, exist_ok=True)
     DB_PATH = DB_DIR / "licenses.db"
 
-def get_db_connection():
-    """데이터베이스 연결 반환"""
-    if USE_POSTGRESQL:
-        return psycopg2.connect(DATABASE_URL)
+# 오래된 사용량 기록 보관(아카이브) 파일 경로
+USAGE_ARCHIVE_DIR = Path(os.environ.get('USAGE_ARCHIVE_DIR') or Path(os.environ.get('RAILWAY_VOLUME_MOUNT_PATH', '/app/data')) / 'usage_archive')
+
+# 조회 전용 복제본 (선택사항) - 관리자 통계/목록 조회처럼 약간의 지연이 허용되는 읽기에 사용
+# PostgreSQL: postgresql://... / SQLite: sqlite:///경로 또는 파일 경로
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL', '').strip()
+if USE_POSTGRESQL:
+    REPLICA_ENABLED = DATABASE_REPLICA_URL.startswith(('postgresql://', 'postgres://'))
+else:
+    REPLICA_ENABLED = bool(DATABASE_REPLICA_URL) and not DATABASE_REPLICA_URL.startswith(('postgresql://', 'postgres://'))
+    REPLICA_SQLITE_PATH = DATABASE_REPLICA_URL[len('sqlite:///'):] if DATABASE_REPLICA_URL.startswith('sqlite:///') else DATABASE_REPLICA_URL
+if DATABASE_REPLICA_URL and not REPLICA_ENABLED:
+    logger.warning("DATABASE_REPLICA_URL이 기본 DB와 종류가 달라 무시합니다.")
+# 허용하는 복제 지연 (초) 및 지연 확인 주기 (초)
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '30'))
+REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', '10'))
+
+_replica_state = {'checked_at': None, 'usable': False, 'lag': None}
+_replica_state_lock = threading.Lock()
+
+# PostgreSQL 연결 풀 설정 (워커 프로세스별, fork 이후 자식 프로세스에서 새로 생성)
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))
+
+_db_pools = {}
+_db_pools_pid = None
+_db_pools_lock = threading.Lock()
+
+class PooledConnection:
+    """연결 풀에서 빌린 PostgreSQL 연결 (close() 시 끊지 않고 풀에 반환)"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if not conn.closed:
+                # 끝나지 않은 트랜잭션 정리 후 반환
+                conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            self._pool.putconn(conn, close=bool(conn.closed))
+        except Exception:
+            self._pool.putconn(conn, close=True)
+
+def get_db_pool(url: str, read_only: bool = False):
+    """URL별 연결 풀 (현재 프로세스에 없으면 생성)"""
+    global _db_pools_pid
+    with _db_pools_lock:
+        if _db_pools_pid != os.getpid():
+            # fork로 물려받은 부모 프로세스의 연결은 사용하지 않음
+            _db_pools.clear()
+            _db_pools_pid = os.getpid()
+        db_pool = _db_pools.get((url, read_only))
+        if db_pool is None:
+            connect_kwargs = {'options': '-c default_transaction_read_only=on'} if read_only else {}
+            db_pool = psycopg2.pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, url, **connect_kwargs)
+            _db_pools[(url, read_only)] = db_pool
+        return db_pool
+
+def close_db_pools():
+    """현재 프로세스의 연결 풀을 모두 닫음 (gunicorn --preload 마스터에서 fork 전에 호출)"""
+    global _db_pools_pid
+    with _db_pools_lock:
+        if _db_pools_pid == os.getpid():
+            for db_pool in _db_pools.values():
+                db_pool.closeall()
+        _db_pools.clear()
+        _db_pools_pid = None
+
+def reset_db_pools():
+    """fork 직후 자식 프로세스에서 호출 - 물려받은 풀을 버리고 다음 요청에서 새로 생성"""
+    global _db_pools_pid
+    with _db_pools_lock:
+        _db_pools.clear()
+        _db_pools_pid = os.getpid()
+
+def connect_postgresql(url: str, read_only: bool = False):
+    """PostgreSQL 연결 (풀에서 빌림, 요청 제한 시간 및 읽기 전용 옵션 적용)"""
+    deadline = g.get('request_deadline') if has_request_context() else None
+    db_pool = get_db_pool(url, read_only)
+    
+    # 풀의 연결이 끊어져 있으면 버리고 다른 연결로 재시도
+    for _ in range(2):
+        try:
+            conn = db_pool.getconn()
+        except psycopg2.pool.PoolError:
+            break
+        try:
+            # 연결 재사용이므로 SET LOCAL 대신 세션 값으로 지정 (확인 겸 ping 역할)
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                if deadline is None:
+                    cursor.execute("SET statement_timeout TO DEFAULT")
+                else:
+                    cursor.execute("SET statement_timeout = %s", (max(1, int((deadline - time.monotonic()) * 1000)),))
+            conn.autocommit = False
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            db_pool.putconn(conn, close=True)
+            continue
+        pooled = PooledConnection(db_pool, conn)
+        if has_request_context():
+            # 요청이 끝날 때 반환되지 않은 연결 정리
+            g.setdefault('db_connections', []).append(pooled)
+        return pooled
+    
+    # 풀이 가득 찼으면 풀 밖에서 새 연결
+    increment_metric('db_pool_overflow', 'replica' if read_only else 'primary')
+    options = []
+    if deadline is not None:
+        options.append(f'-c statement_timeout={max(1, int((deadline - time.monotonic()) * 1000))}')
+    if read_only:
+        options.append('-c default_transaction_read_only=on')
+    if options:
+        return psycopg2.connect(url, options=' '.join(options))
+    return psycopg2.connect(url)
+
+@app.teardown_request
+def release_db_connections(exc):
+    """요청 중 풀에서 빌리고 반환하지 않은 연결 반환"""
+    if g.get('batch_connection') is not None:
+        # /api/batch의 개별 작업이 끝난 경우 - 연결은 배치가 끝날 때 반환
+        return
+    for conn in g.pop('db_connections', []):
+        conn.close()
+
+def connect_sqlite(path, read_only: bool = False):
+    """SQLite 연결 (요청 제한 시간 및 읽기 전용 옵션 적용)"""
+    if read_only:
+        conn = sqlite3.connect(f'file:{Path(path).as_posix()}?mode=ro', uri=True)
     else:
-        return sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(path)
+    deadline = g.get('request_deadline') if has_request_context() else None
+    if deadline is not None:
+        # 제한 시간이 지나면 실행 중인 문장을 중단 (sqlite3.OperationalError: interrupted)
+        conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, SQLITE_PROGRESS_STEPS)
+    return conn
+
+def connect_replica():
+    """복제본 연결 (읽기 전용)"""
+    if USE_POSTGRESQL:
+        return connect_postgresql(DATABASE_REPLICA_URL, read_only=True)
+    return connect_sqlite(REPLICA_SQLITE_PATH, read_only=True)
+
+def measure_replica_lag(conn) -> float:
+    """
+    복제 지연 (초)
+    PostgreSQL: 마지막 재생 트랜잭션 시각 기준 (받은 WAL을 모두 재생했으면 0)
+    SQLite: 기본 DB 파일과 복제본 파일의 수정 시각 차이
+    """
+    if USE_POSTGRESQL:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery() THEN 0
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END
+            """)
+            return float(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+    return max(0.0, os.path.getmtime(DB_PATH) - os.path.getmtime(REPLICA_SQLITE_PATH))
+
+def replica_usable() -> bool:
+    """복제본 사용 가능 여부 (연결 가능하고 지연이 허용 범위 이내, REPLICA_CHECK_INTERVAL마다 재확인)"""
+    if not REPLICA_ENABLED:
+        return False
+    
+    checked_at = _replica_state['checked_at']
+    if checked_at is not None and time.monotonic() - checked_at < REPLICA_CHECK_INTERVAL:
+        return _replica_state['usable']
+    
+    with _replica_state_lock:
+        checked_at = _replica_state['checked_at']
+        if checked_at is None or time.monotonic() - checked_at >= REPLICA_CHECK_INTERVAL:
+            usable, lag = False, None
+            try:
+                conn = connect_replica()
+                try:
+                    lag = measure_replica_lag(conn)
+                finally:
+                    conn.close()
+                usable = lag <= REPLICA_MAX_LAG_SECONDS
+                if not usable:
+                    increment_metric('replica_fallback', 'lag')
+                    logger.warning(f"복제본 지연 {lag:.1f}초 - 기본 DB로 조회합니다.")
+            except Exception as e:
+                increment_metric('replica_fallback', 'error')
+                logger.warning(f"복제본 상태 확인 실패 - 기본 DB로 조회합니다: {e}")
+            _replica_state.update(checked_at=time.monotonic(), usable=usable, lag=lag)
+    return _replica_state['usable']
+
+class BatchConnection:
+    """
+    /api/batch 처리 중 모든 작업이 함께 쓰는 DB 연결
+    각 작업의 commit()/close()는 무시하고 배치가 끝날 때 한 번에 커밋
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._rolled_back = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    @property
+    def rolled_back(self) -> bool:
+        """작업 중 롤백이 있었는지 (앞선 작업의 변경도 함께 취소됨)"""
+        return self._rolled_back
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._conn.rollback()
+        self._rolled_back = True
+
+    def close(self):
+        pass
+
+def get_db_connection(read_only: bool = False):
+    """
+    데이터베이스 연결 반환
+    요청 처리 중이면 남은 제한 시간이 지나면 DB 문장이 취소되도록 설정
+    
+    Args:
+        read_only: 조회 전용이고 약간의 지연이 허용되는 경우 True (복제본이 설정되어 있으면 복제본 사용)
+                   쓰기 및 인증 확인은 항상 기본 DB 사용
+    """
+    if has_request_context():
+        # /api/batch 작업 중이면 배치의 연결(한 트랜잭션)을 함께 사용
+        batch_conn = g.get('batch_connection')
+        if batch_conn is not None:
+            return batch_conn
+    
+    if read_only and replica_usable():
+        try:
+            return connect_replica()
+        except Exception as e:
+            increment_metric('replica_fallback', 'error')
+            logger.warning(f"복제본 연결 실패 - 기본 DB로 조회합니다: {e}")
+            with _replica_state_lock:
+                _replica_state.update(checked_at=time.monotonic(), usable=False)
+    
+    if USE_POSTGRESQL:
+        return connect_postgresql(DATABASE_URL)
+    return connect_sqlite(DB_PATH)
 
 def init_db():
     """데이터베이스 초기화 (안전하게 - 기존 데이터 보존)"""
@@ -65,7 +602,7 @@ def init_db():
         if not DATABASE_URL:
             logger.error("USE_POSTGRESQL이 True인데 DATABASE_URL이 없습니다!")
             raise ValueError("DATABASE_URL이 설정되지 않았습니다")
-        logger.info(f"PostgreSQL 연결 시도: {DATABASE_URL[:30]}...")
+        logger.info(f"PostgreSQL 연결 시도: {urlparse(DATABASE_URL).hostname}")
     
     conn = None
     try:
@@ -76,20 +613,19 @@ def init_db():
         required_tables = ['licenses', 'users', 'user_devices', 'user_access_tokens']
         tables_exist = {}
         try:
+            # 필수 테이블 존재 여부를 한 번에 조회
             if USE_POSTGRESQL:
-                for table_name in required_tables:
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM information_schema.tables 
-                        WHERE table_schema = 'public' AND table_name = %s
-                    """, (table_name,))
-                    tables_exist[table_name] = cursor.fetchone()[0] > 0
+                cursor.execute("""
+                    SELECT table_name FROM information_schema.tables 
+                    WHERE table_schema = 'public' AND table_name = ANY(%s)
+                """, (required_tables,))
             else:
-                for table_name in required_tables:
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM sqlite_master 
-                        WHERE type='table' AND name=?
-                    """, (table_name,))
-                    tables_exist[table_name] = cursor.fetchone()[0] > 0
+                cursor.execute(f"""
+                    SELECT name FROM sqlite_master 
+                    WHERE type='table' AND name IN ({', '.join('?' for _ in required_tables)})
+                """, required_tables)
+            found_tables = {row[0] for row in cursor.fetchall()}
+            tables_exist = {table_name: table_name in found_tables for table_name in required_tables}
             
             # 기존 데이터 개수 확인 및 로깅
             if tables_exist.get('licenses', False):
@@ -106,6 +642,7 @@ def init_db():
             all_tables_exist = all(tables_exist.get(table, False) for table in required_tables)
             if all_tables_exist:
                 logger.info("기존 테이블이 모두 존재합니다. 데이터를 보존합니다.")
+                upgrade_schema(conn, cursor)
                 conn.close()
                 return  # 테이블이 이미 있으면 생성하지 않음
             else:
@@ -569,6 +1106,8 @@ def init_db():
         
         conn.commit()
         logger.info("✓ 데이터베이스 테이블 생성 완료")
+        
+        upgrade_schema(conn, cursor)
     except Exception as e:
         if conn:
             conn.rollback()
@@ -578,16 +1117,232 @@ def init_db():
         if conn:
             conn.close()
 
+def upgrade_schema(conn, cursor):
+    """
+    추가 스키마 적용 (인덱스, 집계 테이블)
+    기존 테이블이 모두 있어 init_db()가 테이블 생성을 건너뛰는 경우에도 실행됨
+    """
+    # 단계별로 커밋 (한 단계가 실패해도 나머지는 적용)
+    for step in (ensure_payment_daily_revenue, ensure_usage_archive_schema, ensure_usage_report_schema):
+        try:
+            step(cursor)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"추가 스키마 적용 실패 ({step.__name__}): {e}")
+
+# 미리 만들어 둘 월별 파티션 개수 (PostgreSQL, 이번 달 포함)
+USAGE_PARTITION_MONTHS_AHEAD = 3
+
+def is_partitioned_table(cursor, table: str) -> bool:
+    """PostgreSQL 선언적 파티션 테이블인지 확인"""
+    if not USE_POSTGRESQL:
+        return False
+    cursor.execute("""
+        SELECT COUNT(*) FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+def ensure_usage_partitions(cursor, table: str, first_month: datetime.date = None):
+    """
+    월별 파티션 생성 (PostgreSQL 파티션 테이블인 경우에만)
+    
+    Args:
+        first_month: 생성을 시작할 월 (기본값: 이번 달)
+    """
+    if not is_partitioned_table(cursor, table):
+        return
+    
+    this_month = datetime.date.today().replace(day=1)
+    create_month_partitions(cursor, table, first_month or this_month,
+                            add_months(this_month, USAGE_PARTITION_MONTHS_AHEAD - 1))
+
+# 실행 중 월별 파티션 확인 주기 (초) - 서버가 오래 실행되어도 다음 달 파티션이 미리 준비되도록
+USAGE_PARTITION_CHECK_INTERVAL = 6 * 3600
+# 시작 시에는 upgrade_schema()에서 준비하므로 다음 확인은 주기 후
+_usage_partition_check = {'last': time.monotonic()}
+_usage_partition_lock = threading.Lock()
+
+def maintain_usage_partitions():
+    """앞으로 쓸 월별 파티션 준비 (기본 파티션에 들어간 해당 월 기록은 새 파티션으로 이동)"""
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        for table in USAGE_TABLES:
+            ensure_usage_partitions(cursor, table)
+            conn.commit()
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.warning(f"월별 파티션 준비 실패: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+@app.before_request
+def schedule_usage_partitions():
+    """USAGE_PARTITION_CHECK_INTERVAL초마다 백그라운드 스레드에서 월별 파티션 준비 (PostgreSQL, 요청은 기다리지 않음)"""
+    if not USE_POSTGRESQL:
+        return None
+    with _usage_partition_lock:
+        if time.monotonic() - _usage_partition_check['last'] < USAGE_PARTITION_CHECK_INTERVAL:
+            return None
+        _usage_partition_check['last'] = time.monotonic()
+    threading.Thread(target=maintain_usage_partitions, name='usage-partitions', daemon=True).start()
+    return None
+
+def ensure_usage_archive_schema(cursor):
+    """보관된 사용량 합계 테이블 생성 및 앞으로 쓸 월별 파티션 준비"""
+    # 보관(아카이브)되어 삭제된 기록의 소유자별 누적 합계 (전체 기간 통계 유지용)
+    if USE_POSTGRESQL:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usage_archive_totals (
+                source_table VARCHAR(50) NOT NULL,
+                owner_key VARCHAR(255) NOT NULL,
+                run_count INTEGER NOT NULL DEFAULT 0,
+                total_invoices BIGINT NOT NULL DEFAULT 0,
+                success_count BIGINT NOT NULL DEFAULT 0,
+                fail_count BIGINT NOT NULL DEFAULT 0,
+                last_usage TIMESTAMP,
+                PRIMARY KEY (source_table, owner_key)
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usage_archive_totals (
+                source_table TEXT NOT NULL,
+                owner_key TEXT NOT NULL,
+                run_count INTEGER NOT NULL DEFAULT 0,
+                total_invoices INTEGER NOT NULL DEFAULT 0,
+                success_count INTEGER NOT NULL DEFAULT 0,
+                fail_count INTEGER NOT NULL DEFAULT 0,
+                last_usage TEXT,
+                PRIMARY KEY (source_table, owner_key)
+            )
+        """)
+    
+    for table in USAGE_TABLES:
+        ensure_usage_partitions(cursor, table)
+
+def ensure_usage_report_schema(cursor):
+    """일괄 사용량 기록의 중복 방지 키 테이블 생성"""
+    if USE_POSTGRESQL:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usage_report_ids (
+                report_id VARCHAR(64) PRIMARY KEY,
+                user_id VARCHAR(100) NOT NULL,
+                received_at TIMESTAMP NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usage_report_ids (
+                report_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                received_at TEXT NOT NULL
+            )
+        """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_usage_report_ids_received_at ON usage_report_ids(received_at)")
+
+def load_archived_totals(conn, table: str):
+    """
+    보관된 기록의 소유자별 합계 행 조회 (usage_archive_totals)
+    
+    Returns:
+        (소유자, 실행 횟수, 송장 수, 성공, 실패, 마지막 사용) 리스트 - 조회 실패 시 None
+    """
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute("""
+                SELECT owner_key, run_count, total_invoices, success_count, fail_count, last_usage
+                FROM usage_archive_totals WHERE source_table = %s
+            """, (table,))
+        else:
+            cursor.execute("""
+                SELECT owner_key, run_count, total_invoices, success_count, fail_count, last_usage
+                FROM usage_archive_totals WHERE source_table = ?
+            """, (table,))
+        return cursor.fetchall()
+    except Exception as e:
+        # 보관 합계 테이블이 아직 없을 수 있음 (init_db 이전)
+        if USE_POSTGRESQL:
+            conn.rollback()
+        logger.warning(f"보관 사용량 합계 조회 실패: {e}")
+        return None
+    finally:
+        cursor.close()
+
+def sum_usage_rows(rows) -> dict:
+    """
+    소유자별 합계 행을 소유자별로 더함
+    
+    Returns:
+        {소유자: {'run_count', 'total_invoices', 'total_success', 'total_fail', 'last_usage'}}
+    """
+    totals = {}
+    for owner, run_count, total_invoices, total_success, total_fail, last_usage in rows:
+        entry = totals.setdefault(owner, {
+            'run_count': 0,
+            'total_invoices': 0,
+            'total_success': 0,
+            'total_fail': 0,
+            'last_usage': None
+        })
+        entry['run_count'] += int(run_count or 0)
+        entry['total_invoices'] += int(total_invoices or 0)
+        entry['total_success'] += int(total_success or 0)
+        entry['total_fail'] += int(total_fail or 0)
+        if last_usage and (entry['last_usage'] is None or last_usage > entry['last_usage']):
+            entry['last_usage'] = last_usage
+    return totals
+
+def load_usage_totals(conn, table: str) -> dict:
+    """
+    소유자별 사용량 합계 조회 (현재 테이블 + 보관된 합계)
+    
+    Args:
+        table: user_usage 또는 usage_stats
+        
+    Returns:
+        {소유자: {'run_count', 'total_invoices', 'total_success', 'total_fail', 'last_usage'}}
+    """
+    owner_column = USAGE_TABLES[table]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT 
+                {owner_column},
+                COUNT(*),
+                SUM(total_invoices),
+                SUM(success_count),
+                SUM(fail_count),
+                MAX(usage_date)
+            FROM {table}
+            GROUP BY {owner_column}
+        """)
+        live_rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    
+    archived_rows = load_archived_totals(conn, table) or []
+    return sum_usage_rows(list(archived_rows) + list(live_rows))
+
 def generate_license_key() -> str:
     """라이선스 키 생성"""
     return ''.join(secrets.choice('ABCDEFGHJKLMNPQRSTUVWXYZ23456789') for _ in range(16))
 
 def hash_password(password: str) -> str:
     """비밀번호 해싱"""
+    import bcrypt  # 로그인/가입 때만 필요하므로 처음 사용할 때 불러옴
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def verify_password(password: str, password_hash: str) -> bool:
     """비밀번호 검증"""
+    import bcrypt
     return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 def generate_access_token() -> str:
@@ -598,6 +1353,94 @@ def hash_token(token: str) -> str:
     """토큰 해시 (DB 저장용)"""
     return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
+class TTLCache:
+    """
+    짧은 시간 동안 조회 결과를 재사용하는 캐시 (워커 프로세스별)
+    변경한 워커는 즉시 무효화하고, 다른 워커는 TTL이 지나면 갱신됨
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = None
+        self._lock = threading.Lock()
+
+    def get(self, loader):
+        """캐시된 값 반환 (없거나 만료되었으면 loader()로 다시 조회)"""
+        expires_at = self._expires_at
+        if expires_at is not None and time.monotonic() < expires_at:
+            return self._value
+        
+        with self._lock:
+            # 다른 스레드가 이미 갱신했는지 다시 확인
+            expires_at = self._expires_at
+            if expires_at is not None and time.monotonic() < expires_at:
+                return self._value
+            value = loader()
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+            return value
+
+    def invalidate(self):
+        """캐시 무효화"""
+        with self._lock:
+            self._value = None
+            self._expires_at = None
+
+# 통계 캐시 설정 (/api/stats 응답을 짧은 시간 동안 재사용)
+# 만료 여부가 현재 시각에 따라 바뀌므로 TTL은 짧게 유지
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', '10'))
+_stats_cache = TTLCache(STATS_CACHE_TTL)
+
+def invalidate_stats_cache():
+    """통계 캐시 무효화 (라이선스/구독 변경 시 호출)"""
+    _stats_cache.invalidate()
+
+def load_license_stats() -> dict:
+    """
+    라이선스 통계 조회 (단일 집계 쿼리)
+    
+    Returns:
+        total_licenses, active_licenses, expired_licenses, total_revenue 딕셔너리
+    """
+    now = datetime.datetime.now()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute("""
+                SELECT 
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE expiry_date > %s AND is_active = TRUE),
+                    COUNT(*) FILTER (WHERE expiry_date <= %s OR is_active = FALSE),
+                    (SELECT COALESCE(SUM(amount), 0) FROM subscriptions)
+                FROM licenses
+            """, (now, now))
+        else:
+            cursor.execute("""
+                SELECT 
+                    COUNT(*),
+                    COALESCE(SUM(CASE WHEN expiry_date > ? AND is_active = 1 THEN 1 ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN expiry_date <= ? OR is_active = 0 THEN 1 ELSE 0 END), 0),
+                    (SELECT COALESCE(SUM(amount), 0) FROM subscriptions)
+                FROM licenses
+            """, (now.isoformat(), now.isoformat()))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    
+    return {
+        'total_licenses': row[0] or 0,
+        'active_licenses': row[1] or 0,
+        'expired_licenses': row[2] or 0,
+        'total_revenue': row[3] or 0
+    }
+
+def get_cached_license_stats() -> dict:
+    """라이선스 통계 조회 (TTL 캐시 적용)"""
+    return _stats_cache.get(load_license_stats)
+
 @app.route('/api/activate', methods=['POST'])
 def activate_license():
     """라이선스 활성화"""
@@ -698,9 +1541,26 @@ def activate_license():
     return jsonify({
         'success': True,
         'message': '라이선스가 활성화되었습니다.',
-        'expiry_date': expiry_date.isoformat()
+        'expiry_date': expiry_date.isoformat(),
+        'lease': create_license_lease(license_key, hardware_id, expiry_date)
     })
 
+# 오프라인 라이선스 임대 (클라이언트가 임대 기간 동안 서버 확인 없이 사용)
+# LICENSE_LEASE_PRIVATE_KEY 미설정 또는 cryptography 미설치 시 발급하지 않음
+LICENSE_LEASE_DAYS = float(os.environ.get('LICENSE_LEASE_DAYS', '7'))
+_lease_signing_key = None
+if os.environ.get('LICENSE_LEASE_PRIVATE_KEY'):
+    try:
+        _lease_signing_key = load_private_key(os.environ['LICENSE_LEASE_PRIVATE_KEY'])
+    except Exception as e:
+        logger.error(f"라이선스 임대 서명 키를 불러올 수 없습니다 (임대 발급 안 함): {e}")
+
+def create_license_lease(license_key: str, hardware_id: str, expiry_date: datetime.datetime):
+    """서명된 라이선스 임대 (서명 키가 없으면 None)"""
+    if _lease_signing_key is None:
+        return None
+    return issue_lease(_lease_signing_key, license_key, hardware_id, expiry_date, LICENSE_LEASE_DAYS * 86400)
+
 @app.route('/api/verify', methods=['POST'])
 def verify_license():
     """라이선스 검증 (주기적 검증)"""
@@ -770,7 +1630,8 @@ def verify_license():
     return jsonify({
         'success': True,
         'message': '라이선스가 유효합니다.',
-        'expiry_date': expiry_date.isoformat()
+        'expiry_date': expiry_date.isoformat(),
+        'lease': create_license_lease(license_key, hardware_id, expiry_date)
     })
 
 @app.route('/api/create_license', methods=['POST'])
@@ -832,6 +1693,7 @@ def create_license():
         # 커밋 실행
         logger.info("커밋 실행 중...")
         conn.commit()
+        invalidate_stats_cache()
         logger.info("커밋 완료")
         
         # 커밋 후 데이터 확인 (디버깅)
@@ -930,6 +1792,7 @@ def extend_license():
             """, (license_key, now.isoformat(), amount, period_days))
         
         conn.commit()
+        invalidate_stats_cache()
         
         import logging
         logger = logging.getLogger(__name__)
@@ -964,86 +1827,100 @@ def test_page():
     """한진택배 앱 테스트 페이지"""
     return render_template('test.html')
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """데이터베이스 연결 상태 확인"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
+# 서버 시작 시각 (liveness 응답용)
+SERVER_STARTED_AT = time.time()
+# 헬스 체크 상세 정보(버전, 라이선스 수 등) 캐시 시간 (초)
+HEALTH_DIAGNOSTICS_TTL = float(os.environ.get('HEALTH_DIAGNOSTICS_TTL', '60'))
+_health_diagnostics_cache = TTLCache(HEALTH_DIAGNOSTICS_TTL)
+
+def load_health_diagnostics(conn) -> dict:
+    """DB 상세 정보 조회 (버전, 이름, licenses 테이블 존재 여부와 개수)"""
+    cursor = conn.cursor()
     try:
-        logger.info(f"Health check: USE_POSTGRESQL={USE_POSTGRESQL}, DATABASE_URL 존재={bool(DATABASE_URL)}")
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 데이터베이스 타입 확인
         if USE_POSTGRESQL:
-            cursor.execute("SELECT version();")
-            db_version = cursor.fetchone()[0]
-            db_type = "PostgreSQL"
-            
-            # 현재 데이터베이스 이름 확인
-            cursor.execute("SELECT current_database();")
-            db_name = cursor.fetchone()[0]
-            
-            # 테이블 존재 확인 (public 스키마만)
             cursor.execute("""
-                SELECT COUNT(*) FROM information_schema.tables 
-                WHERE table_schema = 'public' AND table_name = 'licenses'
+                SELECT version(), current_database(), to_regclass('public.licenses') IS NOT NULL
             """)
-            table_exists = cursor.fetchone()[0] > 0
-            
-            # 데이터 개수 확인
-            if table_exists:
-                cursor.execute("SELECT COUNT(*) FROM licenses")
-                license_count = cursor.fetchone()[0]
-            else:
-                license_count = 0
+            db_version, db_name, table_exists = cursor.fetchone()
+            db_type = "PostgreSQL"
         else:
-            cursor.execute("SELECT sqlite_version();")
-            db_version = cursor.fetchone()[0]
-            db_type = "SQLite"
-            db_name = str(DB_PATH) if DB_PATH else "N/A"
-            
-            # 테이블 존재 확인
             cursor.execute("""
-                SELECT COUNT(*) FROM sqlite_master 
-                WHERE type='table' AND name='licenses'
+                SELECT sqlite_version(),
+                       (SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='licenses')
             """)
-            table_exists = cursor.fetchone()[0] > 0
-            
-            # 데이터 개수 확인
-            if table_exists:
-                cursor.execute("SELECT COUNT(*) FROM licenses")
-                license_count = cursor.fetchone()[0]
-            else:
-                license_count = 0
-        
-        conn.close()
-        
-        result = {
-            'success': True,
-            'database_type': db_type,
-            'database_name': db_name,
-            'database_version': db_version,
-            'connected': True,
-            'table_exists': table_exists,
-            'license_count': license_count,
-            'database_url_set': USE_POSTGRESQL,
-            'database_url_present': bool(DATABASE_URL),
-            'database_url_preview': DATABASE_URL[:50] + '...' if DATABASE_URL and len(DATABASE_URL) > 50 else (DATABASE_URL or 'None')
-        }
+            db_version, table_count = cursor.fetchone()
+            table_exists = table_count > 0
+            db_type = "SQLite"
+            db_name = str(DB_PATH) if DB_PATH else "N/A"
         
-        logger.info(f"Health check 결과: {result}")
-        return jsonify(result)
+        license_count = 0
+        if table_exists:
+            cursor.execute("SELECT COUNT(*) FROM licenses")
+            license_count = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    
+    return {
+        'database_type': db_type,
+        'database_name': db_name,
+        'database_version': db_version,
+        'table_exists': bool(table_exists),
+        'license_count': license_count,
+        'checked_at': datetime.datetime.now().isoformat()
+    }
+
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """프로세스 동작 확인 (DB 접근 없음)"""
+    return jsonify({
+        'success': True,
+        'status': 'alive',
+        'pid': os.getpid(),
+        'uptime_seconds': int(time.time() - SERVER_STARTED_AT)
+    })
+
+@app.route('/api/health', methods=['GET'])
+@app.route('/api/health/ready', methods=['GET'])
+def health_check():
+    """
+    요청 처리 가능 여부 확인 (풀의 DB 연결로 SELECT 1)
+    버전/라이선스 수 등 상세 정보는 HEALTH_DIAGNOSTICS_TTL 동안 캐시
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        
+        diagnostics = _health_diagnostics_cache.get(lambda: load_health_diagnostics(conn))
+        
+        return jsonify({
+            'success': True,
+            'status': 'ready',
+            'connected': True,
+            **diagnostics,
+            'database_url_set': USE_POSTGRESQL,
+            'replica': {
+                'enabled': REPLICA_ENABLED,
+                'usable': _replica_state['usable'],
+                'lag_seconds': _replica_state['lag']
+            }
+        })
     except Exception as e:
+        logger.warning(f"Health check 실패: {e}")
         import traceback
         return jsonify({
             'success': False,
+            'status': 'unavailable',
             'connected': False,
             'error': str(e),
             'traceback': traceback.format_exc() if os.environ.get('DEBUG') == 'True' else None
-        }), 500
+        }), 503
+    finally:
+        if conn:
+            conn.close()
 
 @app.route('/api/license_info', methods=['POST'])
 def get_license_info():
@@ -1120,7 +1997,7 @@ def list_licenses():
         if admin_key != ADMIN_KEY:
             return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
         
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         if USE_POSTGRESQL:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
         else:
@@ -1141,8 +2018,13 @@ def list_licenses():
                 ORDER BY created_date DESC
             """)
         
+        license_rows = cursor.fetchall()
+        
+        # 라이선스별 사용 통계를 한 번에 조회
+        usage_totals = load_usage_totals(conn, 'usage_stats')
+        
         licenses = []
-        for row in cursor.fetchall():
+        for row in license_rows:
             if USE_POSTGRESQL:
                 expiry_date_val = row.get('expiry_date')
                 if isinstance(expiry_date_val, str):
@@ -1156,108 +2038,27 @@ def list_licenses():
             
             is_expired = datetime.datetime.now() > expiry_date
             
-            # 사용 통계 조회
-            if USE_POSTGRESQL:
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as run_count,
-                        SUM(total_invoices) as total_invoices,
-                        MAX(usage_date) as last_usage
-                    FROM usage_stats
-                    WHERE license_key = %s
-                """, (license_key_val,))
-            else:
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as run_count,
-                        SUM(total_invoices) as total_invoices,
-                        MAX(usage_date) as last_usage
-                    FROM usage_stats
-                    WHERE license_key = ?
-                """, (license_key_val,))
-            
-            usage_data = cursor.fetchone()
-            
-            # 사용 통계 데이터 안전하게 추출
-            if USE_POSTGRESQL:
-                if usage_data:
-                    run_count = usage_data.get('run_count') or 0
-                    total_invoices = usage_data.get('total_invoices') or 0
-                    last_usage = usage_data.get('last_usage')
-                else:
-                    run_count = 0
-                    total_invoices = 0
-                    last_usage = None
-            else:
-                if usage_data:
-                    run_count = usage_data[0] or 0
-                    total_invoices = usage_data[1] or 0
-                    last_usage = usage_data[2]
-                else:
-                    run_count = 0
-                    total_invoices = 0
-                    last_usage = None
-            
-            # 날짜 형식 변환
-            if last_usage:
-                if isinstance(last_usage, str):
-                    last_usage_str = last_usage
-                elif hasattr(last_usage, 'isoformat'):
-                    last_usage_str = last_usage.isoformat()
-                else:
-                    last_usage_str = str(last_usage)
-            else:
-                last_usage_str = None
+            # 사용 통계 (현재 기록 + 보관된 합계)
+            usage_data = usage_totals.get(license_key_val) or {}
+            run_count = usage_data.get('run_count', 0)
+            total_invoices = usage_data.get('total_invoices', 0)
+            # 날짜 값은 JSON 변환 시 ISO 형식 문자열로 직렬화됨
+            last_usage = usage_data.get('last_usage')
             
             if USE_POSTGRESQL:
-                # expiry_date 처리
-                expiry_date_val = row.get('expiry_date')
-                if isinstance(expiry_date_val, str):
-                    expiry_date_obj = datetime.datetime.fromisoformat(expiry_date_val.replace('Z', '+00:00'))
-                elif hasattr(expiry_date_val, 'isoformat'):
-                    expiry_date_obj = expiry_date_val
-                else:
-                    expiry_date_obj = expiry_date_val
-                
-                expiry_date_str = expiry_date_obj.isoformat() if hasattr(expiry_date_obj, 'isoformat') else str(expiry_date_obj)
-                
-                # last_verified 처리
-                last_verified_val = row.get('last_verified')
-                if last_verified_val:
-                    if isinstance(last_verified_val, str):
-                        last_verified_str = last_verified_val
-                    elif hasattr(last_verified_val, 'isoformat'):
-                        last_verified_str = last_verified_val.isoformat()
-                    else:
-                        last_verified_str = str(last_verified_val)
-                else:
-                    last_verified_str = ''
-                
-                # created_date 처리
-                created_date_val = row.get('created_date')
-                if created_date_val:
-                    if isinstance(created_date_val, str):
-                        created_date_str = created_date_val
-                    elif hasattr(created_date_val, 'isoformat'):
-                        created_date_str = created_date_val.isoformat()
-                    else:
-                        created_date_str = str(created_date_val)
-                else:
-                    created_date_str = ''
-                
                 licenses.append({
                     'license_key': row.get('license_key', ''),
                     'customer_name': row.get('customer_name') or '',
                     'customer_email': row.get('customer_email') or '',
-                    'expiry_date': expiry_date_str,
+                    'expiry_date': expiry_date,
                     'subscription_type': row.get('subscription_type') or '',
                     'is_active': bool(row.get('is_active')),
                     'is_expired': is_expired,
-                    'last_verified': last_verified_str,
-                    'created_date': created_date_str,
+                    'last_verified': row.get('last_verified') or '',
+                    'created_date': row.get('created_date') or '',
                     'run_count': run_count,
                     'total_invoices': total_invoices,
-                    'last_usage': last_usage_str
+                    'last_usage': last_usage
                 })
             else:
                 licenses.append({
@@ -1272,7 +2073,7 @@ def list_licenses():
                     'created_date': row[7] or '' if len(row) > 7 else '',
                     'run_count': run_count,
                     'total_invoices': total_invoices,
-                    'last_usage': last_usage_str
+                    'last_usage': last_usage
                 })
         
         return jsonify({
@@ -1354,6 +2155,7 @@ def toggle_license():
             """, (1 if new_status else 0, license_key))
         
         conn.commit()
+        invalidate_stats_cache()
         
         action = '활성화' if new_status else '중지'
         return jsonify({
@@ -1384,77 +2186,31 @@ def get_stats():
     if admin_key != ADMIN_KEY:
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 전체 라이선스 수
-    cursor.execute("SELECT COUNT(*) FROM licenses")
-    total_licenses = cursor.fetchone()[0]
-    
-    # 활성 라이선스 수 (만료일이 미래이고 활성화된 것)
-    now = datetime.datetime.now()
-    if USE_POSTGRESQL:
-        # PostgreSQL: expiry_date는 TIMESTAMP 타입
-        cursor.execute("""
-            SELECT COUNT(*) FROM licenses 
-            WHERE expiry_date > %s AND is_active = TRUE
-        """, (now,))
-    else:
-        # SQLite: expiry_date는 TEXT(ISO 문자열)
-        cursor.execute("""
-            SELECT COUNT(*) FROM licenses 
-            WHERE expiry_date > ? AND is_active = 1
-        """, (now.isoformat(),))
-    active_licenses = cursor.fetchone()[0]
-    
-    # 만료된 라이선스 수 (만료일이 지났거나 비활성화된 것)
-    if USE_POSTGRESQL:
-        cursor.execute("""
-            SELECT COUNT(*) FROM licenses 
-            WHERE expiry_date <= %s OR is_active = FALSE
-        """, (now,))
-    else:
-        cursor.execute("""
-            SELECT COUNT(*) FROM licenses 
-            WHERE expiry_date <= ? OR is_active = 0
-        """, (now.isoformat(),))
-    expired_licenses = cursor.fetchone()[0]
-    
-    # 총 수익
-    cursor.execute("SELECT COALESCE(SUM(amount), 0) FROM subscriptions")
-    total_revenue = cursor.fetchone()[0] or 0
-    
-    # 디버깅: 실제 데이터 확인
-    if USE_POSTGRESQL:
-        cursor.execute("""
-            SELECT license_key, expiry_date, is_active, created_date 
-            FROM licenses 
-            ORDER BY created_date DESC 
-            LIMIT 5
-        """)
-    else:
-        cursor.execute("""
-            SELECT license_key, expiry_date, is_active, created_date 
-            FROM licenses 
-            ORDER BY created_date DESC 
-            LIMIT 5
-        """)
-    debug_data = cursor.fetchall()
-    
-    conn.close()
-    
-    # 디버깅 로그 (개발 환경에서만)
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Stats Debug - Total: {total_licenses}, Active: {active_licenses}, Expired: {expired_licenses}, Now: {now}")
-    logger.info(f"Debug Data: {debug_data}")
+    try:
+        stats = get_cached_license_stats()
+    except Exception as e:
+        logger.error(f"통계 조회 오류: {e}", exc_info=True)
+        return jsonify({'success': False, 'message': f'오류가 발생했습니다: {str(e)}'}), 500
     
     return jsonify({
         'success': True,
-        'total_licenses': total_licenses,
-        'active_licenses': active_licenses,
-        'expired_licenses': expired_licenses,
-        'total_revenue': total_revenue
+        **stats
+    })
+
+@app.route('/api/server_metrics', methods=['POST'])
+def get_server_metrics():
+    """서버 지표 조회 (관리자용, 현재 워커 프로세스 기준)"""
+    data = request.get_json(silent=True) or {}
+    admin_key = data.get('admin_key', '')
+
+    if admin_key != ADMIN_KEY:
+        return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
+
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'deadlines': REQUEST_DEADLINES,
+        'metrics': snapshot_metrics()
     })
 
 @app.route('/api/record_usage', methods=['POST'])
@@ -2580,7 +3336,7 @@ def list_users():
     if admin_key != ADMIN_KEY:
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if USE_POSTGRESQL:
         cursor = conn.cursor(cursor_factory=RealDictCursor)
     else:
@@ -2603,43 +3359,32 @@ def list_users():
             ORDER BY u.created_date DESC
         """)
     
+    user_rows = cursor.fetchall()
+    
+    # 사용자별 사용량 합계를 한 번에 조회
+    usage_totals = load_usage_totals(conn, 'user_usage')
+    
     users = []
-    for row in cursor.fetchall():
+    for row in user_rows:
         if USE_POSTGRESQL:
             user_id = row.get('user_id')
-            expiry_date_val = row.get('expiry_date')
-            if expiry_date_val:
-                if isinstance(expiry_date_val, str):
-                    expiry_date = expiry_date_val
-                else:
-                    expiry_date = expiry_date_val.isoformat()
-            else:
-                expiry_date = None
+            # 날짜 값은 JSON 변환 시 ISO 형식 문자열로 직렬화됨
+            expiry_date = row.get('expiry_date') or None
             
-            # 사용자 통계 정보 조회 (작업 횟수, 총 송장 건수)
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as work_count,
-                    SUM(total_invoices) as total_invoices,
-                    SUM(success_count) as total_success,
-                    SUM(fail_count) as total_fail
-                FROM user_usage
-                WHERE user_id = %s
-            """, (user_id,))
-            stats = cursor.fetchone()
-            
-            work_count = stats.get('work_count') or 0 if stats else 0
-            total_invoices = stats.get('total_invoices') or 0 if stats else 0
-            total_success = stats.get('total_success') or 0 if stats else 0
-            total_fail = stats.get('total_fail') or 0 if stats else 0
+            # 사용자 통계 정보 (작업 횟수, 총 송장 건수)
+            stats = usage_totals.get(user_id)
+            work_count = stats['run_count'] if stats else 0
+            total_invoices = stats['total_invoices'] if stats else 0
+            total_success = stats['total_success'] if stats else 0
+            total_fail = stats['total_fail'] if stats else 0
             
             users.append({
                 'user_id': user_id,
                 'name': row.get('name'),
                 'email': row.get('email'),
                 'is_active': bool(row.get('is_active')),
-                'created_date': row.get('created_date').isoformat() if row.get('created_date') and hasattr(row.get('created_date'), 'isoformat') else (row.get('created_date') or ''),
-                'last_login': row.get('last_login').isoformat() if row.get('last_login') and hasattr(row.get('last_login'), 'isoformat') else (row.get('last_login') or ''),
+                'created_date': row.get('created_date') or '',
+                'last_login': row.get('last_login') or '',
                 'expiry_date': expiry_date,
                 'work_count': work_count,
                 'total_invoices': total_invoices,
@@ -2651,22 +3396,12 @@ def list_users():
             expiry_date_val = row[6] if len(row) > 6 else None
             expiry_date = expiry_date_val if expiry_date_val else None
             
-            # 사용자 통계 정보 조회 (작업 횟수, 총 송장 건수)
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as work_count,
-                    SUM(total_invoices) as total_invoices,
-                    SUM(success_count) as total_success,
-                    SUM(fail_count) as total_fail
-                FROM user_usage
-                WHERE user_id = ?
-            """, (user_id,))
-            stats = cursor.fetchone()
-            
-            work_count = stats[0] or 0 if stats else 0
-            total_invoices = stats[1] or 0 if stats else 0
-            total_success = stats[2] or 0 if stats else 0
-            total_fail = stats[3] or 0 if stats else 0
+            # 사용자 통계 정보 (작업 횟수, 총 송장 건수)
+            stats = usage_totals.get(user_id)
+            work_count = stats['run_count'] if stats else 0
+            total_invoices = stats['total_invoices'] if stats else 0
+            total_success = stats['total_success'] if stats else 0
+            total_fail = stats['total_fail'] if stats else 0
             
             users.append({
                 'user_id': user_id,
@@ -3054,6 +3789,9 @@ def extend_user_subscription():
             UPDATE users SET is_active = 1 WHERE user_id = ?
         """, (user_id,))
     
+    # 일별 매출 집계 반영
+    apply_payment_to_daily_revenue(cursor, now, payment_method, period_days, amount)
+    
     conn.commit()
     conn.close()
     
@@ -3103,6 +3841,132 @@ def record_user_usage():
         'message': '사용량이 기록되었습니다.'
     })
 
+# 일괄 사용량 기록 한 번에 받을 최대 건수
+USAGE_BULK_MAX_RECORDS = 100
+# 중복 방지 키 보관 기간 (클라이언트가 재전송할 수 있는 기간보다 길게)
+USAGE_REPORT_ID_RETENTION_DAYS = int(os.environ.get('USAGE_REPORT_ID_RETENTION_DAYS', '90'))
+USAGE_REPORT_ID_PRUNE_INTERVAL = 3600
+_usage_report_prune = {'last': 0.0}
+
+def parse_report_time(value, now: datetime.datetime) -> datetime.datetime:
+    """클라이언트 기록 시각 (없거나 형식 오류, 미래, 보관 기간 이전이면 서버 시각)"""
+    try:
+        recorded_at = datetime.datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return now
+    if recorded_at.tzinfo is not None:
+        # 서버 시간대 기준으로 변환 (usage_date는 서버 로컬 시각으로 저장)
+        recorded_at = recorded_at.astimezone().replace(tzinfo=None)
+    if recorded_at > now or recorded_at < now - datetime.timedelta(days=USAGE_REPORT_ID_RETENTION_DAYS):
+        return now
+    return recorded_at
+
+def prune_usage_report_ids(cursor, now: datetime.datetime):
+    """오래된 중복 방지 키 정리 (프로세스마다 USAGE_REPORT_ID_PRUNE_INTERVAL초에 한 번)"""
+    if time.monotonic() - _usage_report_prune['last'] < USAGE_REPORT_ID_PRUNE_INTERVAL:
+        return
+    _usage_report_prune['last'] = time.monotonic()
+    cutoff = now - datetime.timedelta(days=USAGE_REPORT_ID_RETENTION_DAYS)
+    if USE_POSTGRESQL:
+        cursor.execute("DELETE FROM usage_report_ids WHERE received_at < %s", (cutoff,))
+    else:
+        cursor.execute("DELETE FROM usage_report_ids WHERE received_at < ?", (cutoff.isoformat(),))
+
+@app.route('/api/record_user_usage_bulk', methods=['POST'])
+def record_user_usage_bulk():
+    """
+    사용자 사용량 일괄 기록 (클라이언트 보관함 전송용)
+    이미 받은 report_id는 다시 반영하지 않고 duplicates로 응답 (재전송해도 중복 집계 없음)
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = str(data.get('user_id') or '').strip()
+    records = data.get('records')
+    
+    if not user_id:
+        return jsonify({'success': False, 'message': '사용자 ID가 필요합니다.'}), 400
+    if not isinstance(records, list) or not records:
+        return jsonify({'success': False, 'message': '기록이 없습니다.'}), 400
+    if len(records) > USAGE_BULK_MAX_RECORDS:
+        return jsonify({'success': False, 'message': f'한 번에 최대 {USAGE_BULK_MAX_RECORDS}건까지 기록할 수 있습니다.'}), 400
+    
+    now = datetime.datetime.now()
+    rows = []
+    rejected = []
+    for record in records:
+        report_id = str(record.get('report_id') or '').strip() if isinstance(record, dict) else ''
+        if not report_id or len(report_id) > 64:
+            rejected.append({'report_id': report_id or None, 'message': 'report_id가 올바르지 않습니다.'})
+            continue
+        try:
+            counts = tuple(int(record.get(key) or 0) for key in ('total_invoices', 'success_count', 'fail_count'))
+        except (TypeError, ValueError):
+            counts = (-1,)
+        if min(counts) < 0:
+            rejected.append({'report_id': report_id, 'message': '건수가 올바르지 않습니다.'})
+            continue
+        rows.append((
+            report_id,
+            parse_report_time(record.get('recorded_at'), now),
+            counts,
+            str(record.get('mac_address') or '').strip().upper(),
+            str(record.get('hardware_id') or '')
+        ))
+    
+    accepted = []
+    duplicates = []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute("SELECT 1 FROM users WHERE user_id = %s", (user_id,))
+        else:
+            cursor.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
+        if not cursor.fetchone():
+            return jsonify({'success': False, 'message': '사용자를 찾을 수 없습니다.'}), 404
+        
+        for report_id, usage_date, (total_invoices, success_count, fail_count), mac_address, hardware_id in rows:
+            # 중복 방지 키를 먼저 등록하고, 새로 등록된 경우에만 사용량 반영 (같은 트랜잭션)
+            if USE_POSTGRESQL:
+                cursor.execute("""
+                    INSERT INTO usage_report_ids (report_id, user_id, received_at) VALUES (%s, %s, %s)
+                    ON CONFLICT (report_id) DO NOTHING
+                """, (report_id, user_id, now))
+            else:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO usage_report_ids (report_id, user_id, received_at) VALUES (?, ?, ?)
+                """, (report_id, user_id, now.isoformat()))
+            if cursor.rowcount == 0:
+                duplicates.append(report_id)
+                continue
+            
+            if USE_POSTGRESQL:
+                cursor.execute("""
+                    INSERT INTO user_usage (user_id, usage_date, total_invoices, success_count, fail_count, mac_address, hardware_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (user_id, usage_date, total_invoices, success_count, fail_count, mac_address, hardware_id))
+            else:
+                cursor.execute("""
+                    INSERT INTO user_usage (user_id, usage_date, total_invoices, success_count, fail_count, mac_address, hardware_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (user_id, usage_date.isoformat(), total_invoices, success_count, fail_count, mac_address, hardware_id))
+            accepted.append(report_id)
+        
+        prune_usage_report_ids(cursor, now)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    return jsonify({
+        'success': True,
+        'message': f'사용량 {len(accepted)}건이 기록되었습니다.',
+        'accepted': accepted,
+        'duplicates': duplicates,
+        'rejected': rejected
+    })
+
 @app.route('/api/usage_stats', methods=['POST'])
 def get_usage_stats():
     """사용 통계 조회 (관리자용)"""
@@ -3113,110 +3977,126 @@ def get_usage_stats():
     if admin_key != ADMIN_KEY:
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    if license_key:
-        # 특정 라이선스 통계
-        if USE_POSTGRESQL:
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_runs,
-                    SUM(total_invoices) as total_invoices,
-                    SUM(success_count) as total_success,
-                    SUM(fail_count) as total_fail,
-                    MAX(usage_date) as last_usage
-                FROM usage_stats
-                WHERE license_key = %s
-            """, (license_key,))
-        else:
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_runs,
-                    SUM(total_invoices) as total_invoices,
-                    SUM(success_count) as total_success,
-                    SUM(fail_count) as total_fail,
-                    MAX(usage_date) as last_usage
-                FROM usage_stats
-                WHERE license_key = ?
-            """, (license_key,))
-    else:
-        # 전체 통계
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_runs,
-                SUM(total_invoices) as total_invoices,
-                SUM(success_count) as total_success,
-                SUM(fail_count) as total_fail,
-                MAX(usage_date) as last_usage
-            FROM usage_stats
-        """)
-    
-    result = cursor.fetchone()
-    
-    # 라이선스별 상세 통계
-    if USE_POSTGRESQL:
-        cursor.execute("""
-            SELECT 
-                license_key,
-                COUNT(*) as run_count,
-                SUM(total_invoices) as total_invoices,
-                SUM(success_count) as total_success,
-                SUM(fail_count) as total_fail,
-                MAX(usage_date) as last_usage
-            FROM usage_stats
-            GROUP BY license_key
-            ORDER BY last_usage DESC
-        """)
-    else:
-        cursor.execute("""
-            SELECT 
-                license_key,
-                COUNT(*) as run_count,
-                SUM(total_invoices) as total_invoices,
-                SUM(success_count) as total_success,
-                SUM(fail_count) as total_fail,
-                MAX(usage_date) as last_usage
-            FROM usage_stats
-            GROUP BY license_key
-            ORDER BY last_usage DESC
-        """)
-    
-    license_stats = []
-    for row in cursor.fetchall():
-        if USE_POSTGRESQL:
-            license_stats.append({
-                'license_key': row[0],
-                'run_count': row[1],
-                'total_invoices': row[2] or 0,
-                'total_success': row[3] or 0,
-                'total_fail': row[4] or 0,
-                'last_usage': row[5].isoformat() if row[5] and hasattr(row[5], 'isoformat') else (row[5] or '')
-            })
-        else:
-            license_stats.append({
-                'license_key': row[0],
-                'run_count': row[1],
-                'total_invoices': row[2] or 0,
-                'total_success': row[3] or 0,
-                'total_fail': row[4] or 0,
-                'last_usage': row[5]
-            })
+    conn = get_db_connection(read_only=True)
+    try:
+        # 라이선스별 합계 (현재 기록 + 보관된 합계)
+        usage_totals = load_usage_totals(conn, 'usage_stats')
+    finally:
+        conn.close()
     
-    conn.close()
+    def format_last_usage(value):
+        if value and hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value or ''
+    
+    # 라이선스별 상세 통계 (최근 사용 순)
+    ordered = sorted(usage_totals.items(), key=lambda item: str(format_last_usage(item[1]['last_usage'])), reverse=True)
+    license_stats = [{
+        'license_key': key,
+        'run_count': totals['run_count'],
+        'total_invoices': totals['total_invoices'],
+        'total_success': totals['total_success'],
+        'total_fail': totals['total_fail'],
+        'last_usage': format_last_usage(totals['last_usage'])
+    } for key, totals in ordered]
+    
+    # 요약 (특정 라이선스 또는 전체)
+    selected = [usage_totals[license_key]] if license_key in usage_totals else ([] if license_key else list(usage_totals.values()))
+    last_usages = [totals['last_usage'] for totals in selected if totals['last_usage']]
     
     return jsonify({
         'success': True,
         'summary': {
-            'total_runs': result[0] or 0,
-            'total_invoices': result[1] or 0,
-            'total_success': result[2] or 0,
-            'total_fail': result[3] or 0,
-            'last_usage': result[4].isoformat() if result[4] and hasattr(result[4], 'isoformat') else (result[4] or '')
+            'total_runs': sum(totals['run_count'] for totals in selected),
+            'total_invoices': sum(totals['total_invoices'] for totals in selected),
+            'total_success': sum(totals['total_success'] for totals in selected),
+            'total_fail': sum(totals['total_fail'] for totals in selected),
+            'last_usage': format_last_usage(max(last_usages) if last_usages else None)
         },
         'by_license': license_stats
     })
 
+@app.route('/api/archived_usage', methods=['POST'])
+def get_archived_usage():
+    """
+    보관된 사용량 기록 조회 (관리자용)
+
+    요청 데이터:
+    - table: user_usage 또는 usage_stats (기본값: user_usage)
+    - owner: 사용자 ID 또는 라이선스 키 (선택사항)
+    - from / to: 조회 월 'YYYY-MM' (포함, 선택사항)
+    - limit: 반환할 최대 행 수 (기본값: 1000)
+
+    summary는 월 범위가 없으면 보관할 때 누적한 합계(usage_archive_totals), 있으면 행을 읽으면서 함께 계산
+    """
+    data = request.json or {}
+    admin_key = data.get('admin_key', '')
+
+    if admin_key != ADMIN_KEY:
+        return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
+
+    table = data.get('table') or 'user_usage'
+    if table not in USAGE_TABLES:
+        return jsonify({'success': False, 'message': f'지원하지 않는 테이블입니다: {table}'}), 400
+
+    owner = (data.get('owner') or '').strip() or None
+    if owner and table == 'usage_stats':
+        owner = owner.upper()
+    month_from = data.get('from') or None
+    month_to = data.get('to') or None
+    for value in (month_from, month_to):
+        if value:
+            try:
+                datetime.datetime.strptime(value, '%Y-%m')
+            except ValueError:
+                return jsonify({'success': False, 'message': '월 형식이 올바르지 않습니다. (YYYY-MM)'}), 400
+    try:
+        limit = max(1, min(int(data.get('limit') or 1000), 10000))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'limit 값이 올바르지 않습니다.'}), 400
+
+    try:
+        reader = UsageArchiveReader(USAGE_ARCHIVE_DIR)
+        summary = None
+        if not month_from and not month_to:
+            # 전체 기간 합계는 보관할 때 누적한 합계 테이블 사용 (보관 파일 전체를 읽지 않음)
+            conn = get_db_connection(read_only=True)
+            try:
+                archived_rows = load_archived_totals(conn, table)
+            finally:
+                conn.close()
+            if archived_rows is not None:
+                # 소유자 구분 없이 한 항목으로 더함
+                matched = [(None, *row[1:]) for row in archived_rows if not owner or row[0] == owner]
+                summary = sum_usage_rows(matched).get(None) or new_usage_summary()
+                if hasattr(summary['last_usage'], 'isoformat'):
+                    summary['last_usage'] = summary['last_usage'].isoformat()
+
+        if summary is None:
+            # 월 범위 합계는 행을 읽으면서 함께 계산 (보관 파일을 한 번만 읽음)
+            rows, truncated, summary = reader.read_rows(table, month_from, month_to, owner, limit)
+        else:
+            # limit보다 한 행 더 읽어 남은 기록이 있는지 확인
+            rows = []
+            for row in reader.iter_rows(table, month_from, month_to, owner):
+                rows.append(row)
+                if len(rows) > limit:
+                    break
+            truncated = len(rows) > limit
+            rows = rows[:limit]
+
+        return jsonify({
+            'success': True,
+            'table': table,
+            'months': reader.list_months(table),
+            'summary': summary,
+            'rows': rows,
+            'truncated': truncated
+        })
+    except Exception as e:
+        logger.error(f"보관 사용량 조회 오류: {e}")
+        return jsonify({'success': False, 'message': f'조회 실패: {str(e)}'}), 500
+
 def send_telegram_message(message: str) -> bool:
     """
     텔레그램 봇으로 메시지 전송
@@ -3242,6 +4122,7 @@ def send_telegram_message(message: str) -> bool:
             "parse_mode": "HTML"
         }
         
+        import requests  # 관리자 메시지 전송 때만 필요하므로 처음 사용할 때 불러옴
         response = requests.post(url, json=payload, timeout=10)
         
         if response.status_code == 200:
@@ -3421,75 +4302,82 @@ def toggle_user_active():
     finally:
         conn.close()
 
-@app.route('/api/get_pricing_settings', methods=['POST'])
-def get_pricing_settings():
-    """사용료 설정 조회"""
-    data = request.json
-    admin_key = data.get('admin_key', '')
-    
-    if admin_key != ADMIN_KEY:
-        return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
+# 사용료 설정/결제 방법 캐시
+PRICING_CACHE_TTL = float(os.environ.get('PRICING_CACHE_TTL', '60'))
+_pricing_cache = TTLCache(PRICING_CACHE_TTL)
+
+def load_pricing_settings() -> dict:
+    """
+    사용료 설정과 결제 방법 목록 조회 (테이블이 없으면 빈 값)
     
+    Returns:
+        {'pricing': {기간(일): 금액}, 'payment_methods': [결제 방법]}
+    """
     conn = get_db_connection()
-    if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-    else:
-        cursor = conn.cursor()
-    
+    cursor = conn.cursor()
     try:
-        # 사용료 설정 조회 (테이블이 없을 수 있으므로 try-except로 감싸기)
         pricing = {}
         try:
-            if USE_POSTGRESQL:
-                cursor.execute("SELECT period_days, amount FROM subscription_pricing ORDER BY period_days")
-                rows = cursor.fetchall()
-                pricing = {row['period_days']: float(row['amount']) for row in rows}
-            else:
-                cursor.execute("SELECT period_days, amount FROM subscription_pricing ORDER BY period_days")
-                rows = cursor.fetchall()
-                pricing = {row[0]: float(row[1]) for row in rows}
+            cursor.execute("SELECT period_days, amount FROM subscription_pricing ORDER BY period_days")
+            pricing = {row[0]: float(row[1]) for row in cursor.fetchall()}
         except Exception as e:
             # 테이블이 없거나 오류 발생 시 빈 딕셔너리 반환
             logger.warning(f"사용료 설정 조회 실패 (테이블 없을 수 있음): {e}")
-            pricing = {}
+            if USE_POSTGRESQL:
+                conn.rollback()
         
-        # 결제 방법 목록도 함께 반환 (테이블이 없을 수 있으므로 try-except로 감싸기)
         payment_methods = []
         try:
-            if USE_POSTGRESQL:
-                cursor.execute("SELECT method_name FROM payment_methods ORDER BY method_name")
-                method_rows = cursor.fetchall()
-                payment_methods = [row['method_name'] for row in method_rows]
-            else:
-                cursor.execute("SELECT method_name FROM payment_methods ORDER BY method_name")
-                method_rows = cursor.fetchall()
-                payment_methods = [row[0] for row in method_rows]
+            cursor.execute("SELECT method_name FROM payment_methods ORDER BY method_name")
+            payment_methods = [row[0] for row in cursor.fetchall()]
         except Exception as e:
             # 테이블이 없거나 오류 발생 시 빈 배열 반환
             logger.warning(f"결제 방법 목록 조회 실패 (테이블 없을 수 있음): {e}")
-            payment_methods = []
         
-        return jsonify({
-            'success': True,
-            'pricing': pricing,
-            'payment_methods': payment_methods
-        })
-    except Exception as e:
-        logger.error(f"사용료 설정 조회 오류: {e}", exc_info=True)
-        return jsonify({'success': False, 'message': f'오류가 발생했습니다: {str(e)}'}), 500
+        return {'pricing': pricing, 'payment_methods': payment_methods}
     finally:
+        cursor.close()
         conn.close()
 
-@app.route('/api/update_pricing_settings', methods=['POST'])
-def update_pricing_settings():
-    """사용료 설정 업데이트"""
+def get_cached_pricing_settings() -> dict:
+    """사용료 설정과 결제 방법 목록 조회 (TTL 캐시 적용)"""
+    return _pricing_cache.get(load_pricing_settings)
+
+def invalidate_pricing_cache():
+    """사용료 설정 캐시 무효화 (사용료/결제 방법 변경 시 호출)"""
+    _pricing_cache.invalidate()
+
+@app.route('/api/get_pricing_settings', methods=['POST'])
+def get_pricing_settings():
+    """사용료 설정 조회"""
     data = request.json
     admin_key = data.get('admin_key', '')
     
     if admin_key != ADMIN_KEY:
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
-    pricing = data.get('pricing', {})  # {30: 10000, 90: 25000, ...}
+    try:
+        settings = get_cached_pricing_settings()
+    except Exception as e:
+        logger.error(f"사용료 설정 조회 오류: {e}", exc_info=True)
+        return jsonify({'success': False, 'message': f'오류가 발생했습니다: {str(e)}'}), 500
+    
+    return jsonify({
+        'success': True,
+        'pricing': settings['pricing'],
+        'payment_methods': settings['payment_methods']
+    })
+
+@app.route('/api/update_pricing_settings', methods=['POST'])
+def update_pricing_settings():
+    """사용료 설정 업데이트"""
+    data = request.json
+    admin_key = data.get('admin_key', '')
+    
+    if admin_key != ADMIN_KEY:
+        return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
+    
+    pricing = data.get('pricing', {})  # {30: 10000, 90: 25000, ...}
     
     conn = get_db_connection()
     if USE_POSTGRESQL:
@@ -3540,6 +4428,7 @@ def update_pricing_settings():
                 """, (int(period_days), float(amount), now.isoformat()))
         
         conn.commit()
+        invalidate_pricing_cache()
         
         return jsonify({
             'success': True,
@@ -3566,37 +4455,16 @@ def get_payment_methods():
     if admin_key != ADMIN_KEY:
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
-    conn = get_db_connection()
-    if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-    else:
-        cursor = conn.cursor()
-    
     try:
-        methods = []
-        try:
-            if USE_POSTGRESQL:
-                cursor.execute("SELECT method_name FROM payment_methods ORDER BY method_name")
-                rows = cursor.fetchall()
-                methods = [row['method_name'] for row in rows]
-            else:
-                cursor.execute("SELECT method_name FROM payment_methods ORDER BY method_name")
-                rows = cursor.fetchall()
-                methods = [row[0] for row in rows]
-        except Exception as e:
-            # 테이블이 없거나 오류 발생 시 빈 배열 반환
-            logger.warning(f"결제 방법 목록 조회 실패 (테이블 없을 수 있음): {e}")
-            methods = []
-        
-        return jsonify({
-            'success': True,
-            'payment_methods': methods
-        })
+        settings = get_cached_pricing_settings()
     except Exception as e:
         logger.error(f"결제 방법 조회 오류: {e}", exc_info=True)
         return jsonify({'success': False, 'message': f'오류가 발생했습니다: {str(e)}'}), 500
-    finally:
-        conn.close()
+    
+    return jsonify({
+        'success': True,
+        'payment_methods': settings['payment_methods']
+    })
 
 @app.route('/api/add_payment_method', methods=['POST'])
 def add_payment_method():
@@ -3647,6 +4515,7 @@ def add_payment_method():
             cursor.execute("INSERT OR IGNORE INTO payment_methods (method_name) VALUES (?)", (method_name,))
         
         conn.commit()
+        invalidate_pricing_cache()
         
         if cursor.rowcount == 0:
             return jsonify({'success': False, 'message': '이미 존재하는 결제 방법입니다.'}), 400
@@ -3694,6 +4563,7 @@ def delete_payment_method():
             cursor.execute("DELETE FROM payment_methods WHERE method_name = ?", (method_name,))
         
         conn.commit()
+        invalidate_pricing_cache()
         
         if cursor.rowcount == 0:
             return jsonify({'success': False, 'message': '결제 방법을 찾을 수 없습니다.'}), 404
@@ -3722,7 +4592,7 @@ def get_user_logs():
     if not user_id:
         return jsonify({'success': False, 'message': '사용자 ID가 필요합니다.'}), 400
     
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if USE_POSTGRESQL:
         cursor = conn.cursor(cursor_factory=RealDictCursor)
     else:
@@ -3815,9 +4685,143 @@ def get_user_logs():
     finally:
         conn.close()
 
+# 한국 표준시 (매출 집계 기준)
+KST = datetime.timezone(datetime.timedelta(hours=9))
+
+# 결제 통계 집계 단위별 날짜 문자열 길이 (YYYY-MM-DD / YYYY-MM / YYYY)
+REVENUE_PERIOD_LENGTHS = {'day': 10, 'month': 7, 'year': 4}
+REVENUE_GROUP_COLUMNS = ('payment_method', 'period_days')
+
+def to_kst_date_str(value) -> str:
+    """
+    결제 시각을 KST 기준 날짜 문자열(YYYY-MM-DD)로 변환
+    
+    Args:
+        value: datetime 또는 ISO 문자열 (시간대 정보가 없으면 서버 로컬 시간으로 간주)
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    elif not isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value.astimezone(KST).strftime('%Y-%m-%d')
+
+def ensure_payment_daily_revenue(cursor):
+    """일별 매출 집계 테이블 생성 (비어 있으면 user_payments로부터 채움)"""
+    # 결제 기간 조회/정렬용 인덱스
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_payments_payment_date ON user_payments(payment_date)
+    """)
+    
+    # 날짜는 KST 기준 'YYYY-MM-DD' 문자열로 저장 (두 DB에서 동일하게 범위 비교/SUBSTR 가능)
+    if USE_POSTGRESQL:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS payment_daily_revenue (
+                revenue_date VARCHAR(10) NOT NULL,
+                payment_method VARCHAR(50) NOT NULL DEFAULT '',
+                period_days INTEGER NOT NULL,
+                payment_count INTEGER NOT NULL DEFAULT 0,
+                total_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (revenue_date, payment_method, period_days)
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS payment_daily_revenue (
+                revenue_date TEXT NOT NULL,
+                payment_method TEXT NOT NULL DEFAULT '',
+                period_days INTEGER NOT NULL,
+                payment_count INTEGER NOT NULL DEFAULT 0,
+                total_amount REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (revenue_date, payment_method, period_days)
+            )
+        """)
+    
+    cursor.execute("SELECT COUNT(*) FROM payment_daily_revenue")
+    if cursor.fetchone()[0] == 0:
+        rebuild_payment_daily_revenue(cursor)
+
+def rebuild_payment_daily_revenue(cursor):
+    """user_payments 전체로부터 일별 매출 집계 테이블 재생성"""
+    cursor.execute("SELECT payment_date, payment_method, period_days, amount FROM user_payments")
+    buckets = {}
+    for payment_date, payment_method, period_days, amount in cursor.fetchall():
+        key = (to_kst_date_str(payment_date), payment_method or '', period_days)
+        count, total = buckets.get(key, (0, 0.0))
+        buckets[key] = (count + 1, total + float(amount or 0))
+    
+    cursor.execute("DELETE FROM payment_daily_revenue")
+    if not buckets:
+        return
+    
+    rows = [key + value for key, value in buckets.items()]
+    if USE_POSTGRESQL:
+        cursor.executemany("""
+            INSERT INTO payment_daily_revenue (revenue_date, payment_method, period_days, payment_count, total_amount)
+            VALUES (%s, %s, %s, %s, %s)
+        """, rows)
+    else:
+        cursor.executemany("""
+            INSERT INTO payment_daily_revenue (revenue_date, payment_method, period_days, payment_count, total_amount)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+    logger.info(f"일별 매출 집계 테이블 재생성: {len(rows)}개 구간")
+
+def apply_payment_to_daily_revenue(cursor, payment_date, payment_method, period_days, amount, sign: int = 1):
+    """
+    결제 추가/삭제를 일별 매출 집계 테이블에 반영 (결제와 같은 트랜잭션에서 호출)
+    
+    Args:
+        sign: 1이면 결제 추가, -1이면 결제 삭제
+    """
+    revenue_date = to_kst_date_str(payment_date)
+    params = (revenue_date, payment_method or '', int(period_days), sign, sign * float(amount or 0))
+    if USE_POSTGRESQL:
+        cursor.execute("""
+            INSERT INTO payment_daily_revenue (revenue_date, payment_method, period_days, payment_count, total_amount)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (revenue_date, payment_method, period_days) DO UPDATE
+            SET payment_count = payment_daily_revenue.payment_count + EXCLUDED.payment_count,
+                total_amount = payment_daily_revenue.total_amount + EXCLUDED.total_amount
+        """, params)
+        cursor.execute("""
+            DELETE FROM payment_daily_revenue
+            WHERE revenue_date = %s AND payment_method = %s AND period_days = %s AND payment_count <= 0
+        """, params[:3])
+    else:
+        cursor.execute("""
+            INSERT INTO payment_daily_revenue (revenue_date, payment_method, period_days, payment_count, total_amount)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (revenue_date, payment_method, period_days) DO UPDATE
+            SET payment_count = payment_count + excluded.payment_count,
+                total_amount = total_amount + excluded.total_amount
+        """, params)
+        cursor.execute("""
+            DELETE FROM payment_daily_revenue
+            WHERE revenue_date = ? AND payment_method = ? AND period_days = ? AND payment_count <= 0
+        """, params[:3])
+
+def default_revenue_range(period_type: str) -> tuple:
+    """기간 미지정 시 기본 조회 범위 (일: 최근 30일, 월: 최근 12개월, 년: 전체)"""
+    today = datetime.datetime.now(KST).date()
+    if period_type == 'day':
+        start = today - datetime.timedelta(days=29)
+    elif period_type == 'month':
+        month_index = today.year * 12 + today.month - 1 - 11
+        start = datetime.date(month_index // 12, month_index % 12 + 1, 1)
+    else:
+        start = datetime.date(1, 1, 1)
+    return start.isoformat(), today.isoformat()
+
 @app.route('/api/get_payment_statistics', methods=['POST'])
 def get_payment_statistics():
-    """결제 통계 조회 (일/월/년별)"""
+    """
+    결제 통계 조회 (일/월/년별, KST 기준)
+    
+    요청 데이터:
+    - period_type: day, month, year
+    - from / to: 조회 범위 (YYYY-MM-DD, KST, 양끝 포함, 선택사항)
+    - group_by: 추가 분류 목록 (payment_method, period_days 중 선택, 선택사항)
+    """
     data = request.json
     admin_key = data.get('admin_key', '')
     
@@ -3825,179 +4829,276 @@ def get_payment_statistics():
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
     period_type = data.get('period_type', 'day')  # day, month, year
+    if period_type not in REVENUE_PERIOD_LENGTHS:
+        return jsonify({'success': False, 'message': '유효하지 않은 기간 타입입니다.'}), 400
+    
+    group_by = data.get('group_by') or []
+    if isinstance(group_by, str):
+        group_by = [col.strip() for col in group_by.split(',') if col.strip()]
+    invalid_columns = [col for col in group_by if col not in REVENUE_GROUP_COLUMNS]
+    if invalid_columns:
+        return jsonify({'success': False, 'message': f'유효하지 않은 분류 기준입니다: {", ".join(invalid_columns)}'}), 400
+    
+    default_from, default_to = default_revenue_range(period_type)
+    date_from = data.get('from') or (default_from if not data.get('to') else '0001-01-01')
+    date_to = data.get('to') or default_to
+    try:
+        date_from = datetime.date.fromisoformat(str(date_from)[:10]).isoformat()
+        date_to = datetime.date.fromisoformat(str(date_to)[:10]).isoformat()
+    except ValueError:
+        return jsonify({'success': False, 'message': '날짜 형식이 올바르지 않습니다. (YYYY-MM-DD)'}), 400
     
-    conn = get_db_connection()
-    if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-    else:
-        cursor = conn.cursor()
+    period_expr = f"SUBSTR(revenue_date, 1, {REVENUE_PERIOD_LENGTHS[period_type]})"
+    
+    conn = get_db_connection(read_only=True)
+    cursor = conn.cursor()
     
     try:
-        if period_type == 'day':
-            if USE_POSTGRESQL:
-                cursor.execute("""
-                    SELECT 
-                        DATE(payment_date) as period,
-                        COUNT(*) as count,
-                        SUM(amount) as total_amount
-                    FROM user_payments
-                    GROUP BY DATE(payment_date)
-                    ORDER BY period DESC
-                    LIMIT 30
-                """)
-            else:
-                cursor.execute("""
-                    SELECT 
-                        DATE(payment_date) as period,
-                        COUNT(*) as count,
-                        SUM(amount) as total_amount
-                    FROM user_payments
-                    GROUP BY DATE(payment_date)
-                    ORDER BY period DESC
-                    LIMIT 30
-                """)
-        elif period_type == 'month':
-            if USE_POSTGRESQL:
-                cursor.execute("""
-                    SELECT 
-                        TO_CHAR(payment_date, 'YYYY-MM') as period,
-                        COUNT(*) as count,
-                        SUM(amount) as total_amount
-                    FROM user_payments
-                    GROUP BY TO_CHAR(payment_date, 'YYYY-MM')
-                    ORDER BY period DESC
-                    LIMIT 12
-                """)
-            else:
-                cursor.execute("""
-                    SELECT 
-                        strftime('%%Y-%%m', payment_date) as period,
-                        COUNT(*) as count,
-                        SUM(amount) as total_amount
-                    FROM user_payments
-                    GROUP BY strftime('%%Y-%%m', payment_date)
-                    ORDER BY period DESC
-                    LIMIT 12
-                """)
-        elif period_type == 'year':
-            if USE_POSTGRESQL:
-                cursor.execute("""
-                    SELECT 
-                        TO_CHAR(payment_date, 'YYYY') as period,
-                        COUNT(*) as count,
-                        SUM(amount) as total_amount
-                    FROM user_payments
-                    GROUP BY TO_CHAR(payment_date, 'YYYY')
-                    ORDER BY period DESC
-                """)
-            else:
-                cursor.execute("""
-                    SELECT 
-                        strftime('%%Y', payment_date) as period,
-                        COUNT(*) as count,
-                        SUM(amount) as total_amount
-                    FROM user_payments
-                    GROUP BY strftime('%%Y', payment_date)
-                    ORDER BY period DESC
-                """)
-        else:
-            return jsonify({'success': False, 'message': '유효하지 않은 기간 타입입니다.'}), 400
-        
-        rows = cursor.fetchall()
-        
+        query = f"""
+            SELECT 
+                {period_expr} as period,
+                SUM(payment_count) as count,
+                SUM(total_amount) as total_amount
+            FROM payment_daily_revenue
+            WHERE revenue_date >= ? AND revenue_date <= ?
+            GROUP BY {period_expr}
+            ORDER BY period DESC
+        """
         if USE_POSTGRESQL:
-            statistics = [{'period': row['period'], 'count': row['count'], 'total_amount': float(row['total_amount'] or 0)} for row in rows]
-        else:
-            statistics = [{'period': row[0], 'count': row[1], 'total_amount': float(row[2] or 0)} for row in rows]
+            query = query.replace('?', '%s')
+        cursor.execute(query, (date_from, date_to))
+        statistics = [{'period': row[0], 'count': int(row[1] or 0), 'total_amount': float(row[2] or 0)} for row in cursor.fetchall()]
         
-        return jsonify({
+        result = {
             'success': True,
+            'period_type': period_type,
+            'from': date_from,
+            'to': date_to,
             'statistics': statistics
-        })
+        }
+        
+        if group_by:
+            group_columns = ', '.join(group_by)
+            query = f"""
+                SELECT 
+                    {period_expr} as period,
+                    {group_columns},
+                    SUM(payment_count) as count,
+                    SUM(total_amount) as total_amount
+                FROM payment_daily_revenue
+                WHERE revenue_date >= ? AND revenue_date <= ?
+                GROUP BY {period_expr}, {group_columns}
+                ORDER BY period DESC, {group_columns}
+            """
+            if USE_POSTGRESQL:
+                query = query.replace('?', '%s')
+            cursor.execute(query, (date_from, date_to))
+            breakdown = []
+            for row in cursor.fetchall():
+                item = {'period': row[0]}
+                for index, col in enumerate(group_by, start=1):
+                    item[col] = row[index]
+                item['count'] = int(row[-2] or 0)
+                item['total_amount'] = float(row[-1] or 0)
+                breakdown.append(item)
+            result['group_by'] = group_by
+            result['breakdown'] = breakdown
+        
+        return jsonify(result)
     except Exception as e:
         logger.error(f"결제 통계 조회 오류: {e}", exc_info=True)
         return jsonify({'success': False, 'message': f'오류가 발생했습니다: {str(e)}'}), 500
     finally:
         conn.close()
 
+# 결제 내역 조회/내보내기 설정
+PAYMENT_COLUMNS = ('id', 'user_id', 'payment_date', 'amount', 'period_days', 'payment_method', 'note')
+PAYMENT_PAGE_MAX_LIMIT = 500
+PAYMENT_EXPORT_BATCH_SIZE = 1000
+
+def payment_row_to_dict(row) -> dict:
+    """user_payments 행(PAYMENT_COLUMNS 순서)을 응답용 딕셔너리로 변환"""
+    payment_date = row[2]
+    return {
+        'id': row[0],
+        'user_id': row[1],
+        'payment_date': payment_date.isoformat() if isinstance(payment_date, datetime.datetime) else payment_date,
+        'amount': float(row[3]),
+        'period_days': row[4],
+        'payment_method': row[5] or '',
+        'note': row[6] or ''
+    }
+
+def encode_payment_cursor(payment: dict) -> str:
+    """다음 페이지 커서 생성 (마지막 행의 payment_date, id)"""
+    raw = json.dumps([payment['payment_date'], payment['id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_payment_cursor(value: str) -> tuple:
+    """
+    페이지 커서 해석
+    
+    Raises:
+        ValueError: 커서 형식이 올바르지 않을 때
+    """
+    try:
+        payment_date, payment_id = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+        return str(payment_date), int(payment_id)
+    except Exception:
+        raise ValueError('유효하지 않은 커서입니다.')
+
+def build_payment_filters(data: dict) -> tuple:
+    """
+    결제 내역 조회 조건 생성 (user_id, from, to)
+    
+    Returns:
+        (WHERE 조건 리스트, 파라미터 리스트) - 자리표시자는 ?
+    """
+    conditions = []
+    params = []
+    
+    # JSON 숫자로 보낸 값도 문자열로 처리
+    user_id = str(data.get('user_id') or '').strip()
+    if user_id:
+        conditions.append("user_id = ?")
+        params.append(user_id)
+    
+    date_from = data.get('from')
+    if date_from:
+        conditions.append("payment_date >= ?")
+        params.append(datetime.date.fromisoformat(str(date_from)[:10]).isoformat())
+    
+    date_to = data.get('to')
+    if date_to:
+        # to 날짜 당일 포함
+        conditions.append("payment_date < ?")
+        params.append((datetime.date.fromisoformat(str(date_to)[:10]) + datetime.timedelta(days=1)).isoformat())
+    
+    return conditions, params
+
+def stream_payments_export(conditions: list, params: list, export_format: str) -> Response:
+    """결제 내역을 CSV/NDJSON으로 스트리밍 (전체 결과를 메모리에 올리지 않음)"""
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f"""
+        SELECT {', '.join(PAYMENT_COLUMNS)}
+        FROM user_payments
+        {where_sql}
+        ORDER BY payment_date DESC, id DESC
+    """
+    if USE_POSTGRESQL:
+        query = query.replace('?', '%s')
+    
+    def generate():
+        # 배치 단위로 오래 스트리밍하므로 요청 제한 시간에서 제외
+        g.request_deadline = None
+        conn = get_db_connection(read_only=True)
+        try:
+            if USE_POSTGRESQL:
+                # 이름 있는 커서 = 서버 사이드 커서 (배치 단위로 가져옴)
+                cursor = conn.cursor(name='payments_export')
+                cursor.itersize = PAYMENT_EXPORT_BATCH_SIZE
+            else:
+                cursor = conn.cursor()
+            cursor.execute(query, params)
+            
+            if export_format == 'csv':
+                # 엑셀에서 한글이 깨지지 않도록 BOM 포함
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                buffer.write('\ufeff')
+                writer.writerow(PAYMENT_COLUMNS)
+                yield buffer.getvalue()
+            
+            while True:
+                rows = cursor.fetchmany(PAYMENT_EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                if export_format == 'csv':
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for row in rows:
+                        payment = payment_row_to_dict(row)
+                        writer.writerow([payment[col] for col in PAYMENT_COLUMNS])
+                    yield buffer.getvalue()
+                else:
+                    yield ''.join(json.dumps(payment_row_to_dict(row), ensure_ascii=False) + '\n' for row in rows)
+            cursor.close()
+        except Exception as e:
+            logger.error(f"결제 내역 내보내기 오류: {e}", exc_info=True)
+            raise
+        finally:
+            conn.close()
+    
+    filename = f"payments_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{'csv' if export_format == 'csv' else 'ndjson'}"
+    mimetype = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson; charset=utf-8'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 @app.route('/api/list_payments', methods=['POST'])
 def list_payments():
-    """결제 내역 조회"""
+    """
+    결제 내역 조회
+    
+    요청 데이터:
+    - user_id, from, to: 조회 조건 (선택사항)
+    - limit: 페이지 크기 (기본 100)
+    - cursor: 이전 응답의 next_cursor (다음 페이지 조회 시)
+    - format: json(기본), csv, ndjson - csv/ndjson은 전체 결과를 스트리밍으로 내보냄
+    """
     data = request.json
     admin_key = data.get('admin_key', '')
     
     if admin_key != ADMIN_KEY:
         return jsonify({'success': False, 'message': '권한이 없습니다.'}), 403
     
-    user_id = data.get('user_id', '').strip()  # 선택사항
-    limit = data.get('limit', 100)
+    export_format = str(data.get('format') or 'json').lower()
+    if export_format not in ('json', 'csv', 'ndjson'):
+        return jsonify({'success': False, 'message': '유효하지 않은 형식입니다. (json, csv, ndjson)'}), 400
     
-    conn = get_db_connection()
+    try:
+        conditions, params = build_payment_filters(data)
+        page_cursor = decode_payment_cursor(data['cursor']) if data.get('cursor') else None
+        limit = min(max(int(data.get('limit', 100)), 1), PAYMENT_PAGE_MAX_LIMIT)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f'요청 값이 올바르지 않습니다: {str(e)}'}), 400
+    
+    if export_format != 'json':
+        return stream_payments_export(conditions, params, export_format)
+    
+    if page_cursor:
+        # 키셋 페이지네이션: 마지막으로 받은 행 이후부터
+        conditions.append("(payment_date < ? OR (payment_date = ? AND id < ?))")
+        params.extend([page_cursor[0], page_cursor[0], page_cursor[1]])
+    
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f"""
+        SELECT {', '.join(PAYMENT_COLUMNS)}
+        FROM user_payments
+        {where_sql}
+        ORDER BY payment_date DESC, id DESC
+        LIMIT ?
+    """
     if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-    else:
-        cursor = conn.cursor()
+        query = query.replace('?', '%s')
+    
+    conn = get_db_connection(read_only=True)
+    cursor = conn.cursor()
     
     try:
-        if user_id:
-            if USE_POSTGRESQL:
-                cursor.execute("""
-                    SELECT id, user_id, payment_date, amount, period_days, payment_method, note
-                    FROM user_payments
-                    WHERE user_id = %s
-                    ORDER BY payment_date DESC
-                    LIMIT %s
-                """, (user_id, limit))
-            else:
-                cursor.execute("""
-                    SELECT id, user_id, payment_date, amount, period_days, payment_method, note
-                    FROM user_payments
-                    WHERE user_id = ?
-                    ORDER BY payment_date DESC
-                    LIMIT ?
-                """, (user_id, limit))
-        else:
-            if USE_POSTGRESQL:
-                cursor.execute("""
-                    SELECT id, user_id, payment_date, amount, period_days, payment_method, note
-                    FROM user_payments
-                    ORDER BY payment_date DESC
-                    LIMIT %s
-                """, (limit,))
-            else:
-                cursor.execute("""
-                    SELECT id, user_id, payment_date, amount, period_days, payment_method, note
-                    FROM user_payments
-                    ORDER BY payment_date DESC
-                    LIMIT ?
-                """, (limit,))
-        
+        # 다음 페이지 존재 여부 확인을 위해 1개 더 조회
+        cursor.execute(query, (*params, limit + 1))
         rows = cursor.fetchall()
         
-        if USE_POSTGRESQL:
-            payments = [{
-                'id': row['id'],
-                'user_id': row['user_id'],
-                'payment_date': row['payment_date'].isoformat() if isinstance(row['payment_date'], datetime.datetime) else row['payment_date'],
-                'amount': float(row['amount']),
-                'period_days': row['period_days'],
-                'payment_method': row['payment_method'] or '',
-                'note': row['note'] or ''
-            } for row in rows]
-        else:
-            payments = [{
-                'id': row[0],
-                'user_id': row[1],
-                'payment_date': row[2],
-                'amount': float(row[3]),
-                'period_days': row[4],
-                'payment_method': row[5] or '',
-                'note': row[6] or ''
-            } for row in rows]
+        payments = [payment_row_to_dict(row) for row in rows[:limit]]
+        next_cursor = encode_payment_cursor(payments[-1]) if len(rows) > limit else None
         
         return jsonify({
             'success': True,
-            'payments': payments
+            'payments': payments,
+            'next_cursor': next_cursor
         })
     except Exception as e:
         logger.error(f"결제 내역 조회 오류: {e}", exc_info=True)
@@ -4026,15 +5127,24 @@ def delete_payment():
         cursor = conn.cursor()
     
     try:
+        if USE_POSTGRESQL:
+            cursor.execute("SELECT payment_date, payment_method, period_days, amount FROM user_payments WHERE id = %s", (payment_id,))
+        else:
+            cursor.execute("SELECT payment_date, payment_method, period_days, amount FROM user_payments WHERE id = ?", (payment_id,))
+        
+        payment_row = cursor.fetchone()
+        if not payment_row:
+            return jsonify({'success': False, 'message': '결제 내역을 찾을 수 없습니다.'}), 404
+        
         if USE_POSTGRESQL:
             cursor.execute("DELETE FROM user_payments WHERE id = %s", (payment_id,))
         else:
             cursor.execute("DELETE FROM user_payments WHERE id = ?", (payment_id,))
         
-        conn.commit()
+        # 일별 매출 집계 반영
+        apply_payment_to_daily_revenue(cursor, *payment_row, sign=-1)
         
-        if cursor.rowcount == 0:
-            return jsonify({'success': False, 'message': '결제 내역을 찾을 수 없습니다.'}), 404
+        conn.commit()
         
         return jsonify({
             'success': True,
@@ -4346,6 +5456,88 @@ def update_payment_account_info():
             'message': f'오류가 발생했습니다: {str(e)}'
         }), 500
 
+# 버전 정보 캐시 (check_version은 모든 PC 프로그램이 시작할 때 호출)
+VERSION_CACHE_TTL = float(os.environ.get('VERSION_CACHE_TTL', '30'))
+_version_cache = TTLCache(VERSION_CACHE_TTL)
+
+def load_version_info():
+    """
+    최신 버전 정보 조회 (테이블이 없으면 생성)
+    
+    Returns:
+        current_version, min_required_version, force_update_enabled, download_url, update_message
+        딕셔너리 또는 None (버전 정보 없음)
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute("""
+                SELECT current_version, min_required_version, force_update_enabled, 
+                       download_url, update_message
+                FROM version_info
+                ORDER BY updated_at DESC
+                LIMIT 1
+            """)
+            row = cursor.fetchone()
+        except Exception as table_error:
+            error_msg = str(table_error).lower()
+            if 'does not exist' not in error_msg and 'no such table' not in error_msg:
+                raise
+            # 테이블이 없으면 생성
+            logger.warning(f"version_info 테이블이 없습니다. 새로 생성합니다: {table_error}")
+            if USE_POSTGRESQL:
+                # PostgreSQL에서는 트랜잭션 중단 후 롤백 필요
+                conn.rollback()
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS version_info (
+                        id SERIAL PRIMARY KEY,
+                        current_version VARCHAR(20) NOT NULL,
+                        min_required_version VARCHAR(20) NOT NULL,
+                        force_update_enabled BOOLEAN DEFAULT FALSE,
+                        download_url TEXT,
+                        update_message TEXT,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_by VARCHAR(100)
+                    )
+                """)
+            else:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS version_info (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        current_version TEXT NOT NULL,
+                        min_required_version TEXT NOT NULL,
+                        force_update_enabled INTEGER DEFAULT 0,
+                        download_url TEXT,
+                        update_message TEXT,
+                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                        updated_by TEXT
+                    )
+                """)
+            conn.commit()
+            row = None  # 테이블 생성 후에는 데이터가 없으므로 None
+    finally:
+        cursor.close()
+        conn.close()
+    
+    if not row:
+        return None
+    return {
+        'current_version': row[0],
+        'min_required_version': row[1],
+        'force_update_enabled': bool(row[2]),
+        'download_url': row[3] or '',
+        'update_message': row[4] or ''
+    }
+
+def get_cached_version_info():
+    """최신 버전 정보 조회 (TTL 캐시 적용)"""
+    return _version_cache.get(load_version_info)
+
+def invalidate_version_cache():
+    """버전 정보 캐시 무효화 (버전 정보 변경 시 호출)"""
+    _version_cache.invalidate()
+
 @app.route('/api/check_version', methods=['POST'])
 def check_version():
     """프로그램 버전 체크 (PC 프로그램에서 호출)"""
@@ -4364,120 +5556,37 @@ def check_version():
                 'message': '버전 정보가 없습니다.'
             }), 400
         
-        conn = get_db_connection()
-        try:
-            if USE_POSTGRESQL:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-            else:
-                cursor = conn.cursor()
-                conn.row_factory = sqlite3.Row
-            
-            # 버전 정보 조회 (테이블이 없을 수 있으므로 try-except로 처리)
-            result = None
-            try:
-                if USE_POSTGRESQL:
-                    cursor.execute("""
-                        SELECT current_version, min_required_version, force_update_enabled, 
-                               download_url, update_message
-                        FROM version_info
-                        ORDER BY updated_at DESC
-                        LIMIT 1
-                    """)
-                    result = cursor.fetchone()
-                else:
-                    cursor.execute("""
-                        SELECT current_version, min_required_version, force_update_enabled, 
-                               download_url, update_message
-                        FROM version_info
-                        ORDER BY updated_at DESC
-                        LIMIT 1
-                    """)
-                    row = cursor.fetchone()
-                    if row:
-                        result = {
-                            'current_version': row[0],
-                            'min_required_version': row[1],
-                            'force_update_enabled': bool(row[2]),
-                            'download_url': row[3],
-                            'update_message': row[4]
-                        }
-            except Exception as table_error:
-                error_msg = str(table_error).lower()
-                # 테이블이 없으면 생성
-                if 'does not exist' in error_msg or 'no such table' in error_msg:
-                    logger.warning(f"version_info 테이블이 없습니다. 새로 생성합니다: {table_error}")
-                    # PostgreSQL에서는 트랜잭션 중단 후 롤백 필요
-                    if USE_POSTGRESQL:
-                        conn.rollback()
-                        cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS version_info (
-                                id SERIAL PRIMARY KEY,
-                                current_version VARCHAR(20) NOT NULL,
-                                min_required_version VARCHAR(20) NOT NULL,
-                                force_update_enabled BOOLEAN DEFAULT FALSE,
-                                download_url TEXT,
-                                update_message TEXT,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_by VARCHAR(100)
-                            )
-                        """)
-                        conn.commit()
-                    else:
-                        cursor.execute("""
-                            CREATE TABLE IF NOT EXISTS version_info (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                current_version TEXT NOT NULL,
-                                min_required_version TEXT NOT NULL,
-                                force_update_enabled INTEGER DEFAULT 0,
-                                download_url TEXT,
-                                update_message TEXT,
-                                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                                updated_by TEXT
-                            )
-                        """)
-                        conn.commit()
-                    result = None  # 테이블 생성 후에는 데이터가 없으므로 None
-            
-            if not result:
-                # 버전 정보가 없으면 기본값 반환 (강제 업데이트 비활성화)
-                return jsonify({
-                    'success': True,
-                    'current_version': '1.0.0',
-                    'min_required_version': '1.0.0',
-                    'force_update_enabled': False,
-                    'download_url': '',
-                    'update_message': '',
-                    'needs_update': False
-                })
-            
-            # 버전 비교 함수
-            def compare_versions(v1, v2):
-                """버전 문자열 비교 (1.2.0 > 1.1.5)"""
-                def version_tuple(v):
-                    parts = v.split('.')
-                    return tuple(int(x) for x in parts)
-                return version_tuple(v1) >= version_tuple(v2)
-            
-            min_required = result.get('min_required_version') if USE_POSTGRESQL else result['min_required_version']
-            force_enabled = result.get('force_update_enabled') if USE_POSTGRESQL else result['force_update_enabled']
-            
-            # 클라이언트 버전이 최소 요구 버전보다 낮은지 확인
-            needs_update = not compare_versions(client_version, min_required)
-            
-            response_data = {
+        result = get_cached_version_info()
+        
+        if not result:
+            # 버전 정보가 없으면 기본값 반환 (강제 업데이트 비활성화)
+            return jsonify({
                 'success': True,
-                'current_version': result.get('current_version') if USE_POSTGRESQL else result['current_version'],
-                'min_required_version': min_required,
-                'force_update_enabled': force_enabled,
-                'download_url': result.get('download_url') if USE_POSTGRESQL else result['download_url'] or '',
-                'update_message': result.get('update_message') if USE_POSTGRESQL else result['update_message'] or '',
-                'needs_update': needs_update,
-                'client_version': client_version
-            }
-            
-            return jsonify(response_data)
-        finally:
-            conn.close()
+                'current_version': '1.0.0',
+                'min_required_version': '1.0.0',
+                'force_update_enabled': False,
+                'download_url': '',
+                'update_message': '',
+                'needs_update': False
+            })
+        
+        # 버전 비교 함수
+        def compare_versions(v1, v2):
+            """버전 문자열 비교 (1.2.0 > 1.1.5)"""
+            def version_tuple(v):
+                parts = v.split('.')
+                return tuple(int(x) for x in parts)
+            return version_tuple(v1) >= version_tuple(v2)
+        
+        # 클라이언트 버전이 최소 요구 버전보다 낮은지 확인
+        needs_update = not compare_versions(client_version, result['min_required_version'])
+        
+        return jsonify({
+            'success': True,
+            **result,
+            'needs_update': needs_update,
+            'client_version': client_version
+        })
     except Exception as e:
         logger.error(f"버전 체크 오류: {e}", exc_info=True)
         return jsonify({
@@ -4710,6 +5819,7 @@ def update_version_info():
                           download_url, update_message, 'admin'))
             
             conn.commit()
+            invalidate_version_cache()
             
             return jsonify({
                 'success': True,
@@ -4856,6 +5966,121 @@ def adjust_user_expiry():
             'message': f'오류가 발생했습니다: {str(e)}'
         }), 500
 
+# /api/batch에서 실행할 수 있는 작업 -> 경로
+BATCH_OPERATIONS = {
+    'check_version': '/api/check_version',
+    'login': '/api/login',
+    'user_info': '/api/user_info',
+    'check_token_owner': '/api/check_token_owner',
+    'record_user_usage': '/api/record_user_usage'
+}
+BATCH_MAX_OPERATIONS = 10
+
+def run_batch_operation(path: str, params: dict) -> tuple:
+    """
+    배치 작업 하나를 해당 API 함수로 실행 (요청 한도는 작업 경로 기준으로 적용)
+    
+    Returns:
+        (HTTP 상태 코드, 응답 데이터)
+    """
+    environ_base = {'REMOTE_ADDR': request.remote_addr or ''}
+    with app.test_request_context(path, method='POST', json=params, environ_base=environ_base):
+        retry_after = rate_limiter.check(path, get_rate_limit_identities()) if RATE_LIMIT_ENABLED else 0
+        if retry_after > 0:
+            increment_metric('rate_limited', path)
+            return 429, {
+                'success': False,
+                'message': f'요청이 너무 많습니다. {retry_after_header(retry_after)}초 후 다시 시도하세요.',
+                'retry_after': math.ceil(retry_after)
+            }
+        try:
+            response = app.make_response(app.view_functions[request.endpoint]())
+        except Exception as e:
+            logger.error(f"배치 작업 오류 ({path}): {e}", exc_info=True)
+            return 500, {'success': False, 'message': f'오류가 발생했습니다: {str(e)}'}
+        return response.status_code, response.get_json(silent=True) or {}
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """
+    여러 작업을 한 번의 요청, 한 DB 트랜잭션으로 처리 (PC 프로그램 시작/작업 전 호출 묶음)
+    
+    요청 데이터:
+    - operations: [{"op": 작업 이름, "params": 해당 API 요청 데이터}, ...] (순서대로 실행)
+      작업: check_version, login, user_info, check_token_owner, record_user_usage
+    - stop_on_error: 실패한 작업 이후의 작업은 건너뜀 (기본값 True)
+    
+    서버 오류(5xx)가 난 작업이 있으면 모든 변경을 롤백
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    stop_on_error = data.get('stop_on_error', True) is not False
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'message': '실행할 작업이 없습니다.'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({'success': False, 'message': f'작업은 최대 {BATCH_MAX_OPERATIONS}개까지 가능합니다.'}), 400
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS:
+            return jsonify({
+                'success': False,
+                'message': f"지원하지 않는 작업입니다: {operation.get('op') if isinstance(operation, dict) else operation}"
+            }), 400
+        if not isinstance(operation.get('params', {}), dict):
+            return jsonify({'success': False, 'message': 'params는 객체여야 합니다.'}), 400
+    
+    conn = get_db_connection()
+    batch_conn = BatchConnection(conn)
+    g.batch_connection = batch_conn
+    results = []
+    failed = False
+    try:
+        for operation in operations:
+            op_name = operation['op']
+            if failed or (stop_on_error and results and not results[-1]['success']):
+                results.append({'op': op_name, 'success': False, 'status': None, 'skipped': True, 'data': None})
+                continue
+            
+            status, body = run_batch_operation(BATCH_OPERATIONS[op_name], operation.get('params') or {})
+            if not USE_POSTGRESQL:
+                # 작업에서 바꾼 행 형식이 다음 작업에 영향을 주지 않도록 초기화
+                conn.row_factory = None
+            results.append({
+                'op': op_name,
+                'success': 200 <= status < 300 and bool(body.get('success', True)),
+                'status': status,
+                'skipped': False,
+                'data': body
+            })
+            if status >= 500 or batch_conn.rolled_back:
+                failed = True
+        
+        if failed:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"배치 처리 오류: {e}", exc_info=True)
+        return jsonify({'success': False, 'message': f'배치 처리 실패: {str(e)}', 'results': results}), 500
+    finally:
+        g.pop('batch_connection', None)
+        conn.close()
+    
+    return jsonify({
+        'success': not failed,
+        'committed': not failed,
+        'results': results
+    })
+
+def warm_caches():
+    """자주 조회되는 캐시를 미리 채움 (배포 직후 첫 요청이 느리지 않도록)"""
+    for name, loader in (('버전 정보', get_cached_version_info), ('사용료 설정', get_cached_pricing_settings)):
+        try:
+            loader()
+        except Exception as e:
+            logger.warning(f"캐시 미리 채우기 실패 ({name}): {e}")
+
 if __name__ == '__main__':
     # 데이터베이스 초기화
     if not USE_POSTGRESQL:
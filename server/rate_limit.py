@@ -0,0 +1,280 @@
+"""
+요청 한도(Rate Limit) 모듈
+클라이언트(IP, 사용자 ID, 토큰)별 토큰 버킷으로 라우트마다 요청 수를 제한
+
+저장소(백엔드):
+    memory              프로세스 메모리 (워커별로 따로 계산)
+    sqlite:///경로      SQLite 파일 (같은 서버의 워커끼리 공유)
+    redis://호스트:포트  Redis (여러 서버/워커끼리 공유, redis 패키지 필요)
+"""
+
+import os
+import math
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RateRule(NamedTuple):
+    """요청 한도 규칙: scope(ip/user_id/token_hash)별로 period초 동안 capacity회"""
+    scope: str
+    capacity: int
+    period: float
+
+    @property
+    def refill_rate(self) -> float:
+        """초당 채워지는 토큰 수"""
+        return self.capacity / self.period
+
+
+class Bucket(NamedTuple):
+    """요청 하나가 차감할 토큰 버킷"""
+    key: str
+    capacity: float
+    rate: float             # 초당 채워지는 토큰 수
+
+
+# 이 시간(초) 이상 사용되지 않은 버킷은 이미 가득 찬 상태이므로 삭제해도 됨
+BUCKET_IDLE_SECONDS = 3600
+
+
+def refill_bucket(tokens: float, updated: float, now: float, capacity: float, rate: float, cost: float):
+    """
+    토큰 버킷 계산
+
+    Returns:
+        (남은 토큰 수, 다시 시도까지 기다릴 초 - 허용이면 0)
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+def refill_buckets(states: List[tuple], buckets: List[Bucket], now: float, cost: float):
+    """
+    여러 버킷을 함께 계산 (하나라도 부족하면 어느 버킷도 차감하지 않음)
+
+    Args:
+        states: 버킷별 (토큰 수, 마지막 갱신 시각)
+
+    Returns:
+        (차감 후 토큰 수 리스트, 다시 시도까지 기다릴 초 - 허용이면 0)
+    """
+    refilled = []
+    retry_after = 0.0
+    for (tokens, updated), bucket in zip(states, buckets):
+        tokens, wait = refill_bucket(tokens, updated, now, bucket.capacity, bucket.rate, cost)
+        refilled.append(tokens)
+        retry_after = max(retry_after, wait)
+    return refilled, retry_after
+
+
+class MemoryBucketBackend:
+    """프로세스 메모리 토큰 버킷 (개발용 또는 단일 워커용)"""
+
+    MAX_BUCKETS = 50000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take_all(self, buckets: List[Bucket], cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            refilled, retry_after = refill_buckets(
+                [self._buckets.get(bucket.key, (bucket.capacity, now)) for bucket in buckets], buckets, now, cost)
+            if retry_after > 0:
+                return retry_after
+            for bucket, tokens in zip(buckets, refilled):
+                self._buckets[bucket.key] = (tokens, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._prune(now)
+        return 0.0
+
+    def _prune(self, now: float):
+        # 오래 사용되지 않은 버킷 정리 (이미 가득 찬 상태)
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated > BUCKET_IDLE_SECONDS]
+        for key in stale:
+            del self._buckets[key]
+
+
+class SQLiteBucketBackend:
+    """SQLite 파일 토큰 버킷 (같은 서버의 gunicorn 워커끼리 공유)"""
+
+    # 오래 사용되지 않은 행 정리 주기 (초, 프로세스별)
+    PRUNE_INTERVAL = 600
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._last_prune = 0.0
+        conn = sqlite3.connect(str(self.path), timeout=5)
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    bucket_key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_buckets_updated ON rate_buckets(updated)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        # fork(gunicorn --preload)로 물려받은 연결은 쓰지 않음
+        if conn is None or self._local.pid != os.getpid():
+            # 자동 커밋 모드에서 BEGIN IMMEDIATE로 직접 트랜잭션 관리
+            conn = sqlite3.connect(str(self.path), timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take_all(self, buckets: List[Bucket], cost: float = 1.0) -> float:
+        # 워커 프로세스 간 비교가 필요하므로 벽시계 시간 사용
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            states = []
+            for bucket in buckets:
+                row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE bucket_key = ?",
+                                   (bucket.key,)).fetchone()
+                states.append(row if row else (bucket.capacity, now))
+            refilled, retry_after = refill_buckets(states, buckets, now, cost)
+            if retry_after <= 0:
+                conn.executemany("""
+                    INSERT INTO rate_buckets (bucket_key, tokens, updated) VALUES (?, ?, ?)
+                    ON CONFLICT (bucket_key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+                """, [(bucket.key, tokens, now) for bucket, tokens in zip(buckets, refilled)])
+            if now - self._last_prune > self.PRUNE_INTERVAL:
+                self._last_prune = now
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - BUCKET_IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+
+class RedisBucketBackend:
+    """Redis 토큰 버킷 (여러 서버/워커끼리 공유)"""
+
+    # 읽기-계산-쓰기를 Redis 안에서 원자적으로 실행 (모든 버킷이 허용할 때만 차감)
+    # ARGV: now, cost, 이후 버킷마다 capacity, rate
+    TAKE_SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local cost = tonumber(ARGV[2])
+        local states = {}
+        local retry_after = 0
+        for i, key in ipairs(KEYS) do
+            local capacity = tonumber(ARGV[i * 2 + 1])
+            local rate = tonumber(ARGV[i * 2 + 2])
+            local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+            local tokens = tonumber(bucket[1]) or capacity
+            local updated = tonumber(bucket[2]) or now
+            tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+            if tokens < cost then
+                retry_after = math.max(retry_after, (cost - tokens) / rate)
+            end
+            states[i] = {tokens, math.ceil(capacity / rate) + 1}
+        end
+        if retry_after == 0 then
+            for i, key in ipairs(KEYS) do
+                redis.call('HSET', key, 'tokens', states[i][1] - cost, 'updated', now)
+                redis.call('EXPIRE', key, states[i][2])
+            end
+        end
+        return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._take = self._client.register_script(self.TAKE_SCRIPT)
+
+    def take_all(self, buckets: List[Bucket], cost: float = 1.0) -> float:
+        args = [time.time(), cost]
+        for bucket in buckets:
+            args.extend((bucket.capacity, bucket.rate))
+        result = self._take(keys=[f"rate:{bucket.key}" for bucket in buckets], args=args)
+        return float(result)
+
+
+def create_bucket_backend(spec: str, default_sqlite_path=None):
+    """
+    설정 문자열로 저장소 생성
+
+    Args:
+        spec: 'memory', 'sqlite', 'sqlite:///경로', 'redis://...'
+        default_sqlite_path: 'sqlite'만 지정했을 때 사용할 파일 경로
+    """
+    spec = (spec or 'memory').strip()
+    if spec == 'memory':
+        return MemoryBucketBackend()
+    if spec == 'sqlite':
+        return SQLiteBucketBackend(default_sqlite_path or 'rate_limits.db')
+    if spec.startswith('sqlite:///'):
+        return SQLiteBucketBackend(spec[len('sqlite:///'):])
+    if spec.startswith(('redis://', 'rediss://')):
+        return RedisBucketBackend(spec)
+    raise ValueError(f"지원하지 않는 요청 한도 저장소입니다: {spec}")
+
+
+class RateLimiter:
+    """라우트별 요청 한도 검사"""
+
+    def __init__(self, backend, route_rules: Dict[str, List[RateRule]], default_rules: List[RateRule]):
+        """
+        초기화
+
+        Args:
+            backend: 토큰 버킷 저장소
+            route_rules: {경로: [RateRule, ...]}
+            default_rules: route_rules에 없는 경로에 적용할 규칙
+        """
+        self.backend = backend
+        self.route_rules = route_rules
+        self.default_rules = default_rules
+
+    def check(self, route: str, identities: Dict[str, Optional[str]]) -> float:
+        """
+        요청 한도 확인 (모든 규칙이 허용할 때만 각 버킷에서 토큰 1개 사용)
+
+        Args:
+            route: 요청 경로
+            identities: {'ip': ..., 'user_id': ..., 'token_hash': ...} (없는 값은 건너뜀)
+
+        Returns:
+            다시 시도까지 기다릴 초 (허용이면 0)
+        """
+        rules = self.route_rules.get(route, self.default_rules)
+        bucket_route = route if route in self.route_rules else '*'
+        buckets = [
+            Bucket(f"{bucket_route}:{rule.scope}:{identities[rule.scope]}", rule.capacity, rule.refill_rate)
+            for rule in rules if identities.get(rule.scope)
+        ]
+        if not buckets:
+            return 0.0
+        try:
+            return self.backend.take_all(buckets)
+        except Exception as e:
+            # 저장소 장애 시 요청은 통과시킴 (서비스 중단 방지)
+            logger.warning(f"요청 한도 저장소 오류 (통과 처리): {e}")
+            return 0.0
+
+
+def retry_after_header(retry_after: float) -> str:
+    """Retry-After 헤더 값 (정수 초, 최소 1)"""
+    return str(max(1, math.ceil(retry_after)))
@@ -0,0 +1,551 @@
+"""
+사용량 기록 보관(아카이브) 모듈
+오래된 월의 usage_stats / user_usage 기록을 압축 파일(gzip NDJSON)로 옮기고 DB에서 삭제
+보관된 기록은 UsageArchiveReader로 조회 가능
+
+사용법:
+    python usage_archive.py archive [--keep-months 12] [--table user_usage]
+    python usage_archive.py partition      # PostgreSQL 기존 테이블을 월별 파티션 테이블로 전환
+    python usage_archive.py months user_usage
+"""
+
+import os
+import sys
+import gzip
+import json
+import datetime
+import decimal
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 사용량 테이블 -> 소유자 컬럼
+USAGE_TABLES = {'user_usage': 'user_id', 'usage_stats': 'license_key'}
+
+# 파티션 전환 시 다시 만들 인덱스/외래키 (init_db와 동일)
+USAGE_TABLE_INDEXES = {
+    'user_usage': [
+        ('idx_user_usage_user_id', 'user_id'),
+        ('idx_user_usage_date', 'usage_date')
+    ],
+    'usage_stats': [
+        ('idx_usage_stats_license_date', 'license_key, usage_date')
+    ]
+}
+USAGE_TABLE_FOREIGN_KEYS = {
+    'user_usage': 'FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE',
+    'usage_stats': 'FOREIGN KEY (license_key) REFERENCES licenses(license_key)'
+}
+
+ARCHIVE_BATCH_SIZE = 1000
+# DB 삭제가 커밋되기 전의 보관 파일 접미사 (조회 대상에서 제외)
+PENDING_SUFFIX = '.pending'
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """월 단위 날짜 계산 (결과는 해당 월 1일)"""
+    month_index = month.year * 12 + month.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def usage_partition_name(table: str, month: datetime.date) -> str:
+    """월별 파티션 테이블 이름 (예: user_usage_p2026_01)"""
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def check_usage_table(table: str) -> str:
+    """
+    사용량 테이블 이름 검증
+
+    Returns:
+        소유자 컬럼 이름
+
+    Raises:
+        ValueError: 지원하지 않는 테이블일 때
+    """
+    if table not in USAGE_TABLES:
+        raise ValueError(f"지원하지 않는 테이블입니다: {table} (사용 가능: {', '.join(USAGE_TABLES)})")
+    return USAGE_TABLES[table]
+
+
+def create_month_partitions(cursor, table: str, first_month: datetime.date, last_month: datetime.date):
+    """
+    월별 파티션 생성 (PostgreSQL, first_month ~ last_month 포함, 이미 있는 월은 건너뜀)
+
+    해당 월의 행이 이미 기본(DEFAULT) 파티션에 들어가 있으면 PARTITION OF 생성이 실패하므로
+    빈 테이블을 만들어 그 행을 옮긴 뒤 파티션으로 연결
+    """
+    # 여러 워커/명령이 동시에 만들지 않도록 트랜잭션 동안 잠금
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"usage_partitions:{table}",))
+    default_partition = f"{table}_default"
+    cursor.execute("SELECT to_regclass(%s)", (default_partition,))
+    has_default = cursor.fetchone()[0] is not None
+
+    month = first_month
+    while month <= last_month:
+        partition = usage_partition_name(table, month)
+        next_month = add_months(month, 1)
+        cursor.execute("SELECT to_regclass(%s)", (partition,))
+        if cursor.fetchone()[0] is None:
+            if has_default:
+                # 옮기는 동안 기본 파티션에 새 행이 들어오지 않도록 잠금 (커밋 시 해제)
+                cursor.execute(f"LOCK TABLE {default_partition} IN SHARE ROW EXCLUSIVE MODE")
+                cursor.execute(f"CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                cursor.execute(f"""
+                    WITH moved AS (
+                        DELETE FROM {default_partition}
+                        WHERE usage_date >= %s AND usage_date < %s
+                        RETURNING *
+                    )
+                    INSERT INTO {partition} SELECT * FROM moved
+                """, (month, next_month))
+                if cursor.rowcount:
+                    logger.info(f"기본 파티션의 {month.strftime('%Y-%m')} 기록 {cursor.rowcount}행을 {partition}(으)로 이동")
+                cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)",
+                               (month, next_month))
+            else:
+                cursor.execute(f"""
+                    CREATE TABLE {partition}
+                    PARTITION OF {table}
+                    FOR VALUES FROM (%s) TO (%s)
+                """, (month, next_month))
+        month = next_month
+
+
+def to_month(value) -> Optional[datetime.date]:
+    """usage_date 값(datetime 또는 ISO 문자열)을 해당 월 1일로 변환"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return datetime.date(value.year, value.month, 1)
+
+
+def _json_default(value):
+    """보관 파일 JSON 변환 (datetime, Decimal)"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return str(value)
+
+
+class UsageArchiveReader:
+    """보관된 사용량 파일 조회"""
+
+    def __init__(self, archive_dir):
+        """
+        초기화
+
+        Args:
+            archive_dir: 보관 파일 디렉토리
+        """
+        self.archive_dir = Path(archive_dir)
+
+    def _files(self, table: str) -> List[Path]:
+        check_usage_table(table)
+        table_dir = self.archive_dir / table
+        if not table_dir.exists():
+            return []
+        return sorted(table_dir.glob(f"{table}_*.ndjson.gz"))
+
+    @staticmethod
+    def _file_month(table: str, path: Path) -> str:
+        # {table}_{YYYY-MM}_{첫 id}-{마지막 id}.ndjson.gz
+        return path.name[len(table) + 1:len(table) + 8]
+
+    def list_months(self, table: str) -> List[str]:
+        """
+        보관된 월 목록
+
+        Returns:
+            'YYYY-MM' 문자열 리스트 (오름차순)
+        """
+        return sorted({self._file_month(table, path) for path in self._files(table)})
+
+    def iter_rows(self, table: str, month_from: Optional[str] = None, month_to: Optional[str] = None,
+                  owner: Optional[str] = None) -> Iterator[Dict]:
+        """
+        보관된 기록을 한 행씩 읽기 (파일 전체를 메모리에 올리지 않음)
+
+        Args:
+            table: user_usage 또는 usage_stats
+            month_from: 시작 월 'YYYY-MM' (포함, 선택사항)
+            month_to: 종료 월 'YYYY-MM' (포함, 선택사항)
+            owner: 사용자 ID 또는 라이선스 키 (선택사항)
+        """
+        owner_column = check_usage_table(table)
+        for path in self._files(table):
+            month = self._file_month(table, path)
+            if month_from and month < month_from:
+                continue
+            if month_to and month > month_to:
+                continue
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    row = json.loads(line)
+                    if owner and row.get(owner_column) != owner:
+                        continue
+                    yield row
+
+    def summarize(self, table: str, month_from: Optional[str] = None, month_to: Optional[str] = None,
+                  owner: Optional[str] = None) -> Dict:
+        """
+        보관된 기록 합계
+
+        Returns:
+            run_count, total_invoices, total_success, total_fail, last_usage 딕셔너리
+        """
+        summary = new_usage_summary()
+        for row in self.iter_rows(table, month_from, month_to, owner):
+            add_usage_row(summary, row)
+        return summary
+
+    def read_rows(self, table: str, month_from: Optional[str] = None, month_to: Optional[str] = None,
+                  owner: Optional[str] = None, limit: int = 1000) -> Tuple[List[Dict], bool, Dict]:
+        """
+        보관된 기록을 한 번 읽으면서 앞쪽 limit행과 전체 합계를 함께 구함 (파일을 두 번 읽지 않음)
+
+        Returns:
+            (행 리스트, limit보다 많은 행이 있었는지, summarize와 같은 합계)
+        """
+        rows = []
+        truncated = False
+        summary = new_usage_summary()
+        for row in self.iter_rows(table, month_from, month_to, owner):
+            add_usage_row(summary, row)
+            if len(rows) < limit:
+                rows.append(row)
+            else:
+                truncated = True
+        return rows, truncated, summary
+
+
+def new_usage_summary() -> Dict:
+    """빈 사용량 합계"""
+    return {'run_count': 0, 'total_invoices': 0, 'total_success': 0, 'total_fail': 0, 'last_usage': None}
+
+
+def add_usage_row(summary: Dict, row: Dict):
+    """보관된 기록 한 행을 합계에 더함"""
+    summary['run_count'] += 1
+    summary['total_invoices'] += row.get('total_invoices') or 0
+    summary['total_success'] += row.get('success_count') or 0
+    summary['total_fail'] += row.get('fail_count') or 0
+    usage_date = row.get('usage_date')
+    if usage_date and (summary['last_usage'] is None or usage_date > summary['last_usage']):
+        summary['last_usage'] = usage_date
+
+
+def archive_usage_month(conn, table: str, month: datetime.date, archive_dir, use_postgresql: bool) -> int:
+    """
+    한 달치 사용량 기록을 보관 파일로 옮기고 DB에서 삭제
+    소유자별 합계는 usage_archive_totals에 누적하여 전체 기간 통계를 유지
+
+    Args:
+        conn: DB 연결
+        table: user_usage 또는 usage_stats
+        month: 보관할 월 (1일)
+        archive_dir: 보관 파일 디렉토리
+        use_postgresql: PostgreSQL 여부
+
+    Returns:
+        보관한 행 수
+    """
+    owner_column = check_usage_table(table)
+    placeholder = '%s' if use_postgresql else '?'
+    start, end = month, add_months(month, 1)
+    range_params = (start, end) if use_postgresql else (start.isoformat(), end.isoformat())
+    range_sql = f"usage_date >= {placeholder} AND usage_date < {placeholder}"
+
+    table_dir = Path(archive_dir) / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+    temp_path = table_dir / f"{table}_{start.strftime('%Y-%m')}.ndjson.gz.tmp"
+
+    pending_path = None
+    committed = False
+    cursor = conn.cursor()
+    try:
+        # 1) 보관 파일 작성 (임시 파일에 쓰고 완료 후 이름 변경)
+        cursor.execute(f"SELECT * FROM {table} WHERE {range_sql} ORDER BY id", range_params)
+        columns = [col[0] for col in cursor.description]
+        row_count = 0
+        first_id = last_id = None
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            while True:
+                rows = cursor.fetchmany(ARCHIVE_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(columns, row))
+                    first_id = record['id'] if first_id is None else first_id
+                    last_id = record['id']
+                    f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + '\n')
+                    row_count += 1
+
+        if row_count == 0:
+            temp_path.unlink()
+            return 0
+
+        # 같은 id 범위로 다시 실행하면 같은 파일을 덮어씀 (중단 후 재실행 시 중복 방지)
+        # 커밋 전까지는 대기(.pending) 파일로 두어 조회 대상에서 제외
+        archive_path = table_dir / f"{table}_{start.strftime('%Y-%m')}_{first_id}-{last_id}.ndjson.gz"
+        pending_path = archive_path.with_name(archive_path.name + PENDING_SUFFIX)
+        os.replace(temp_path, pending_path)
+
+        # 2) 소유자별 합계 누적 + 원본 삭제 (한 트랜잭션)
+        cursor.execute(f"""
+            SELECT
+                {owner_column},
+                COUNT(*),
+                COALESCE(SUM(total_invoices), 0),
+                COALESCE(SUM(success_count), 0),
+                COALESCE(SUM(fail_count), 0),
+                MAX(usage_date)
+            FROM {table}
+            WHERE {range_sql} AND id <= {placeholder}
+            GROUP BY {owner_column}
+        """, (*range_params, last_id))
+        totals = [(table, *row) for row in cursor.fetchall()]
+
+        if use_postgresql:
+            cursor.executemany("""
+                INSERT INTO usage_archive_totals
+                (source_table, owner_key, run_count, total_invoices, success_count, fail_count, last_usage)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (source_table, owner_key) DO UPDATE
+                SET run_count = usage_archive_totals.run_count + EXCLUDED.run_count,
+                    total_invoices = usage_archive_totals.total_invoices + EXCLUDED.total_invoices,
+                    success_count = usage_archive_totals.success_count + EXCLUDED.success_count,
+                    fail_count = usage_archive_totals.fail_count + EXCLUDED.fail_count,
+                    last_usage = GREATEST(usage_archive_totals.last_usage, EXCLUDED.last_usage)
+            """, totals)
+        else:
+            cursor.executemany("""
+                INSERT INTO usage_archive_totals
+                (source_table, owner_key, run_count, total_invoices, success_count, fail_count, last_usage)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source_table, owner_key) DO UPDATE
+                SET run_count = run_count + excluded.run_count,
+                    total_invoices = total_invoices + excluded.total_invoices,
+                    success_count = success_count + excluded.success_count,
+                    fail_count = fail_count + excluded.fail_count,
+                    last_usage = MAX(COALESCE(last_usage, excluded.last_usage), COALESCE(excluded.last_usage, last_usage))
+            """, totals)
+
+        # 월별 파티션이 통째로 보관되었으면 파티션을 삭제 (행 단위 DELETE보다 훨씬 빠름)
+        partition_dropped = False
+        if use_postgresql:
+            partition = usage_partition_name(table, start)
+            cursor.execute("SELECT to_regclass(%s)", (partition,))
+            if cursor.fetchone()[0]:
+                cursor.execute(f"SELECT COUNT(*) FROM {partition} WHERE id > %s", (last_id,))
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute(f"DROP TABLE {partition}")
+                    partition_dropped = True
+
+        # 파티션이 없거나 기본(DEFAULT) 파티션에 남은 행 삭제
+        cursor.execute(f"DELETE FROM {table} WHERE {range_sql} AND id <= {placeholder}", (*range_params, last_id))
+        conn.commit()
+        committed = True
+        # 커밋된 뒤에만 보관 파일로 확정
+        os.replace(pending_path, archive_path)
+
+        logger.info(f"사용량 보관 완료: {table} {start.strftime('%Y-%m')} {row_count}행 -> {archive_path.name}"
+                    f"{' (파티션 삭제)' if partition_dropped else ''}")
+        return row_count
+    except Exception:
+        if committed:
+            # DB에서는 이미 삭제됨 - 대기 파일을 남겨 두고 다음 보관 실행의 recover_pending_archives()에서 확정
+            logger.error(f"보관 파일 확정 실패 (다음 보관 실행 시 다시 확정): {pending_path}")
+            raise
+        conn.rollback()
+        for path in (temp_path, pending_path):
+            if path is not None and path.exists():
+                path.unlink()
+        raise
+    finally:
+        cursor.close()
+
+
+def recover_pending_archives(conn, table: str, archive_dir, use_postgresql: bool) -> int:
+    """
+    중단된 보관 작업의 대기(.pending) 파일 정리
+    id 범위의 행이 DB에 남아 있으면 커밋되지 않은 것이므로 삭제, 없으면 보관 파일로 확정
+
+    Returns:
+        확정한 파일 수
+    """
+    table_dir = Path(archive_dir) / table
+    if not table_dir.exists():
+        return 0
+    placeholder = '%s' if use_postgresql else '?'
+    suffix = f".ndjson.gz{PENDING_SUFFIX}"
+    recovered = 0
+    for pending_path in sorted(table_dir.glob(f"{table}_*{suffix}")):
+        # {table}_{YYYY-MM}_{첫 id}-{마지막 id}.ndjson.gz.pending
+        first_id, last_id = pending_path.name[len(table) + 9:-len(suffix)].split('-')
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE id >= {placeholder} AND id <= {placeholder}",
+                           (int(first_id), int(last_id)))
+            remaining = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        if remaining:
+            pending_path.unlink()
+        else:
+            os.replace(pending_path, pending_path.with_name(pending_path.name[:-len(PENDING_SUFFIX)]))
+            recovered += 1
+            logger.info(f"대기 중이던 보관 파일 확정: {pending_path.name}")
+    return recovered
+
+
+def archive_old_usage(conn, keep_months: int, archive_dir, use_postgresql: bool,
+                      tables: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    보관 기간이 지난 사용량 기록을 월 단위로 보관
+
+    Args:
+        keep_months: DB에 남길 개월 수 (이번 달 포함)
+        tables: 대상 테이블 (기본값: 전체 사용량 테이블)
+
+    Returns:
+        {테이블: 보관한 행 수}
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months는 1 이상이어야 합니다.")
+
+    cutoff = add_months(datetime.date.today().replace(day=1), -(keep_months - 1))
+    result = {}
+    for table in tables or list(USAGE_TABLES):
+        check_usage_table(table)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MIN(usage_date) FROM {table}")
+            month = to_month(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+
+        recover_pending_archives(conn, table, archive_dir, use_postgresql)
+        archived = 0
+        while month and month < cutoff:
+            archived += archive_usage_month(conn, table, month, archive_dir, use_postgresql)
+            month = add_months(month, 1)
+        result[table] = archived
+    return result
+
+
+def partition_usage_table(conn, table: str, months_ahead: int = 3):
+    """
+    기존 사용량 테이블을 usage_date 기준 월별 파티션 테이블로 전환 (PostgreSQL 전용, 한 트랜잭션)
+
+    Args:
+        table: user_usage 또는 usage_stats
+        months_ahead: 미리 만들 파티션 개월 수 (이번 달 포함)
+    """
+    check_usage_table(table)
+    legacy = f"{table}_unpartitioned"
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s
+        """, (table,))
+        if cursor.fetchone()[0] > 0:
+            logger.info(f"{table}은(는) 이미 파티션 테이블입니다.")
+            return
+
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT MIN(usage_date) FROM {table}")
+        first_month = to_month(cursor.fetchone()[0])
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        # LIKE ... INCLUDING CONSTRAINTS는 CHECK 제약만 복사하므로 기본 키를 직접 지정
+        # (파티션 테이블의 기본 키에는 파티션 기준 컬럼이 포함되어야 하고,
+        #  기존 기본 키 이름 {table}_pkey는 이름을 바꾼 테이블에 남아 있으므로 다른 이름 사용)
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                CONSTRAINT {table}_id_date_pkey PRIMARY KEY (id, usage_date),
+                {USAGE_TABLE_FOREIGN_KEYS[table]}
+            ) PARTITION BY RANGE (usage_date)
+        """)
+        cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        this_month = datetime.date.today().replace(day=1)
+        create_month_partitions(cursor, table, first_month or this_month, add_months(this_month, months_ahead - 1))
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+        if sequence:
+            # 기존 테이블 삭제 시 id 시퀀스가 함께 삭제되지 않도록 소유권 이전
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+        cursor.execute(f"DROP TABLE {legacy}")
+
+        for index_name, columns in USAGE_TABLE_INDEXES[table]:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({columns})")
+
+        conn.commit()
+        logger.info(f"{table} 월별 파티션 전환 완료")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main():
+    """명령행 실행"""
+    import argparse
+    from license_server import get_db_connection, init_db, USE_POSTGRESQL, USAGE_ARCHIVE_DIR, USAGE_PARTITION_MONTHS_AHEAD
+
+    parser = argparse.ArgumentParser(description="사용량 기록 보관/파티션 관리")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    archive_parser = subparsers.add_parser('archive', help="보관 기간이 지난 기록을 압축 파일로 이동")
+    archive_parser.add_argument('--keep-months', type=int, default=int(os.environ.get('USAGE_RETENTION_MONTHS', '12')),
+                                help="DB에 남길 개월 수 (기본값: USAGE_RETENTION_MONTHS 또는 12)")
+    archive_parser.add_argument('--table', choices=list(USAGE_TABLES), help="대상 테이블 (기본값: 전체)")
+
+    subparsers.add_parser('partition', help="PostgreSQL 사용량 테이블을 월별 파티션으로 전환")
+
+    months_parser = subparsers.add_parser('months', help="보관된 월 목록 출력")
+    months_parser.add_argument('table', choices=list(USAGE_TABLES))
+
+    args = parser.parse_args()
+
+    if args.command == 'months':
+        reader = UsageArchiveReader(USAGE_ARCHIVE_DIR)
+        for month in reader.list_months(args.table):
+            print(month)
+        return
+
+    # 보관 합계 테이블 등 추가 스키마 보장
+    init_db()
+    conn = get_db_connection()
+    try:
+        if args.command == 'partition':
+            if not USE_POSTGRESQL:
+                print("SQLite는 파티션 전환을 지원하지 않습니다. archive 명령으로 오래된 기록을 보관하세요.")
+                sys.exit(1)
+            for table in USAGE_TABLES:
+                partition_usage_table(conn, table, USAGE_PARTITION_MONTHS_AHEAD)
+                print(f"파티션 전환 완료: {table}")
+        elif args.command == 'archive':
+            tables = [args.table] if args.table else None
+            result = archive_old_usage(conn, args.keep_months, USAGE_ARCHIVE_DIR, USE_POSTGRESQL, tables)
+            for table, count in result.items():
+                print(f"보관 완료: {table} {count}행")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
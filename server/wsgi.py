@@ -1,7 +1,10 @@
 """
 WSGI 엔트리 포인트 (Railway용)
+gunicorn --preload로 실행하면 이 모듈은 마스터 프로세스에서 한 번만 실행되고
+워커는 fork로 초기화가 끝난 앱을 물려받음
 """
-from license_server import app, init_db, USE_POSTGRESQL, DATABASE_URL
+import os
+from license_server import app, init_db, warm_caches, close_db_pools, USE_POSTGRESQL
 import logging
 
 # 로깅 설정
@@ -11,16 +14,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 앱 시작 시 데이터베이스 초기화 (런타임에만 실행)
-# 실패해도 앱은 시작되도록 함 (나중에 재시도 가능)
 if USE_POSTGRESQL:
-    if not DATABASE_URL:
-        logger.error("⚠️ DATABASE_URL이 설정되지 않았습니다! SQLite 모드로 전환됩니다.")
-    else:
-        logger.info(f"✓ PostgreSQL 모드: DATABASE_URL 설정됨 (길이: {len(DATABASE_URL)})")
+    logger.info("✓ PostgreSQL 모드")
 else:
     logger.warning("⚠️ SQLite 모드: DATABASE_URL이 없거나 postgres로 시작하지 않음")
 
+# 앱 시작 시 데이터베이스 초기화 (스키마 확인은 마스터에서 한 번만)
+# 실패해도 앱은 시작되도록 함 (나중에 재시도 가능)
 try:
     init_db()
     logger.info("✓ 데이터베이스 초기화 완료")
@@ -28,6 +28,12 @@ except Exception as e:
     logger.error(f"✗ 데이터베이스 초기화 실패: {e}", exc_info=True)
     logger.warning("앱은 계속 실행되지만 데이터베이스 연결이 필요합니다.")
 
+# 버전 정보/사용료 설정 캐시 미리 채우기 (WARM_CACHES=0이면 생략)
+if os.environ.get('WARM_CACHES', '1').lower() not in ('0', 'false', 'no'):
+    warm_caches()
+
+# fork 전에 마스터의 DB 연결을 닫음 (워커는 각자 새 연결 풀 사용)
+close_db_pools()
+
 if __name__ == "__main__":
     app.run()
-
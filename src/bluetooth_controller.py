@@ -5,12 +5,33 @@ BLT AI 로봇과 시리얼 통신을 통해 블루투스 HID 키보드로 텍스
 
 import serial
 import time
-from typing import Optional, Callable
+import queue
+from typing import NamedTuple, Optional, Callable
 import logging
 import threading
 
 logger = logging.getLogger(__name__)
 
+# 펌웨어 응답 (송장번호 하나를 키보드로 입력한 뒤 출력)
+ACK_MARKER = "전송 완료"
+# 인증되지 않았거나 모바일이 연결되지 않아 입력하지 않았을 때 출력
+IGNORED_MARKER = "키보드 입력 무시됨"
+# 받은 줄을 키보드로 입력하기 직전에 출력 ("→ 수신: <텍스트>", 이후에는 입력 중일 수 있음)
+ECHO_MARKER = "→ 수신:"
+# 확인 응답 대기 시간 (초, 펌웨어 입력 과정은 약 1초)
+DEFAULT_ACK_TIMEOUT = 5.0
+# 시리얼 메시지 확인 주기 (초, 확인 응답이 늦게 전달되지 않도록 짧게)
+MONITOR_POLL_INTERVAL = 0.02
+
+
+class SendResult(NamedTuple):
+    """확인 응답 기반 전송 결과"""
+    success: bool
+    status: str         # 'ack': 입력 완료, 'ignored': 기기가 입력 거부, 'timeout': 응답 없음, 'error': 전송 실패
+                        # 'unknown': 기기가 받았지만 입력 완료 응답 없음 (입력되었을 수 있어 다시 보내지 않음)
+    attempts: int       # 전송 횟수
+    elapsed: float      # 마지막 전송부터 응답까지 걸린 시간 (초)
+
 
 class BluetoothController:
     """BLT AI 로봇과 시리얼 통신을 통한 블루투스 HID 키보드 제어"""
@@ -31,6 +52,9 @@ class BluetoothController:
         self.serial_monitor_thread: Optional[threading.Thread] = None
         self.monitor_running = False
         self.serial_log_callback: Optional[Callable[[str], None]] = None
+        # 모니터링 스레드가 받은 펌웨어 응답 ('ack', 'ignored', 'echo', 받은 텍스트)
+        self._acks: "queue.Queue[tuple]" = queue.Queue()
+        self.ack_count = 0  # 지금까지 받은 입력 완료 응답 수 (펌웨어 지원 여부 판단)
     
     def connect(self) -> bool:
         """
@@ -91,25 +115,32 @@ class BluetoothController:
             if self.serial_log_callback:
                 self.serial_log_callback("AI BOT 시리얼 모니터링 시작")
             
-            while self.monitor_running and self.serial_conn and self.serial_conn.is_open:
-                try:
-                    if self.serial_conn.in_waiting > 0:
-                        line = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            # "전송 완료 (송장번호 + Tab..." 메시지는 필터링 (표시하지 않음)
-                            if "전송 완료" in line and "Tab" in line:
-                                logger.debug(f"AI BOT (필터링됨): {line}")
-                                continue
-                            
-                            # 로그 콜백으로 전달
-                            if self.serial_log_callback:
-                                self.serial_log_callback(f"[AI BOT] {line}")
-                            logger.debug(f"AI BOT: {line}")
-                    time.sleep(0.1)  # CPU 사용량 감소
-                except Exception as e:
-                    if self.monitor_running:  # 정상 종료가 아닌 경우만 로그
-                        logger.error(f"시리얼 모니터링 오류: {e}")
-                    break
+            try:
+                while self.monitor_running and self.serial_conn and self.serial_conn.is_open:
+                    try:
+                        if self.serial_conn.in_waiting > 0:
+                            line = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
+                            if line:
+                                response = self._parse_response(line)
+                                if response:
+                                    self._acks.put(response)
+                                # "전송 완료 (송장번호 + Tab..." 메시지는 필터링 (표시하지 않음)
+                                if response and response[0] == 'ack':
+                                    logger.debug(f"AI BOT (필터링됨): {line}")
+                                    continue
+                                
+                                # 로그 콜백으로 전달
+                                if self.serial_log_callback:
+                                    self.serial_log_callback(f"[AI BOT] {line}")
+                                logger.debug(f"AI BOT: {line}")
+                        time.sleep(MONITOR_POLL_INTERVAL)  # CPU 사용량 감소
+                    except Exception as e:
+                        if self.monitor_running:  # 정상 종료가 아닌 경우만 로그
+                            logger.error(f"시리얼 모니터링 오류: {e}")
+                        break
+            finally:
+                # 오류로 끝나도 표시를 내려 응답 대기가 직접 시리얼을 읽도록 함
+                self.monitor_running = False
             
             logger.debug("AI BOT 시리얼 모니터링 종료")
             if self.serial_log_callback:
@@ -119,11 +150,10 @@ class BluetoothController:
         self.serial_monitor_thread.start()
     
     def stop_serial_monitoring(self):
-        """시리얼 모니터링 중지"""
-        if self.monitor_running:
-            self.monitor_running = False
-            if self.serial_monitor_thread:
-                self.serial_monitor_thread.join(timeout=1.0)
+        """시리얼 모니터링 중지 (오류로 먼저 끝난 스레드도 정리)"""
+        self.monitor_running = False
+        if self.serial_monitor_thread:
+            self.serial_monitor_thread.join(timeout=1.0)
             self.serial_monitor_thread = None
             self.serial_log_callback = None
             logger.debug("AI BOT 시리얼 모니터링 중지 요청")
@@ -156,6 +186,120 @@ class BluetoothController:
             logger.error(f"전송 실패: {e}")
             return False
     
+    def send_text_acked(self, text: str, timeout: float = DEFAULT_ACK_TIMEOUT,
+                        max_attempts: int = 3, retry_delay: float = 1.0,
+                        should_continue: Optional[Callable[[], bool]] = None) -> SendResult:
+        """
+        텍스트 전송 후 펌웨어의 입력 완료 응답("전송 완료")까지 대기
+        
+        - 기기가 입력을 거부했거나, 받았다는 표시("→ 수신: <텍스트>")도 없으면 retry_delay 뒤 다시 전송
+        - 받았다는 표시가 있으면 입력 중이므로 그때부터 timeout만큼 더 기다리고,
+          그래도 완료 응답이 없으면 'unknown'으로 끝냄 (이미 입력되었을 수 있어 다시 보내면 중복 입력)
+        
+        Args:
+            text: 전송할 텍스트
+            timeout: 응답 대기 시간 (초)
+            max_attempts: 최대 전송 횟수
+            retry_delay: 재전송 전 대기 (초)
+            should_continue: 재전송 전에 확인할 함수 (False면 중단, 예: 사용자 중지)
+        
+        Returns:
+            SendResult
+        """
+        status = 'error'
+        elapsed = 0.0
+        attempt = 0
+        for attempt in range(1, max_attempts + 1):
+            if attempt > 1:
+                if should_continue and not should_continue():
+                    break
+                time.sleep(retry_delay)
+            
+            # 이전 송장번호의 늦은 응답은 버림
+            self._clear_acks()
+            sent_at = time.monotonic()
+            if not self.send_text(text):
+                status = 'error'
+                continue
+            
+            try:
+                status = self._wait_ack(text, timeout)
+            except serial.SerialException as e:
+                logger.error(f"확인 응답 읽기 실패: {e}")
+                status = 'error'
+            elapsed = time.monotonic() - sent_at
+            if status == 'ack':
+                return SendResult(True, status, attempt, elapsed)
+            if status == 'unknown':
+                logger.warning(f"입력 완료 응답 없음 (기기는 받음, 중복 입력 방지를 위해 다시 보내지 않음): {text}")
+                break
+            logger.warning(f"확인 응답 실패 ({status}, {attempt}/{max_attempts}): {text}")
+        return SendResult(False, status, attempt, elapsed)
+    
+    def _clear_acks(self):
+        while True:
+            try:
+                self._acks.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _wait_ack(self, text: str, timeout: float) -> str:
+        """
+        확인 응답 대기 ('ack', 'ignored', 'timeout', 'unknown')
+        text를 받았다는 표시가 오면 그때부터 timeout만큼 다시 기다림 (없으면 'unknown')
+        """
+        expected = text.strip()
+        echoed = False
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return 'unknown' if echoed else 'timeout'
+            response = self._next_response(remaining)
+            if response is None:
+                continue
+            kind, received = response
+            if kind == 'echo':
+                if received == expected:
+                    echoed = True
+                    deadline = time.monotonic() + timeout
+                continue
+            if kind == 'ack':
+                self.ack_count += 1
+            return kind
+    
+    def _next_response(self, timeout: float) -> Optional[tuple]:
+        """펌웨어 응답 하나 대기 ((종류, 텍스트), timeout 안에 없으면 None)"""
+        if self.monitor_running:
+            # 모니터링 스레드가 시리얼을 읽고 있으므로 응답만 전달받음
+            try:
+                return self._acks.get(timeout=min(timeout, 0.5))
+            except queue.Empty:
+                return None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.serial_conn.in_waiting > 0:
+                line = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
+                if line:
+                    logger.debug(f"AI BOT: {line}")
+                    response = self._parse_response(line)
+                    if response:
+                        return response
+            else:
+                time.sleep(MONITOR_POLL_INTERVAL)
+        return None
+    
+    @staticmethod
+    def _parse_response(line: str) -> Optional[tuple]:
+        """펌웨어 출력 한 줄 해석 (('ack' | 'ignored' | 'echo', 받은 텍스트), 해당 없으면 None)"""
+        if ACK_MARKER in line:
+            return 'ack', ''
+        if IGNORED_MARKER in line:
+            return 'ignored', ''
+        if line.startswith(ECHO_MARKER):
+            return 'echo', line[len(ECHO_MARKER):].strip()
+        return None
+    
     def is_connected(self) -> bool:
         """
         연결 상태 확인
@@ -3,47 +3,140 @@
 엑셀 파일에서 송장번호를 읽어옵니다.
 """
 
-from openpyxl import load_workbook
-from typing import List
+from typing import Callable, Iterator, List, Optional, Tuple
+import array
 import logging
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 읽기 진행 상황을 알리는 간격 (송장번호 개수)
+PROGRESS_INTERVAL_ROWS = 5000
+
+
+def read_with_progress(invoices: Iterator[str], progress: Optional[Callable[[int], None]] = None) -> List[str]:
+    """송장번호를 모두 읽어 리스트로 반환 (progress가 있으면 PROGRESS_INTERVAL_ROWS개마다 호출)"""
+    if progress is None:
+        return list(invoices)
+    result = []
+    append = result.append
+    for invoice in invoices:
+        append(invoice)
+        if len(result) % PROGRESS_INTERVAL_ROWS == 0:
+            progress(len(result))
+    progress(len(result))
+    return result
+
+
+def read_rows_with_progress(rows: Iterator[Tuple[int, str]],
+                            progress: Optional[Callable[[int], None]] = None) -> Tuple[List[str], array.array]:
+    """(행 번호, 송장번호)를 모두 읽어 (송장번호 리스트, 행 번호 배열)로 반환 (progress는 read_with_progress와 같음)"""
+    invoices = []
+    row_numbers = array.array('I')
+    append = invoices.append
+    append_row = row_numbers.append
+    for row_num, invoice in rows:
+        append(invoice)
+        append_row(row_num)
+        if progress is not None and len(invoices) % PROGRESS_INTERVAL_ROWS == 0:
+            progress(len(invoices))
+    if progress is not None:
+        progress(len(invoices))
+    return invoices, row_numbers
+
 
 class ExcelReader:
     """엑셀 파일에서 송장번호 읽기 (헤더 없이 1행 1열부터 읽기)"""
     
-    def __init__(self, file_path: str, sheet_name: str = "Sheet1"):
+    def __init__(self, file_path: str, sheet_name: str = "Sheet1", read_only: bool = True):
         """
         초기화
         
         Args:
             file_path: 엑셀 파일 경로
             sheet_name: 시트 이름
+            read_only: 읽기 전용(스트리밍) 모드 - 행을 순서대로 읽어 메모리 사용이 적음
+                       (False면 전체 셀을 메모리에 불러옴)
         """
         self.file_path = Path(file_path)
         self.sheet_name = sheet_name
+        self.read_only = read_only
     
-    def read_invoices(self) -> List[str]:
+    def read_invoices(self, limit: Optional[int] = None, offset: int = 0,
+                      progress: Optional[Callable[[int], None]] = None) -> List[str]:
         """
         엑셀에서 송장번호 읽기 (1행 1열부터 헤더 없이 읽기)
         
+        Args:
+            limit: 최대 개수 (기본값: 전체)
+            offset: 앞에서 건너뛸 송장번호 개수
+            progress: 진행 상황 콜백 (지금까지 읽은 개수, PROGRESS_INTERVAL_ROWS개마다 호출)
+                      콜백에서 예외를 발생시키면 읽기를 중단함
+        
         Returns:
             송장번호 리스트 (문자열로 변환하여 앞자리 0 보존)
             
+        Raises:
+            FileNotFoundError: 파일을 찾을 수 없을 때
+            ValueError: 시트를 찾을 수 없을 때
+        """
+        invoices = read_with_progress(self.iter_invoices(limit=limit, offset=offset), progress)
+        logger.info(f"총 {len(invoices)}개의 송장번호를 읽었습니다.")
+        return invoices
+    
+    def read_invoice_rows(self, progress: Optional[Callable[[int], None]] = None) -> Tuple[List[str], array.array]:
+        """
+        송장번호와 엑셀 행 번호 읽기 (제외/실패 안내를 엑셀 행 번호로 표시하기 위해 사용)
+        
+        Returns:
+            (송장번호 리스트, 같은 순서의 행 번호 배열 - 1부터, 빈 셀도 셈)
+        """
+        invoices, row_numbers = read_rows_with_progress(self.iter_invoice_rows(), progress)
+        logger.info(f"총 {len(invoices)}개의 송장번호를 읽었습니다.")
+        return invoices, row_numbers
+    
+    def iter_invoices(self, limit: Optional[int] = None, offset: int = 0) -> Iterator[str]:
+        """
+        송장번호를 한 개씩 읽기 (필요한 만큼만 읽고 멈춤)
+        
+        빈 셀은 건너뛰며, limit/offset은 빈 셀을 제외한 송장번호 개수 기준
+        
+        Args:
+            limit: 최대 개수 (기본값: 전체)
+            offset: 앞에서 건너뛸 송장번호 개수
+        
+        Yields:
+            송장번호 (문자열로 변환하여 앞자리 0 보존)
+            
+        Raises:
+            FileNotFoundError: 파일을 찾을 수 없을 때
+            ValueError: 시트를 찾을 수 없을 때
+        """
+        for _, invoice in self.iter_invoice_rows(limit=limit, offset=offset):
+            yield invoice
+    
+    def iter_invoice_rows(self, limit: Optional[int] = None, offset: int = 0) -> Iterator[Tuple[int, str]]:
+        """
+        (행 번호, 송장번호)를 한 개씩 읽기 (iter_invoices와 같고 엑셀 행 번호를 함께 반환)
+        
         Raises:
             FileNotFoundError: 파일을 찾을 수 없을 때
             ValueError: 시트를 찾을 수 없을 때
         """
         if not self.file_path.exists():
             raise FileNotFoundError(f"엑셀 파일을 찾을 수 없습니다: {self.file_path}")
+        if limit is not None and limit <= 0:
+            return
         
         logger.info(f"엑셀 파일 읽기: {self.file_path}")
         
+        # openpyxl은 불러오는 데 시간이 걸리므로 엑셀 파일을 읽을 때만 import
+        from openpyxl import load_workbook
+        
+        wb = None
         try:
             # 엑셀 파일 열기
-            wb = load_workbook(self.file_path, data_only=True)
+            wb = load_workbook(self.file_path, read_only=self.read_only, data_only=True)
             
             # 시트 선택
             if self.sheet_name not in wb.sheetnames:
@@ -51,26 +144,42 @@ class ExcelReader:
             
             ws = wb[self.sheet_name]
             logger.info(f"시트 선택: {self.sheet_name}")
+            if self.read_only:
+                # 파일에 기록된 시트 크기가 실제와 다르면 일부 행만 읽히므로 크기 정보 무시
+                ws.reset_dimensions()
             
-            # 1행 1열부터 데이터 읽기 (헤더 없이)
-            invoices = []
-            for row_num, row in enumerate(ws.iter_rows(min_row=1, values_only=True), start=1):
-                # 첫 번째 열(A열)의 값만 읽기
-                value = row[0] if len(row) > 0 else None
-                
-                # 값이 있으면 문자열로 변환 (앞자리 0 보존)
-                if value is not None:
-                    invoice_str = str(value).strip()
-                    if invoice_str:  # 빈 문자열이 아니면
-                        invoices.append(invoice_str)
-                        logger.debug(f"행 {row_num}: {invoice_str}")
-            
-            logger.info(f"총 {len(invoices)}개의 송장번호를 읽었습니다.")
-            return invoices
+            # 1행 1열부터 데이터 읽기 (헤더 없이, 첫 번째 열(A열)만)
+            debug = logger.isEnabledFor(logging.DEBUG)
+            skipped = 0
+            count = 0
+            for row_num, row in enumerate(ws.iter_rows(min_row=1, max_col=1, values_only=True), start=1):
+                invoice_str = self.cell_to_invoice(row[0] if len(row) > 0 else None)
+                if not invoice_str:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if debug:
+                    logger.debug(f"행 {row_num}: {invoice_str}")
+                yield row_num, invoice_str
+                count += 1
+                if limit is not None and count >= limit:
+                    break
             
         except Exception as e:
             logger.error(f"엑셀 파일 읽기 실패: {e}")
             raise
+        finally:
+            # 읽기 전용 모드는 파일을 열어 둔 채로 읽으므로 닫아야 함
+            if wb is not None:
+                wb.close()
+    
+    @staticmethod
+    def cell_to_invoice(value) -> str:
+        """셀 값을 송장번호 문자열로 변환 (앞자리 0 보존, 빈 값은 빈 문자열)"""
+        if value is None:
+            return ""
+        return str(value).strip()
     
     def validate_data(self) -> bool:
         """
@@ -80,8 +189,8 @@ class ExcelReader:
             검증 성공 여부
         """
         try:
-            invoices = self.read_invoices()
-            if len(invoices) == 0:
+            # 송장번호가 하나라도 있는지만 확인 (파일 전체를 읽지 않음)
+            if next(self.iter_invoices(limit=1), None) is None:
                 logger.warning("읽은 송장번호가 없습니다.")
                 return False
             return True
@@ -6,6 +6,13 @@
 # 프로그램 버전 (exe 빌드 시 이 값을 업데이트)
 VERSION = "1.0.1"
 
+# 세션 관리 스레드 결과 확인 주기 (ms)
+SESSION_POLL_INTERVAL_MS = 200
+# 송장번호 파일 읽기 진행 상황 확인 주기 (ms)
+EXCEL_LOAD_POLL_INTERVAL_MS = 100
+# 로그/진행 상황 화면 반영 주기 (ms)
+UI_EVENT_POLL_INTERVAL_MS = 80
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import serial.tools.list_ports
@@ -21,9 +28,16 @@ import re
 sys.path.insert(0, str(Path(__file__).parent))
 
 from bluetooth_controller import BluetoothController
-from excel_reader import ExcelReader
-from utils import setup_logging
+from send_pacing import InvoiceSender, PACING_ACK, PACING_ADAPTIVE, DEFAULT_FLOW_CONTROL
+from invoice_sources import INVOICE_FILETYPES
+from invoice_preview import VirtualInvoiceList
+from invoice_jobs import PATH_SEPARATOR, InvoiceJobLoader, JobCancelled, describe_rejected
+from ui_bus import UiEventBus, create_file_logger, append_log_lines, MAX_LOG_LINES
 from user_auth_manager import UserAuthManager
+from http_client import post_json, add_latency_listener, remove_latency_listener
+from usage_spool import UsageSpool, UsageUploader
+from session_manager import SessionManager
+from online_license_manager import OnlineLicenseManager, LICENSE_FILE
 from hardware_id import get_hardware_id
 from colorama import init
 
@@ -45,8 +59,14 @@ class HanjinAutomationApp:
         self.is_running = False
         self.config_file = Path(__file__).parent.parent / "config" / "settings.json"
         self.loaded_invoices = []  # 로드된 송장번호 리스트
+        self.loaded_job = None  # 송장번호 작업 (송장번호별 출처 조회)
+        self.rejected_invoices = []  # 검증에서 제외된 송장번호
+        self.excel_loader = None  # 송장번호 파일 읽기 작업 (백그라운드)
         self.auto_logout_timer = None  # 자동 로그아웃 타이머
         
+        # 로그/진행 상황 전달 (화면 로그는 최근 MAX_LOG_LINES줄, 전체는 logs/gui_YYYYMMDD.log)
+        self.ui_bus = UiEventBus(create_file_logger())
+        
         # 설정 로드 (라이선스 서버 URL 필요)
         self.config = self.load_config()
         
@@ -56,22 +76,47 @@ class HanjinAutomationApp:
         self.current_user_id = None
         self.current_user_info = None
         
-        # 버전 체크 (로그인 전에 수행)
-        if not self.check_version():
-            return  # 버전 체크 실패 시 프로그램 종료
+        # 라이선스 파일이 있으면 라이선스 임대 확인/갱신 (없으면 로그인 인증만 사용)
+        self.license_manager = self.create_license_manager(server_url)
+        self.license_valid = None  # 마지막 라이선스 확인 결과 (None: 아직 확인 전)
+        
+        # 버전 체크, 사용자 정보 갱신, 라이선스 확인은 백그라운드에서 실행 (결과는 큐로 받아 메인 스레드에서 반영)
+        self.version_checked = False
+        self.update_required = False
+        self.session_manager = SessionManager(
+            self.user_auth_manager,
+            self.get_current_version(),
+            license_manager=self.license_manager
+        )
+        self.session_manager.start()
+        self.root.after(SESSION_POLL_INTERVAL_MS, self.process_session_events)
         
         # 세션 파일 삭제 (프로그램 재시작 시 항상 로그인 강제)
         # clear_session()은 show_login에서 자동으로 처리됨 (세션 확인 코드 제거)
         
-        # 로그인 화면 표시
-        if not self.show_login():
-            return
+        # 로그인 화면 표시 (버전 체크 결과는 로그인 창이 떠 있는 동안 반영)
+        if not self.show_login() or self.update_required:
+            return  # 로그인 취소 또는 강제 업데이트 필요 시 프로그램 종료
+        self.session_manager.set_user(self.current_user_id)
         
         # 만료일 체크 및 알림
         self.check_expiry_and_notify()
         
         # GUI 생성
         self.create_widgets()
+        self.root.after(UI_EVENT_POLL_INTERVAL_MS, self.process_ui_events)
+        
+        # 서버 요청 응답 시간 로그 표시
+        add_latency_listener(self.log_server_latency)
+        
+        # 사용 통계 보관함 (이전 실행에서 못 보낸 기록도 함께 전송)
+        self.usage_spool = UsageSpool()
+        self.usage_uploader = UsageUploader(
+            self.usage_spool,
+            self.user_auth_manager,
+            on_result=self.on_usage_uploaded
+        )
+        self.usage_uploader.start()
         
         # COM 포트 목록 새로고침
         self.refresh_ports()
@@ -82,14 +127,6 @@ class HanjinAutomationApp:
         # 1시간 후 자동 로그아웃 타이머 시작
         self.start_auto_logout_timer()
     
-    def log(self, message):
-        """로그 메시지 추가 (create_widgets 이후에 사용 가능)"""
-        if hasattr(self, 'log_text'):
-            timestamp = time.strftime("%H:%M:%S")
-            self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.log_text.see(tk.END)
-            self.root.update_idletasks()
-    
     def load_config(self):
         """설정 파일 로드"""
         if self.config_file.exists():
@@ -104,10 +141,22 @@ class HanjinAutomationApp:
             "serial": {"port": "COM3", "baudrate": 115200, "timeout": 1.0},
             "delays": {"min_between": 1.0, "max_between": 2.0},
             "retry": {"max_attempts": 3, "retry_delay": 2.0},
+            "flow_control": dict(DEFAULT_FLOW_CONTROL),
             "excel": {"file_path": "", "column_name": "InvoiceNumber", "sheet_name": "Sheet1"},
             "license_server": {"url": "https://license-server-production-e83a.up.railway.app"}
         }
     
+    def create_license_manager(self, server_url):
+        """라이선스 파일이 있으면 온라인 라이선스 관리자 생성 (없거나 읽을 수 없으면 None)"""
+        if not LICENSE_FILE.exists():
+            return None
+        try:
+            license_manager = OnlineLicenseManager(server_url=server_url)
+        except Exception as e:
+            self.log(f"⚠️ 라이선스 확인 준비 실패: {e}")
+            return None
+        return license_manager if license_manager.license_data else None
+    
     def save_config(self):
         """설정 파일 저장"""
         try:
@@ -117,55 +166,67 @@ class HanjinAutomationApp:
         except Exception as e:
             messagebox.showerror("오류", f"설정 저장 실패: {e}")
     
-    def check_version(self) -> bool:
+    def get_current_version(self) -> str:
+        """
+        현재 프로그램 버전
+        
+        버전 읽기 우선순위:
+        1. exe와 같은 폴더의 version.txt 파일
+        2. 소스 코드 폴더의 version.txt 파일
+        3. 코드에 정의된 VERSION 상수
+        """
+        current_version = VERSION  # 기본값은 코드의 VERSION
+        
+        # exe로 빌드된 경우를 대비해 여러 경로 확인
+        if hasattr(sys, '_MEIPASS'):
+            # PyInstaller로 빌드된 경우
+            # exe 파일과 같은 폴더의 version.txt 확인
+            exe_dir = Path(sys.executable).parent
+            version_file = exe_dir / "version.txt"
+        else:
+            # 개발 모드: 소스 코드 폴더의 version.txt 확인
+            version_file = Path(__file__).parent.parent / "version.txt"
+        
+        # version.txt 파일이 있으면 읽기
+        if version_file.exists():
+            try:
+                with open(version_file, 'r', encoding='utf-8') as f:
+                    file_version = f.read().strip()
+                    if file_version:
+                        current_version = file_version
+            except Exception:
+                # 파일 읽기 실패 시 코드의 VERSION 사용
+                pass
+        return current_version
+    
+    def handle_version_result(self, success: bool, message: str, version_info) -> bool:
         """
-        프로그램 버전 체크 (로그인 전에 수행)
+        버전 체크 결과 처리 (세션 관리 스레드 결과를 메인 스레드에서 반영)
         
         Returns:
             True: 버전 체크 통과 또는 오류 시 계속 진행
             False: 강제 업데이트 필요로 프로그램 종료
         """
         try:
-            # 버전 읽기 우선순위:
-            # 1. exe와 같은 폴더의 version.txt 파일
-            # 2. 소스 코드 폴더의 version.txt 파일
-            # 3. 코드에 정의된 VERSION 상수
-            current_version = VERSION  # 기본값은 코드의 VERSION
-            
-            # exe로 빌드된 경우를 대비해 여러 경로 확인
-            if hasattr(sys, '_MEIPASS'):
-                # PyInstaller로 빌드된 경우
-                # exe 파일과 같은 폴더의 version.txt 확인
-                exe_dir = Path(sys.executable).parent
-                version_file = exe_dir / "version.txt"
-            else:
-                # 개발 모드: 소스 코드 폴더의 version.txt 확인
-                version_file = Path(__file__).parent.parent / "version.txt"
-            
-            # version.txt 파일이 있으면 읽기
-            if version_file.exists():
-                try:
-                    with open(version_file, 'r', encoding='utf-8') as f:
-                        file_version = f.read().strip()
-                        if file_version:
-                            current_version = file_version
-                except Exception:
-                    # 파일 읽기 실패 시 코드의 VERSION 사용
-                    pass
-            
-            # 서버에 버전 체크 요청
-            success, needs_update, message, version_info = self.user_auth_manager.check_version(current_version)
+            current_version = self.session_manager.client_version
+            needs_update = bool(version_info and version_info.get('needs_update') and version_info.get('force_update_enabled'))
+            first_check = not self.version_checked
+            self.version_checked = True
             
             if not success:
-                # 버전 체크 실패 (네트워크 오류 등) - 경고만 표시하고 계속 진행
-                messagebox.showwarning(
-                    "버전 체크 실패",
-                    f"버전 체크에 실패했습니다:\n{message}\n\n프로그램을 계속 사용할 수 있지만, 최신 버전을 사용하는 것을 권장합니다."
-                )
+                # 버전 체크 실패 (네트워크 오류 등) - 계속 진행 (주기적 확인 때는 로그만)
+                if first_check:
+                    messagebox.showwarning(
+                        "버전 체크 실패",
+                        f"버전 체크에 실패했습니다:\n{message}\n\n프로그램을 계속 사용할 수 있지만, 최신 버전을 사용하는 것을 권장합니다."
+                    )
+                else:
+                    self.log(f"⚠️ 버전 체크 실패: {message}")
                 return True  # 오류 시에도 계속 진행
             
             # 업데이트가 필요하고 강제 업데이트가 활성화된 경우
             if needs_update and version_info and version_info.get('force_update_enabled'):
+                self.update_required = True
                 download_url = version_info.get('download_url', '')
                 update_message = version_info.get('update_message', '')
                 min_version = version_info.get('min_required_version', '')
@@ -263,8 +324,8 @@ class HanjinAutomationApp:
                 # 창이 닫히면 프로그램 종료
                 return False
             
-            # 업데이트가 필요하지만 강제 업데이트가 비활성화된 경우 (개발 모드)
-            elif version_info and version_info.get('needs_update') and not version_info.get('force_update_enabled'):
+            # 업데이트가 필요하지만 강제 업데이트가 비활성화된 경우 (개발 모드, 처음 한 번만 안내)
+            elif first_check and version_info and version_info.get('needs_update') and not version_info.get('force_update_enabled'):
                 # 경고만 표시하고 계속 진행
                 min_version = version_info.get('min_required_version', '')
                 messagebox.showinfo(
@@ -512,17 +573,27 @@ class HanjinAutomationApp:
         # 구분선
         ttk.Separator(settings_frame, orient=tk.VERTICAL).grid(row=0, column=3, padx=10, sticky=(tk.N, tk.S))
         
-        # 딜레이 설정
-        ttk.Label(settings_frame, text="딜레이:").grid(row=0, column=4, padx=5)
+        # 딜레이 설정 (자동 간격 조절 방식은 응답 후 대기 범위, 그 외는 전송 후 랜덤 딜레이 범위)
+        flow_control = {**DEFAULT_FLOW_CONTROL, **self.config.get("flow_control", {})}
+        self.adaptive_delay_inputs = flow_control["mode"] == PACING_ADAPTIVE
+        if self.adaptive_delay_inputs:
+            delay_label = "대기 범위:"
+            min_value, max_value = flow_control["adaptive_min_delay"], flow_control["adaptive_max_delay"]
+        else:
+            delay_label = "딜레이:"
+            min_value, max_value = self.config["delays"]["min_between"], self.config["delays"]["max_between"]
+        spin_from = 0.0 if self.adaptive_delay_inputs else 0.5
+        
+        ttk.Label(settings_frame, text=delay_label).grid(row=0, column=4, padx=5)
         ttk.Label(settings_frame, text="최소").grid(row=0, column=5, padx=2)
-        self.min_delay_var = tk.StringVar(value=str(self.config["delays"]["min_between"]))
-        min_delay_spin = ttk.Spinbox(settings_frame, from_=0.5, to=10.0, increment=0.5, 
+        self.min_delay_var = tk.StringVar(value=str(min_value))
+        min_delay_spin = ttk.Spinbox(settings_frame, from_=spin_from, to=10.0, increment=0.5, 
                                      textvariable=self.min_delay_var, width=8)
         min_delay_spin.grid(row=0, column=6, padx=2)
         
         ttk.Label(settings_frame, text="최대").grid(row=0, column=7, padx=2)
-        self.max_delay_var = tk.StringVar(value=str(self.config["delays"]["max_between"]))
-        max_delay_spin = ttk.Spinbox(settings_frame, from_=0.5, to=10.0, increment=0.5, 
+        self.max_delay_var = tk.StringVar(value=str(max_value))
+        max_delay_spin = ttk.Spinbox(settings_frame, from_=spin_from, to=10.0, increment=0.5, 
                                      textvariable=self.max_delay_var, width=8)
         max_delay_spin.grid(row=0, column=8, padx=2)
         
@@ -550,8 +621,11 @@ class HanjinAutomationApp:
         browse_btn = ttk.Button(excel_frame, text="찾아보기", command=self.browse_excel_file)
         browse_btn.grid(row=0, column=1, padx=5)
         
-        load_btn = ttk.Button(excel_frame, text="파일 업로드", command=self.load_excel_file)
-        load_btn.grid(row=0, column=2, padx=5)
+        folder_btn = ttk.Button(excel_frame, text="폴더", command=self.browse_excel_folder)
+        folder_btn.grid(row=0, column=2, padx=5)
+        
+        self.load_btn = ttk.Button(excel_frame, text="파일 업로드", command=self.load_excel_file)
+        self.load_btn.grid(row=0, column=3, padx=5)
         
         # === 엑셀 파일 미리보기 (오른쪽) ===
         preview_frame = ttk.LabelFrame(main_frame, text="엑셀 파일 미리보기", padding="8")
@@ -569,15 +643,21 @@ class HanjinAutomationApp:
         refresh_excel_btn = ttk.Button(header_frame, text="새로고침", command=self.reset_excel_data, width=10)
         refresh_excel_btn.pack(side=tk.RIGHT, padx=5)
         
-        # 리스트 박스
-        list_scroll = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL)
-        list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        # 검색 / 번호로 이동
+        search_frame = ttk.Frame(preview_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        self.preview_search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.preview_search_var, width=16)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        search_entry.bind('<Return>', lambda event: self.search_preview())
         
-        self.excel_listbox = tk.Listbox(preview_frame, width=28, 
-                                        yscrollcommand=list_scroll.set,
-                                        font=("맑은 고딕", 9))
-        self.excel_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        list_scroll.config(command=self.excel_listbox.yview)
+        ttk.Button(search_frame, text="찾기", command=self.search_preview, width=5).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(search_frame, text="이동", command=self.jump_preview, width=5).pack(side=tk.LEFT, padx=(5, 0))
+        
+        # 송장번호 목록 (보이는 행만 표시)
+        self.invoice_preview = VirtualInvoiceList(preview_frame, width=28, font=("맑은 고딕", 9))
+        self.invoice_preview.pack(fill=tk.BOTH, expand=True)
         
         # === 진행 상황 ===
         progress_frame = ttk.LabelFrame(main_frame, text="진행 상황", padding="8")
@@ -651,8 +731,8 @@ class HanjinAutomationApp:
             self.bt_status_indicator.config(foreground="red")
             self.log(f"연결 오류: {e}")
     
-    def verify_mac_address_optional(self):
-        """MAC 주소 검증 (선택사항 - 실패해도 계속 진행 가능)"""
+    def verify_mac_address_optional(self, port):
+        """MAC 주소 검증 (선택사항 - 실패해도 계속 진행 가능, 작업 전 확인 스레드에서 호출)"""
         if not self.current_user_id:
             return True  # 사용자 ID가 없으면 검증 스킵
         
@@ -667,20 +747,19 @@ class HanjinAutomationApp:
             except:
                 pass
         
-        port = self.port_var.get()
         if not port:
             self.log("⚠️ COM 포트가 선택되지 않았습니다. MAC 주소 검증을 건너뜁니다.")
             return True  # 포트가 없어도 검증 스킵하고 계속 진행
         
         try:
             # 먼저 등록된 MAC 주소 목록 가져오기
-            import requests
             server_url = self.config.get("license_server", {}).get("url", "http://localhost:5000")
             try:
-                mac_response = requests.post(
+                mac_response = post_json(
                     f"{server_url}/api/list_user_mac_addresses",
                     json={"user_id": self.current_user_id},
-                    timeout=5
+                    timeout=5,
+                    idempotent=True
                 )
                 registered_macs = []
                 if mac_response.status_code == 200:
@@ -746,19 +825,19 @@ class HanjinAutomationApp:
             self.log("MAC 주소 검증을 건너뛰고 계속 진행합니다.")
             return True  # 오류 발생해도 계속 진행
     
-    def verify_token_owner(self) -> bool:
+    def verify_token_owner(self, port) -> bool:
         """
         블루투스 기기에 등록된 사용자 정보와 PC 프로그램 로그인 사용자 일치 확인
+        (작업 전 확인 스레드에서 호출, 메시지 상자는 메인 스레드에서 표시)
         
         작업규칙 준수: 1인 1아이디 정책
         - PC 프로그램 로그인 사용자와 블루투스 기기에 등록된 사용자 정보가 일치해야만 작동
         - 다른 사용자의 정보가 기기에 등록되어 있으면 차단
         """
-        port = self.port_var.get()
         if not port:
             self.log("⚠️ COM 포트가 선택되지 않았습니다. 사용자 정보 확인을 건너뜁니다.")
             # 포트가 없으면 검증 불가능하므로 사용자에게 안내
-            if not messagebox.askyesno("경고", 
+            if not self.ask_on_main(messagebox.askyesno, "경고", 
                 "블루투스 기기가 연결되지 않아 사용자 정보 확인을 할 수 없습니다.\n\n"
                 "보안을 위해 사용자 정보 확인이 권장되지만,\n"
                 "기기가 연결되지 않아 확인을 건너뛰고 계속 진행하시겠습니까?"):
@@ -771,7 +850,7 @@ class HanjinAutomationApp:
             if not controller.connect():
                 self.log("⚠️ 블루투스 기기 연결에 실패했습니다. 사용자 정보 확인을 건너뜁니다.")
                 # 연결 실패 시 사용자에게 안내
-                if not messagebox.askyesno("경고",
+                if not self.ask_on_main(messagebox.askyesno, "경고",
                     "블루투스 기기 연결에 실패하여 사용자 정보 확인을 할 수 없습니다.\n\n"
                     "보안을 위해 사용자 정보 확인이 권장되지만,\n"
                     "연결 실패로 확인을 건너뛰고 계속 진행하시겠습니까?"):
@@ -800,12 +879,15 @@ class HanjinAutomationApp:
                     "4. PC 프로그램에서 다시 시도\n\n"
                     "※ 사용자 정보가 없으면 작업을 시작할 수 없습니다."
                 )
-                messagebox.showwarning("사용자 정보 없음", warning_msg)
+                self.run_on_main(messagebox.showwarning, "사용자 정보 없음", warning_msg)
                 return False
             
-            # 서버에 사용자 정보 확인 요청
+            # 서버에 사용자 정보 확인 요청 (토큰 확인 + 사용 기간 갱신을 한 번의 요청으로)
             self.log(f"서버에 토큰 확인 요청 중... (PC 로그인 아이디: {self.current_user_id})")
-            success, match, message, token_user_id, is_expired, is_user_match = self.user_auth_manager.check_token_owner(token, self.current_user_id)
+            token_owner, user_info = self.user_auth_manager.check_token_owner_with_user_info(token, self.current_user_id)
+            success, match, message, token_user_id, is_expired, is_user_match = token_owner
+            if user_info:
+                self.session_manager.report_user_info(self.current_user_id, user_info)
             self.log(f"서버 응답 - 성공: {success}, 일치: {match}, 토큰 소유자: {token_user_id}, 만료: {is_expired}, 아이디 일치: {is_user_match}")
             
             # 토큰 만료 시 추가 정보 로그
@@ -814,7 +896,7 @@ class HanjinAutomationApp:
             
             if not success:
                 self.log(f"⚠️ 사용자 정보 확인 실패: {message}")
-                if not messagebox.askyesno("확인", f"사용자 정보 확인에 실패했습니다:\n{message}\n\n계속 진행하시겠습니까?"):
+                if not self.ask_on_main(messagebox.askyesno, "확인", f"사용자 정보 확인에 실패했습니다:\n{message}\n\n계속 진행하시겠습니까?"):
                     return False
                 return True  # 확인 실패해도 사용자가 계속 진행을 선택하면 True 반환
             
@@ -850,7 +932,7 @@ class HanjinAutomationApp:
                         f"5. PC 프로그램에서 다시 시도\n\n"
                         f"※ 토큰은 7일 동안 유효하며, 만료되면 로그인을 다시 해야 새 토큰이 생성됩니다."
                     )
-                    messagebox.showwarning("토큰 만료", error_msg)
+                    self.run_on_main(messagebox.showwarning, "토큰 만료", error_msg)
                     return False
                 else:
                     # 아이디가 일치하지 않는 경우
@@ -866,7 +948,7 @@ class HanjinAutomationApp:
                         f"4. PC 프로그램에서 다시 시도\n\n"
                         f"※ 다른 사용자의 정보가 기기에 등록되어 있으면 작업할 수 없습니다."
                     )
-                    messagebox.showerror("사용자 정보 불일치", error_msg)
+                    self.run_on_main(messagebox.showerror, "사용자 정보 불일치", error_msg)
                     return False
             
             self.log("✓ 사용자 정보 확인 완료")
@@ -875,7 +957,7 @@ class HanjinAutomationApp:
         except Exception as e:
             self.log(f"⚠️ 사용자 정보 확인 중 오류 발생: {e}")
             # 오류 발생 시 사용자에게 확인 요청
-            if not messagebox.askyesno("확인", f"사용자 정보 확인 중 오류가 발생했습니다:\n{e}\n\n계속 진행하시겠습니까?"):
+            if not self.ask_on_main(messagebox.askyesno, "확인", f"사용자 정보 확인 중 오류가 발생했습니다:\n{e}\n\n계속 진행하시겠습니까?"):
                 return False
             return True  # 오류 발생해도 사용자가 계속 진행을 선택하면 True 반환
     
@@ -889,28 +971,44 @@ class HanjinAutomationApp:
     def browse_excel_file(self):
         """엑셀 파일 선택"""
         try:
-            filename = filedialog.askopenfilename(
-                title="엑셀 파일 선택",
-                filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+            filenames = filedialog.askopenfilenames(
+                title="송장번호 파일 선택 (엑셀/CSV/텍스트, 여러 개 선택 가능)",
+                filetypes=INVOICE_FILETYPES
             )
-            if filename:
-                self.excel_path_var.set(filename)
-                self.log(f"엑셀 파일 선택: {filename}")
+            if filenames:
+                self.excel_path_var.set(f"{PATH_SEPARATOR} ".join(filenames))
+                if len(filenames) == 1:
+                    self.log(f"엑셀 파일 선택: {filenames[0]}")
+                else:
+                    self.log(f"파일 {len(filenames)}개 선택: {', '.join(Path(name).name for name in filenames)}")
                 
                 # 파일 존재 확인만 (비동기 처리 안 함)
-                if Path(filename).exists():
+                missing = [name for name in filenames if not Path(name).exists()]
+                if not missing:
                     self.log("파일 경로 확인 완료")
                 else:
-                    self.log("경고: 파일을 찾을 수 없습니다.")
+                    self.log(f"경고: 파일을 찾을 수 없습니다: {', '.join(missing)}")
                     messagebox.showwarning("경고", "선택한 파일을 찾을 수 없습니다.")
         except Exception as e:
             self.log(f"파일 선택 오류: {e}")
             messagebox.showerror("오류", f"파일 선택 중 오류가 발생했습니다:\n{e}")
     
+    def browse_excel_folder(self):
+        """송장번호 파일이 있는 폴더 선택 (폴더 안의 지원 형식 파일 전체)"""
+        folder = filedialog.askdirectory(title="송장번호 파일 폴더 선택")
+        if folder:
+            self.excel_path_var.set(folder)
+            self.log(f"폴더 선택: {folder}")
+    
     def reset_excel_data(self):
         """엑셀 데이터 초기화 (새로고침)"""
+        if self.excel_loader:
+            # 읽는 중이면 취소 (결과는 poll_excel_load에서 버림)
+            self.excel_loader.cancel()
         self.loaded_invoices = []
-        self.excel_listbox.delete(0, tk.END)
+        self.loaded_job = None
+        self.rejected_invoices = []
+        self.invoice_preview.clear()
         self.total_count_var.set("총 0건")
         self.sync_btn.config(state=tk.DISABLED)
         self.progress_var.set("대기 중...")
@@ -918,67 +1016,170 @@ class HanjinAutomationApp:
         self.log("엑셀 데이터 초기화 완료. 새 파일을 업로드할 수 있습니다.")
     
     def load_excel_file(self):
-        """엑셀 파일 로드 및 미리보기"""
+        """송장번호 파일 로드 시작 (여러 파일/시트/폴더는 세미콜론으로 구분, 백그라운드에서 읽기)"""
+        if self.excel_loader and not self.excel_loader.done:
+            # 읽는 중에는 같은 버튼이 취소 버튼
+            self.excel_loader.cancel()
+            self.progress_var.set("엑셀 파일 읽기 취소 중...")
+            return
+        
         excel_path = self.excel_path_var.get()
         if not excel_path:
             messagebox.showwarning("경고", "엑셀 파일을 선택하세요.")
             return
         
-        if not Path(excel_path).is_absolute():
-            project_root = Path(__file__).parent.parent
-            excel_path = project_root / excel_path
+        self.log("엑셀 파일 읽기 중...")
+        self.progress_var.set("엑셀 파일 읽기 중...")
+        self.progress_bar['value'] = 0
+        self.sync_btn.config(state=tk.DISABLED)
+        self.load_btn.config(text="읽기 취소")
+        
+        # 형식 오류/중복 송장번호는 전송 전에 제외 (파일 사이의 중복 포함)
+        self.excel_loader = InvoiceJobLoader(
+            excel_path,
+            default_sheet=self.config["excel"].get("sheet_name", "Sheet1"),
+            base_dir=Path(__file__).parent.parent,
+            carrier=self.config.get("validation", {}).get("carrier", "any")
+        )
+        self.excel_loader.start()
+        self.root.after(EXCEL_LOAD_POLL_INTERVAL_MS, self.poll_excel_load)
+    
+    def poll_excel_load(self):
+        """송장번호 파일 읽기 진행 상황 표시 (메인 스레드에서 주기적으로 실행)"""
+        loader = self.excel_loader
+        if loader is None:
+            return
         
-        if not Path(excel_path).exists():
-            messagebox.showerror("오류", "엑셀 파일을 찾을 수 없습니다.")
+        if not loader.done:
+            progress = loader.progress
+            if progress and not loader.cancelled:
+                if progress.stage == 'validate':
+                    self.progress_var.set(f"송장번호 검증 중... {progress.rows:,}건")
+                else:
+                    text = f"엑셀 파일 읽기 중... {progress.rows:,}건 ({progress.rows_per_second:,.0f}건/초)"
+                    if progress.sources_total > 1:
+                        text += f" - 파일 {progress.sources_done}/{progress.sources_total}"
+                    self.progress_var.set(text)
+                self.progress_bar['maximum'] = max(progress.sources_total, 1)
+                self.progress_bar['value'] = progress.sources_done
+            self.root.after(EXCEL_LOAD_POLL_INTERVAL_MS, self.poll_excel_load)
             return
         
+        self.excel_loader = None
+        self.load_btn.config(text="파일 업로드")
+        self.progress_bar['value'] = 0
+        # 취소 요청 후 읽기가 먼저 끝난 경우에도 결과를 버림 (초기화/다시 읽기 후 이전 결과가 덮어쓰지 않도록)
+        if loader.cancelled or isinstance(loader.error, JobCancelled):
+            self.log("엑셀 파일 읽기를 취소했습니다.")
+            self.progress_var.set("엑셀 파일 읽기 취소됨")
+            if self.loaded_invoices:
+                self.sync_btn.config(state=tk.NORMAL)
+            return
+        if loader.error is not None:
+            self.handle_excel_load_error(loader.error)
+            return
         try:
-            self.log("엑셀 파일 읽기 중...")
-            self.progress_var.set("엑셀 파일 읽기 중...")
-            self.root.update()
-            
-            reader = ExcelReader(
-                file_path=str(excel_path),
-                sheet_name=self.config["excel"].get("sheet_name", "Sheet1")
-            )
-            
-            self.loaded_invoices = reader.read_invoices()
-            total = len(self.loaded_invoices)
-            
-            if total == 0:
-                messagebox.showwarning("경고", "엑셀 파일에 송장번호가 없습니다.")
-                self.total_count_var.set("총 0건")
-                self.excel_listbox.delete(0, tk.END)
-                self.sync_btn.config(state=tk.DISABLED)
-                return
-            
-            # 리스트 박스에 표시
-            self.excel_listbox.delete(0, tk.END)
-            for idx, invoice in enumerate(self.loaded_invoices, 1):
-                self.excel_listbox.insert(tk.END, f"{idx}. {invoice}")
-            
-            # 총 건수 표시
-            self.total_count_var.set(f"총 {total}건")
-            
-            # 동기화 실행 버튼 활성화
-            self.sync_btn.config(state=tk.NORMAL)
-            
-            self.log(f"엑셀 파일 업로드 완료: {total}건")
-            self.progress_var.set(f"파일 업로드 완료: {total}건")
-            messagebox.showinfo("완료", f"엑셀 파일이 로드되었습니다.\n총 {total}건의 송장번호를 확인했습니다.")
-            
+            self.apply_invoice_job(loader.job, loader.sources)
         except Exception as e:
-            self.log(f"엑셀 파일 읽기 실패: {e}")
-            messagebox.showerror("오류", f"엑셀 파일을 읽을 수 없습니다:\n{e}")
+            self.handle_excel_load_error(e)
+    
+    def apply_invoice_job(self, job, sources):
+        """읽기가 끝난 송장번호 작업을 화면에 반영"""
+        total = len(job.invoices)
+        
+        for result in job.failed_sources:
+            self.log(f"⚠️ 읽기 실패: {result.source.label}: {result.error}")
+        if len(sources) > 1:
+            for result in job.sources:
+                if not result.error:
+                    self.log(f"  {result.source.label}: {result.count}건")
+        if job.rejected:
+            self.log(f"제외된 송장번호 {len(job.rejected)}건 (중복 {job.duplicate_count}건):")
+            for line in describe_rejected(job):
+                self.log(f"  {line}")
+        
+        if total == 0:
+            if job.failed_sources and len(job.failed_sources) == len(sources):
+                raise RuntimeError(job.failed_sources[0].error)
+            self.loaded_invoices = []
+            self.loaded_job = None
+            self.rejected_invoices = job.rejected
+            if job.rejected:
+                messagebox.showwarning("경고", f"전송할 수 있는 송장번호가 없습니다.\n{len(job.rejected)}건이 모두 제외되었습니다. 로그를 확인하세요.")
+            else:
+                messagebox.showwarning("경고", "엑셀 파일에 송장번호가 없습니다.")
             self.total_count_var.set("총 0건")
-            self.excel_listbox.delete(0, tk.END)
+            self.progress_var.set("대기 중...")
+            self.invoice_preview.clear()
             self.sync_btn.config(state=tk.DISABLED)
+            return
+        
+        self.loaded_invoices = job.invoices
+        self.loaded_job = job
+        self.rejected_invoices = job.rejected
+        
+        # 미리보기 목록에 표시 (보이는 행만 그림)
+        self.invoice_preview.set_items(self.loaded_invoices)
+        
+        # 총 건수 표시
+        self.total_count_var.set(f"총 {total}건")
+        
+        # 동기화 실행 버튼 활성화
+        self.sync_btn.config(state=tk.NORMAL)
+        
+        self.log(f"엑셀 파일 업로드 완료: {total}건 ({job.elapsed:.1f}초)")
+        self.progress_var.set(f"파일 업로드 완료: {total}건")
+        message = f"엑셀 파일이 로드되었습니다.\n총 {total}건의 송장번호를 확인했습니다."
+        if len(sources) > 1:
+            message += f"\n(파일/시트 {len(sources)}개)"
+        if job.rejected:
+            message += (f"\n\n제외: {len(job.rejected)}건 (중복 {job.duplicate_count}건, 형식 오류 "
+                        f"{len(job.rejected) - job.duplicate_count}건)\n자세한 내용은 로그를 확인하세요.")
+        if job.failed_sources:
+            message += f"\n\n읽기 실패: {', '.join(result.source.label for result in job.failed_sources)}"
+        messagebox.showinfo("완료", message)
+    
+    def handle_excel_load_error(self, error: Exception):
+        """송장번호 파일 읽기 실패 표시"""
+        self.log(f"엑셀 파일 읽기 실패: {error}")
+        self.progress_var.set("엑셀 파일 읽기 실패")
+        if isinstance(error, FileNotFoundError):
+            messagebox.showerror("오류", f"엑셀 파일을 찾을 수 없습니다.\n{error}")
+        else:
+            messagebox.showerror("오류", f"엑셀 파일을 읽을 수 없습니다:\n{error}")
+        self.loaded_invoices = []
+        self.loaded_job = None
+        self.total_count_var.set("총 0건")
+        self.invoice_preview.clear()
+        self.sync_btn.config(state=tk.DISABLED)
+    
+    def search_preview(self):
+        """미리보기 목록에서 송장번호 검색 (선택한 행 다음부터)"""
+        text = self.preview_search_var.get().strip()
+        if not text or not self.loaded_invoices:
+            return
+        index = self.invoice_preview.search(text)
+        if index is None:
+            messagebox.showinfo("검색", f"'{text}'을(를) 찾을 수 없습니다.")
+    
+    def jump_preview(self):
+        """미리보기 목록에서 입력한 번호로 이동 (1부터)"""
+        text = self.preview_search_var.get().strip()
+        if not text.isdigit() or not self.loaded_invoices:
+            messagebox.showwarning("경고", "이동할 번호를 입력하세요.")
+            return
+        self.invoice_preview.jump_to(int(text) - 1)
     
     def save_settings(self):
         """설정 저장"""
         self.config["serial"]["port"] = self.port_var.get()
-        self.config["delays"]["min_between"] = float(self.min_delay_var.get())
-        self.config["delays"]["max_between"] = float(self.max_delay_var.get())
+        if self.adaptive_delay_inputs:
+            flow_control = self.config.setdefault("flow_control", dict(DEFAULT_FLOW_CONTROL))
+            flow_control["adaptive_min_delay"] = float(self.min_delay_var.get())
+            flow_control["adaptive_max_delay"] = float(self.max_delay_var.get())
+        else:
+            self.config["delays"]["min_between"] = float(self.min_delay_var.get())
+            self.config["delays"]["max_between"] = float(self.max_delay_var.get())
         self.config["excel"]["file_path"] = self.excel_path_var.get()
         # 컬럼명은 기본값 사용 (설정에서 변경 불가)
         
@@ -987,11 +1188,105 @@ class HanjinAutomationApp:
         self.log("설정 저장 완료")
     
     def log(self, message):
-        """로그 메시지 추가"""
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """로그 메시지 추가 (어느 스레드에서나 호출 가능, 화면 반영은 process_ui_events에서)"""
+        self.ui_bus.log(message)
+    
+    def set_progress(self, text=None, value=None, maximum=None):
+        """진행 상황 변경 (어느 스레드에서나 호출 가능, 마지막 값만 화면에 반영)"""
+        self.ui_bus.progress(text, value, maximum)
+    
+    def run_on_main(self, func, *args, **kwargs):
+        """메인 스레드에서 실행 (작업 스레드의 메시지 상자, 버튼 상태 변경 등)"""
+        self.ui_bus.call(func, *args, **kwargs)
+    
+    def ask_on_main(self, func, *args, **kwargs):
+        """메인 스레드에서 실행하고 결과를 기다림 (작업 스레드의 확인 메시지 상자 등)"""
+        done = threading.Event()
+        result = {}
+        
+        def call():
+            try:
+                result['value'] = func(*args, **kwargs)
+            finally:
+                done.set()
+        
+        self.run_on_main(call)
+        done.wait()
+        return result.get('value')
+    
+    def process_ui_events(self):
+        """쌓인 로그/진행 상황/작업을 한 번에 화면에 반영 (메인 스레드에서 주기적으로 실행)"""
+        try:
+            append_log_lines(self.log_text, self.ui_bus.drain_lines(), MAX_LOG_LINES)
+            
+            state = self.ui_bus.drain_progress()
+            if state is not None:
+                if state.text is not None:
+                    self.progress_var.set(state.text)
+                if state.maximum is not None:
+                    self.progress_bar['maximum'] = state.maximum
+                if state.value is not None:
+                    self.progress_bar['value'] = state.value
+            
+            # 다음 반영을 먼저 예약 (메시지 상자가 떠 있는 동안에도 로그는 계속 표시)
+            self.root.after(UI_EVENT_POLL_INTERVAL_MS, self.process_ui_events)
+        except tk.TclError:
+            return  # 창 종료
+        
+        for func, args, kwargs in self.ui_bus.drain_calls():
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                self.log(f"화면 갱신 오류: {e}")
+    
+    def process_session_events(self):
+        """세션 관리 스레드 결과 반영 (메인 스레드에서 주기적으로 실행)"""
+        for event in self.session_manager.poll_events():
+            if event.kind == 'version':
+                if not self.handle_version_result(event.success, event.message, event.data):
+                    return  # 강제 업데이트로 프로그램 종료
+            elif event.kind == 'user_info':
+                self.handle_user_info_refresh(event.success, event.data)
+            elif event.kind == 'license':
+                self.handle_license_result(event.success, event.message)
+        self.root.after(SESSION_POLL_INTERVAL_MS, self.process_session_events)
+    
+    def handle_license_result(self, valid, message):
+        """라이선스 확인/임대 갱신 결과 반영 (유효하지 않으면 작업 시작 차단)"""
+        previous = self.license_valid
+        self.license_valid = valid
+        if valid:
+            if previous is False:
+                self.log("✓ 라이선스가 다시 확인되었습니다.")
+            return
+        self.log(f"❌ 라이선스 확인 실패: {message}")
+        if previous is not False:
+            messagebox.showwarning(
+                "라이선스",
+                f"라이선스를 확인할 수 없습니다:\n{message}\n\n라이선스가 확인될 때까지 작업을 시작할 수 없습니다."
+            )
+    
+    def handle_user_info_refresh(self, success, user_info):
+        """주기적으로 조회한 사용자 정보 반영 (만료일이 바뀌면 다시 안내)"""
+        if not success or not user_info or not self.current_user_info:
+            return
+        previous_expiry = self.current_user_info.get('expiry_date')
+        self.current_user_info.update(user_info)
+        if user_info.get('expiry_date') and user_info.get('expiry_date') != previous_expiry:
+            self.log(f"사용 기간이 변경되었습니다: {str(user_info.get('expiry_date'))[:10]}")
+            self.check_expiry_and_notify()
+    
+    def log_server_latency(self, path, elapsed_ms, status):
+        """서버 요청 응답 시간 로그"""
+        status_text = status if status is not None else "응답 없음"
+        self.log(f"🌐 서버 {path} {elapsed_ms:.0f}ms ({status_text})")
+    
+    def on_usage_uploaded(self, accepted_count, remaining_count):
+        """보관함 사용 통계 전송 결과 로그 (전송 스레드에서 호출)"""
+        message = f"사용 통계 전송 완료 ({accepted_count}건)"
+        if remaining_count:
+            message += f", 전송 대기 {remaining_count}건"
+        self.log(message)
     
     def start_automation(self):
         """동기화 실행 (자동화 시작)"""
@@ -999,34 +1294,16 @@ class HanjinAutomationApp:
             messagebox.showerror("오류", "로그인이 필요합니다.")
             return
         
-        # MAC 주소 검증 (선택사항 - 사용자가 취소하면 계속 진행)
-        # AI BOT에서 MAC 주소 자동 확인이 어려우므로, 검증 실패 시에도 진행 가능하도록 변경
-        try:
-            if not self.verify_mac_address_optional():
-                # 사용자가 취소하지 않았고 검증이 실패한 경우만 중단
-                return
-        except:
-            # 검증 중 오류 발생 시에도 계속 진행 (자동화가 멈추지 않도록)
-            self.log("MAC 주소 검증 중 오류 발생, 계속 진행합니다.")
-        
-        # 사용자 정보 검증 (필수 - 작업규칙: 1인 1아이디 정책)
-        # PC 프로그램 로그인 사용자와 블루투스 기기에 등록된 사용자 정보가 일치해야만 작동
-        try:
-            if not self.verify_token_owner():
-                # 사용자 정보가 일치하지 않으면 작업 차단
-                self.log("❌ 사용자 정보 검증 실패로 작업이 중단되었습니다.")
-                return
-        except Exception as e:
-            # 검증 중 오류 발생 시 작업 차단 (보안을 위해)
-            self.log(f"⚠️ 사용자 정보 검증 중 오류 발생: {e}")
-            if not messagebox.askyesno("확인", f"사용자 정보 확인 중 오류가 발생했습니다:\n{e}\n\n보안상의 이유로 작업을 중단하는 것을 권장합니다.\n\n계속 진행하시겠습니까?"):
-                return
+        if self.license_manager and self.license_valid is False:
+            messagebox.showerror("오류", "라이선스가 유효하지 않아 작업을 시작할 수 없습니다.")
+            return
         
         if self.is_running:
             return
         
         # 유효성 검사
-        if not self.port_var.get():
+        port = self.port_var.get()
+        if not port:
             messagebox.showerror("오류", "COM 포트를 선택하세요.")
             return
         
@@ -1041,14 +1318,48 @@ class HanjinAutomationApp:
         if not messagebox.askyesno("확인", f"동기화를 시작하시겠습니까?\n\n총 {len(self.loaded_invoices)}건의 송장번호를 모바일로 전송합니다.\n\n모바일 앱이 준비되어 있어야 합니다."):
             return
         
-        # 스레드에서 실행
+        # 작업 전 확인(기기 연결, 서버 요청)과 자동화는 스레드에서 실행 (화면이 멈추지 않도록)
         self.is_running = True
         self.sync_btn.config(state=tk.DISABLED)
         self.stop_btn.config(state=tk.NORMAL)
         
-        thread = threading.Thread(target=self.run_automation, daemon=True)
+        thread = threading.Thread(target=self.run_checked_automation, args=(port,), daemon=True)
         thread.start()
     
+    def run_checked_automation(self, port):
+        """작업 전 확인 후 자동화 실행 (별도 스레드)"""
+        if not self.run_pre_checks(port) or not self.is_running:
+            # 확인 실패 또는 확인 중 중지 요청
+            self.run_on_main(self.automation_finished)
+            return
+        self.run_automation()
+    
+    def run_pre_checks(self, port) -> bool:
+        """작업 전 MAC 주소, 기기 사용자 정보 확인 (별도 스레드, 통과하면 True)"""
+        # MAC 주소 검증 (선택사항 - 사용자가 취소하면 계속 진행)
+        # AI BOT에서 MAC 주소 자동 확인이 어려우므로, 검증 실패 시에도 진행 가능하도록 변경
+        try:
+            if not self.verify_mac_address_optional(port):
+                # 사용자가 취소하지 않았고 검증이 실패한 경우만 중단
+                return False
+        except:
+            # 검증 중 오류 발생 시에도 계속 진행 (자동화가 멈추지 않도록)
+            self.log("MAC 주소 검증 중 오류 발생, 계속 진행합니다.")
+        
+        # 사용자 정보 검증 (필수 - 작업규칙: 1인 1아이디 정책)
+        # PC 프로그램 로그인 사용자와 블루투스 기기에 등록된 사용자 정보가 일치해야만 작동
+        try:
+            if not self.verify_token_owner(port):
+                # 사용자 정보가 일치하지 않으면 작업 차단
+                self.log("❌ 사용자 정보 검증 실패로 작업이 중단되었습니다.")
+                return False
+        except Exception as e:
+            # 검증 중 오류 발생 시 작업 차단 (보안을 위해)
+            self.log(f"⚠️ 사용자 정보 검증 중 오류 발생: {e}")
+            if not self.ask_on_main(messagebox.askyesno, "확인", f"사용자 정보 확인 중 오류가 발생했습니다:\n{e}\n\n보안상의 이유로 작업을 중단하는 것을 권장합니다.\n\n계속 진행하시겠습니까?"):
+                return False
+        return True
+    
     def stop_automation(self):
         """자동화 중지"""
         self.is_running = False
@@ -1059,80 +1370,104 @@ class HanjinAutomationApp:
         try:
             # BLT AI 로봇 연결
             self.log("BLT AI 로봇 연결 중...")
-            self.progress_var.set("BLT AI 로봇 연결 중...")
+            self.set_progress("BLT AI 로봇 연결 중...")
             
             port = self.port_var.get()
             controller = BluetoothController(port=port, baudrate=115200)
             
             if not controller.connect():
                 self.log("BLT AI 로봇 연결 실패!")
-                messagebox.showerror("오류", "BLT AI 로봇 연결에 실패했습니다.")
-                self.automation_finished()
+                self.run_on_main(messagebox.showerror, "오류", "BLT AI 로봇 연결에 실패했습니다.")
                 return
             
             self.log("BLT AI 로봇 연결 성공!")
             self.controller = controller
             
             # AI BOT 시리얼 메시지 모니터링 시작
-            controller.start_serial_monitoring(log_callback=lambda msg: self.log(msg))
+            controller.start_serial_monitoring(log_callback=self.log)
             
             # 이미 로드된 엑셀 데이터 사용
             invoices = self.loaded_invoices
+            job = self.loaded_job
             total = len(invoices)
             
             if total == 0:
                 self.log("송장번호가 없습니다!")
-                messagebox.showerror("오류", "송장번호가 없습니다.")
-                self.automation_finished()
+                self.run_on_main(messagebox.showerror, "오류", "송장번호가 없습니다.")
                 return
             
             self.log(f"총 {total}건의 송장번호를 전송합니다.")
             
             # 자동화 실행
             self.log("자동화 시작...")
-            self.progress_bar['maximum'] = total
-            self.progress_bar['value'] = 0
+            self.set_progress(value=0, maximum=total)
             
             success_count = 0
             fail_count = 0
             
-            import random
+            # 입력 완료 응답을 받은 뒤 다음 송장번호 전송 (응답 없는 펌웨어는 고정 딜레이)
+            min_delay, max_delay = float(self.min_delay_var.get()), float(self.max_delay_var.get())
+            if self.adaptive_delay_inputs:
+                delay_range = {"adaptive_min_delay": min_delay, "adaptive_max_delay": max_delay}
+            else:
+                delay_range = {"min_delay": min_delay, "max_delay": max_delay}
+            sender = InvoiceSender.from_config(
+                controller,
+                self.config,
+                **delay_range,
+                log=self.log,
+                should_continue=lambda: self.is_running
+            )
+            if sender.mode == PACING_ACK:
+                self.log("전송 방식: 입력 완료 응답 확인")
+            elif sender.mode == PACING_ADAPTIVE:
+                self.log(f"전송 방식: 자동 간격 조절 (시작 간격 {sender.pacer.delay:.2f}초, "
+                         f"범위 {sender.pacer.min_delay:g}~{sender.pacer.max_delay:g}초)")
             
             for idx, invoice in enumerate(invoices, 1):
                 if not self.is_running:
                     self.log("사용자에 의해 중지되었습니다.")
                     break
                 
-                self.progress_var.set(f"처리 중: {idx}/{total} - {invoice}")
-                self.progress_bar['value'] = idx
+                self.set_progress(f"처리 중: {idx}/{total} - {invoice}", value=idx)
+                self.invoice_preview.set_current(idx - 1)
                 
-                if controller.send_text(invoice):
+                result = sender.send(invoice)
+                if result.success:
                     success_count += 1
-                    self.log(f"[{idx}/{total}] 성공: {invoice}")
+                    if result.status == 'ack':
+                        self.log(f"[{idx}/{total}] 성공: {invoice} ({result.elapsed:.1f}초)")
+                    else:
+                        self.log(f"[{idx}/{total}] 성공: {invoice}")
                 else:
                     fail_count += 1
-                    self.log(f"[{idx}/{total}] 실패: {invoice}")
-                
-                # 딜레이
-                if idx < total:
-                    delay_min = float(self.min_delay_var.get())
-                    delay_max = float(self.max_delay_var.get())
-                    delay = random.uniform(delay_min, delay_max)
-                    time.sleep(delay)
+                    if job is not None and job.invoices is invoices:
+                        origin = job.origin(idx - 1)
+                        self.log(f"[{idx}/{total}] 실패: {invoice} ({origin.source.label} {origin.row}행)")
+                    else:
+                        self.log(f"[{idx}/{total}] 실패: {invoice}")
+                    if result.status == 'ignored':
+                        self.log("⚠️ AI BOT이 입력을 거부했습니다. 모바일 앱 인증/연결 상태를 확인하세요.")
+                    elif result.status == 'unknown':
+                        self.log("⚠️ AI BOT이 받았지만 입력 완료 응답이 없습니다. 중복 입력을 막기 위해 다시 보내지 않았으니 모바일에서 입력 여부를 확인하세요.")
+            
+            # 기기별 전송 간격 기록 (다음 실행에서 이어서 사용)
+            pacing_summary = sender.finish()
+            if pacing_summary:
+                self.log(f"자동 간격 조절 결과: {pacing_summary}")
             
             # 완료
             self.log(f"\n처리 완료! 성공: {success_count}건, 실패: {fail_count}건")
-            self.progress_var.set(f"완료! 성공: {success_count}건, 실패: {fail_count}건")
-            messagebox.showinfo("완료", f"처리 완료!\n성공: {success_count}건\n실패: {fail_count}건")
+            self.set_progress(f"완료! 성공: {success_count}건, 실패: {fail_count}건")
+            self.run_on_main(messagebox.showinfo, "완료", f"처리 완료!\n성공: {success_count}건\n실패: {fail_count}건")
             
-            # 사용 통계 서버에 전송
+            # 사용 통계를 보관함에 기록 (서버 전송은 백그라운드에서, 연결 실패 시 나중에 재전송)
             try:
-                self.log("사용 통계 전송 중...")
                 # MAC 주소 조회 제거 (GET_CONNECTED_MAC 명령이 송장번호 입력 필드에 들어가는 것을 방지)
                 mac_address = None
                 
                 hardware_id = get_hardware_id()
-                success, msg = self.user_auth_manager.record_usage(
+                self.usage_spool.append(
                     user_id=self.current_user_id,
                     total_invoices=total,
                     success_count=success_count,
@@ -1140,20 +1475,18 @@ class HanjinAutomationApp:
                     mac_address=mac_address,
                     hardware_id=hardware_id
                 )
-                if success:
-                    self.log("사용 통계 전송 완료")
-                else:
-                    self.log(f"통계 전송 실패: {msg}")
+                self.usage_uploader.wake()
+                self.log("사용 통계 저장 (백그라운드 전송)")
             except Exception as stat_error:
-                self.log(f"통계 전송 오류: {stat_error}")
+                self.log(f"통계 저장 오류: {stat_error}")
             
         except Exception as e:
             self.log(f"오류 발생: {e}")
-            messagebox.showerror("오류", f"오류가 발생했습니다:\n{e}")
+            self.run_on_main(messagebox.showerror, "오류", f"오류가 발생했습니다:\n{e}")
         finally:
             if self.controller:
                 self.controller.disconnect()
-            self.automation_finished()
+            self.run_on_main(self.automation_finished)
     
     def start_auto_logout_timer(self):
         """1시간 후 자동 로그아웃 타이머 시작"""
@@ -1194,6 +1527,7 @@ class HanjinAutomationApp:
         self.user_auth_manager.clear_session()
         self.current_user_id = None
         self.current_user_info = None
+        self.session_manager.set_user(None)
         
         # 자동 로그아웃이 아닌 경우에만 메시지 표시
         if "세션이 만료" not in message:
@@ -1207,6 +1541,7 @@ class HanjinAutomationApp:
         if not self.show_login():
             self.root.quit()
             return
+        self.session_manager.set_user(self.current_user_id)
         
         # GUI 다시 생성
         self.create_widgets()
@@ -1664,6 +1999,20 @@ class HanjinAutomationApp:
         # 세션 삭제
         self.user_auth_manager.clear_session()
         
+        # 응답 시간 로그 해제 (창 삭제 후 호출 방지)
+        remove_latency_listener(self.log_server_latency)
+        
+        # 세션 관리 스레드 종료
+        self.session_manager.stop()
+        
+        # 송장번호 파일 읽기 취소
+        if self.excel_loader:
+            self.excel_loader.cancel()
+        
+        # 사용 통계 전송 중지 (남은 기록은 다음 실행 때 전송)
+        self.usage_uploader.on_result = None
+        self.usage_uploader.stop(timeout=2)
+        
         # AI BOT 연결 종료
         if self.controller:
             self.controller.disconnect()
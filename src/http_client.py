@@ -0,0 +1,170 @@
+"""
+HTTP 클라이언트 모듈
+서버 통신용 공용 세션 (연결 재사용, 재시도, 응답 시간 기록)
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# 클라이언트 제한 시간을 서버에 전달 (시간이 지나면 서버도 처리를 중단)
+REQUEST_TIMEOUT_HEADER = 'X-Request-Timeout'
+
+# 연결 풀 크기 (호스트 수 / 호스트별 연결 수)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+# 재시도 (post_json에서 직접 처리 - 재시도를 포함한 전체 시간이 timeout을 넘지 않음)
+# 조회성(멱등) 요청: 연결 실패, 응답 중 끊김/시간 초과, 일시적 서버 오류
+# 그 외 요청: 요청을 보내기 전 연결 실패만 (서버에 중복 반영되지 않음)
+# 429(요청 한도 초과)와 서버 제한 시간 초과 503은 재시도하지 않음 (다시 보내도 같은 결과)
+IDEMPOTENT_MAX_ATTEMPTS = 3
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_STATUSES = (502, 503, 504)
+RETRY_BACKOFF = 0.5             # 재시도 전 대기 (초, 재시도할 때마다 2배)
+MIN_ATTEMPT_TIMEOUT = 1.0       # 남은 시간이 이보다 짧으면 재시도하지 않음 (초)
+# 서버가 요청 제한 시간 초과로 처리를 취소한 503 응답 표시 (server/license_server.py와 동일)
+DEADLINE_EXCEEDED_HEADER = 'X-Deadline-Exceeded'
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_latency_listeners: List[Callable[[str, float, Optional[int]], None]] = []
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # 재시도는 post_json에서 남은 시간 안에서만 실행
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=Retry(total=0, raise_on_status=False)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """공용 세션 반환 (프로세스 전체에서 공유, keep-alive로 연결 재사용)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def add_latency_listener(callback: Callable[[str, float, Optional[int]], None]):
+    """
+    요청별 응답 시간 알림 등록
+
+    Args:
+        callback: callback(API 경로, 소요 시간(ms), HTTP 상태 코드 - 실패 시 None)
+    """
+    if callback not in _latency_listeners:
+        _latency_listeners.append(callback)
+
+
+def remove_latency_listener(callback: Callable[[str, float, Optional[int]], None]):
+    """응답 시간 알림 해제"""
+    if callback in _latency_listeners:
+        _latency_listeners.remove(callback)
+
+
+def _notify_latency(url: str, elapsed_ms: float, status: Optional[int]):
+    path = urlparse(url).path
+    logger.debug(f"서버 응답 {path}: {elapsed_ms:.0f}ms ({status})")
+    for callback in list(_latency_listeners):
+        try:
+            callback(path, elapsed_ms, status)
+        except Exception as e:
+            logger.debug(f"응답 시간 알림 오류: {e}")
+
+
+def _request_not_sent(error: requests.exceptions.RequestException) -> bool:
+    """연결 단계에서 실패해 요청이 서버에 전달되지 않았는지"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _retry_wait(response: Optional[requests.Response], attempt: int) -> float:
+    """재시도 전 대기 시간 (서버의 Retry-After가 있으면 사용)"""
+    if response is not None:
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', '')))
+        except ValueError:
+            pass
+    return RETRY_BACKOFF * (2 ** (attempt - 1))
+
+
+def post_json(url: str, json: Optional[Dict] = None, timeout: float = 10, idempotent: bool = False) -> requests.Response:
+    """
+    JSON POST 요청 (공용 세션 사용)
+
+    재시도를 포함한 전체 시간이 timeout을 넘지 않도록, 시도마다 남은 시간을 제한 시간으로 사용
+
+    Args:
+        url: 요청 URL
+        json: 요청 데이터
+        timeout: 전체 제한 시간 (초) - 시도마다 남은 시간을 서버에도 X-Request-Timeout으로 전달
+        idempotent: 여러 번 보내도 결과가 같은 조회성 요청이면 True (일시적 오류 시 재시도)
+
+    Returns:
+        응답 객체 (연결 실패/시간 초과는 requests 예외 발생)
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    max_attempts = IDEMPOTENT_MAX_ATTEMPTS if idempotent else DEFAULT_MAX_ATTEMPTS
+    session = get_session()
+    status = None
+    try:
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - time.perf_counter()
+            response = status = None
+            try:
+                response = session.post(
+                    url,
+                    json=json,
+                    headers={REQUEST_TIMEOUT_HEADER: f"{remaining:.1f}"},
+                    timeout=remaining
+                )
+                status = response.status_code
+                retryable = (idempotent and status in RETRY_STATUSES
+                             and not response.headers.get(DEADLINE_EXCEEDED_HEADER))
+                if not retryable:
+                    return response
+            except requests.exceptions.RequestException as e:
+                retryable = (idempotent and isinstance(e, (requests.exceptions.ConnectionError,
+                                                           requests.exceptions.Timeout))) \
+                    or _request_not_sent(e)
+                if not retryable or attempt >= max_attempts:
+                    raise
+                error = e
+
+            wait = _retry_wait(response, attempt)
+            if attempt >= max_attempts or deadline - time.perf_counter() - wait < MIN_ATTEMPT_TIMEOUT:
+                # 남은 시간 안에 다시 시도할 수 없음 - 마지막 결과 반환
+                if response is not None:
+                    return response
+                raise error
+            if response is not None:
+                response.close()
+            logger.debug(f"서버 요청 재시도 ({attempt}/{max_attempts - 1}): {url}")
+            time.sleep(wait)
+    finally:
+        _notify_latency(url, (time.perf_counter() - started) * 1000, status)
@@ -0,0 +1,279 @@
+"""
+송장번호 캐시 모듈
+엑셀에서 읽은 송장번호 목록을 바이너리 파일로 저장해 두고,
+같은 파일을 다시 불러올 때 엑셀을 읽지 않고 바로 사용
+"""
+
+import os
+import sys
+import json
+import array
+import struct
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from excel_reader import ExcelReader
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent.parent / "config" / "invoice_cache"
+# 캐시 파일 형식 버전 (송장번호 변환 방식이 바뀌면 올려서 기존 캐시 무효화)
+# 2: 엑셀 행 번호 추가
+CACHE_FORMAT_VERSION = 2
+CACHE_MAGIC = b'INVC'
+# 헤더: 매직, 형식 버전, 송장번호 개수
+HEADER = struct.Struct('<4sII')
+# 캐시 보관 한도 (오래 사용하지 않은 파일부터 삭제)
+MAX_CACHE_ENTRIES = 20
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def file_content_hash(path: Path) -> str:
+    """파일 내용 해시 (BLAKE2b)"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_invoices(invoices: List[str], rows: Optional[Sequence[int]] = None) -> bytes:
+    """
+    송장번호 목록을 바이너리로 변환
+    헤더 + 끝 위치 배열(uint64, 개수만큼) + 행 번호 배열(uint32, 개수만큼) + UTF-8 문자열을 이어 붙인 데이터
+
+    Args:
+        rows: 송장번호별 엑셀 행 번호 (기본값: 1부터 차례로)
+    """
+    blobs = [invoice.encode('utf-8') for invoice in invoices]
+    offsets = array.array('Q')
+    position = 0
+    for blob in blobs:
+        position += len(blob)
+        offsets.append(position)
+    row_numbers = array.array('I', rows if rows is not None else range(1, len(blobs) + 1))
+    if len(row_numbers) != len(blobs):
+        raise ValueError("송장번호와 행 번호 개수가 다릅니다.")
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+        row_numbers.byteswap()
+    return (HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, len(blobs)) + offsets.tobytes()
+            + row_numbers.tobytes() + b''.join(blobs))
+
+
+def decode_invoices(data: bytes) -> Tuple[List[str], array.array]:
+    """encode_invoices() 데이터를 (송장번호 목록, 행 번호 배열)로 변환 (형식 오류 시 ValueError)"""
+    if len(data) < HEADER.size:
+        raise ValueError("캐시 파일이 손상되었습니다.")
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_FORMAT_VERSION:
+        raise ValueError("지원하지 않는 캐시 형식입니다.")
+    offsets = array.array('Q')
+    row_numbers = array.array('I')
+    offsets_end = HEADER.size + count * offsets.itemsize
+    rows_end = offsets_end + count * row_numbers.itemsize
+    if len(data) < rows_end:
+        raise ValueError("캐시 파일이 손상되었습니다.")
+    offsets.frombytes(data[HEADER.size:offsets_end])
+    row_numbers.frombytes(data[offsets_end:rows_end])
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+        row_numbers.byteswap()
+    blob = memoryview(data)[rows_end:]
+    if (offsets[-1] if count else 0) != len(blob):
+        raise ValueError("캐시 파일이 손상되었습니다.")
+    invoices = []
+    start = 0
+    for end in offsets:
+        invoices.append(str(blob[start:end], 'utf-8'))
+        start = end
+    return invoices, row_numbers
+
+
+class InvoiceCache:
+    """
+    송장번호 캐시 저장소
+
+    - 캐시 파일: (파일 내용 해시, 시트)별 바이너리 파일
+    - index.json: 파일 경로별 (수정 시각, 크기, 내용 해시) - 바뀌지 않은 파일은 해시도 다시 계산하지 않음
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_entries: int = MAX_CACHE_ENTRIES,
+                 max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / "index.json"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def load(self, file_path, sheet_name: str) -> Optional[Tuple[List[str], array.array]]:
+        """캐시된 (송장번호 목록, 행 번호 배열) (없거나 파일이 바뀌었으면 None)"""
+        path = Path(file_path).resolve()
+        # 해시 계산(파일 전체 읽기)은 잠금 밖에서 (다른 파일 읽기 스레드가 기다리지 않도록)
+        content_hash = self._content_hash(path, sheet_name)
+        cache_file = self._cache_file(content_hash, sheet_name)
+        with self._lock:
+            try:
+                with open(cache_file, 'rb') as f:
+                    invoices, row_numbers = decode_invoices(f.read())
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                logger.warning(f"송장번호 캐시 읽기 실패 (다시 읽음): {e}")
+                self._remove(cache_file)
+                return None
+            # 최근 사용 표시 (LRU 정리 기준)
+            try:
+                os.utime(cache_file)
+            except OSError:
+                pass
+        logger.info(f"송장번호 캐시 사용: {path.name} ({len(invoices)}건)")
+        return invoices, row_numbers
+
+    def store(self, file_path, sheet_name: str, invoices: List[str], rows: Optional[Sequence[int]] = None):
+        """송장번호 목록과 행 번호 저장 (저장 실패는 무시)"""
+        path = Path(file_path).resolve()
+        try:
+            content_hash = self._content_hash(path, sheet_name)
+            cache_file = self._cache_file(content_hash, sheet_name)
+            with self._lock:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                temp_file = cache_file.with_suffix('.tmp')
+                with open(temp_file, 'wb') as f:
+                    f.write(encode_invoices(invoices, rows))
+                os.replace(temp_file, cache_file)
+                self._evict(keep=cache_file)
+        except OSError as e:
+            logger.warning(f"송장번호 캐시 저장 실패: {e}")
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            if not self.cache_dir.exists():
+                return
+            for entry in self.cache_dir.iterdir():
+                self._remove(entry)
+
+    def _cache_file(self, content_hash: str, sheet_name: str) -> Path:
+        key = hashlib.blake2b(f"{content_hash}\0{sheet_name}".encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}.inv"
+
+    def _content_hash(self, path: Path, sheet_name: str) -> str:
+        # 경로, 수정 시각, 크기가 같으면 저장해 둔 해시 사용 (파일을 다시 읽지 않음)
+        # 목록 읽기/쓰기만 잠그고 해시 계산은 잠금 밖에서 실행
+        stat = path.stat()
+        index_key = f"{path}\0{sheet_name}"
+        with self._lock:
+            entry = self._read_index().get(index_key)
+        if entry and entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+            return entry['hash']
+
+        content_hash = file_content_hash(path)
+        with self._lock:
+            index = self._read_index()
+            index[index_key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': content_hash}
+            # 목록이 커지지 않도록 최근 항목만 유지
+            if len(index) > self.max_entries * 4:
+                index = dict(list(index.items())[-self.max_entries * 2:])
+            self._write_index(index)
+        return content_hash
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict]):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = self.index_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except OSError as e:
+            logger.warning(f"송장번호 캐시 목록 저장 실패: {e}")
+
+    def _evict(self, keep: Path):
+        # 오래 사용하지 않은 캐시 파일부터 삭제 (개수/용량 한도)
+        entries = []
+        for cache_file in self.cache_dir.glob("*.inv"):
+            try:
+                stat = cache_file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, cache_file))
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+
+        total_bytes = 0
+        for position, (_, size, cache_file) in enumerate(entries):
+            total_bytes += size
+            if cache_file != keep and (position >= self.max_entries or total_bytes > self.max_bytes):
+                self._remove(cache_file)
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+_default_cache: Optional[InvoiceCache] = None
+
+
+def get_invoice_cache() -> InvoiceCache:
+    """기본 캐시 저장소 (config/invoice_cache)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = InvoiceCache()
+    return _default_cache
+
+
+class CachedExcelReader(ExcelReader):
+    """캐시를 사용하는 엑셀 송장번호 읽기 (파일이 바뀌지 않았으면 엑셀을 읽지 않음)"""
+
+    def __init__(self, file_path: str, sheet_name: str = "Sheet1", read_only: bool = True,
+                 cache: Optional[InvoiceCache] = None):
+        super().__init__(file_path, sheet_name, read_only)
+        self.cache = cache or get_invoice_cache()
+        self._loaded: Optional[Tuple[List[str], array.array]] = None
+
+    def read_invoices(self, limit: Optional[int] = None, offset: int = 0,
+                      progress: Optional[Callable[[int], None]] = None) -> List[str]:
+        invoices, _ = self._load_all(progress)
+        end = offset + limit if limit is not None else None
+        return invoices[offset:end]
+
+    def read_invoice_rows(self, progress: Optional[Callable[[int], None]] = None) -> Tuple[List[str], array.array]:
+        return self._load_all(progress)
+
+    def validate_data(self) -> bool:
+        if self._loaded is None and self.file_path.exists():
+            self._loaded = self.cache.load(self.file_path, self.sheet_name)
+        if self._loaded is not None:
+            if not self._loaded[0]:
+                logger.warning("읽은 송장번호가 없습니다.")
+            return bool(self._loaded[0])
+        return super().validate_data()
+
+    def _load_all(self, progress: Optional[Callable[[int], None]] = None) -> Tuple[List[str], array.array]:
+        if self._loaded is not None:
+            if progress:
+                progress(len(self._loaded[0]))
+            return self._loaded
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"엑셀 파일을 찾을 수 없습니다: {self.file_path}")
+
+        loaded = self.cache.load(self.file_path, self.sheet_name)
+        if loaded is None:
+            loaded = super().read_invoice_rows(progress=progress)
+            self.cache.store(self.file_path, self.sheet_name, *loaded)
+        elif progress:
+            progress(len(loaded[0]))
+        self._loaded = loaded
+        return loaded
@@ -0,0 +1,368 @@
+"""
+송장번호 작업 구성 모듈
+여러 파일/시트/폴더를 읽어 하나의 송장번호 목록(원래 순서, 중복 제거)으로 합치고
+송장번호마다 어느 파일/시트에서 읽었는지 기록
+
+입력 형식 (세미콜론으로 여러 개 지정):
+    C:/data/a.xlsx              엑셀 기본 시트 (settings.json의 excel.sheet_name)
+    C:/data/a.xlsx#Sheet2       지정한 시트
+    C:/data/a.xlsx#*            모든 시트
+    C:/data/invoices            폴더 안의 지원 형식 파일 전체 (파일 이름순, 하위 폴더 제외)
+"""
+
+import os
+import time
+import array
+import threading
+from itertools import compress, repeat
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from invoice_sources import INVOICE_READERS, create_invoice_reader
+from invoice_validation import RejectedInvoice, validate_invoices
+
+logger = logging.getLogger(__name__)
+
+# 경로 구분자 (여러 파일), 시트 구분자
+PATH_SEPARATOR = ';'
+SHEET_SEPARATOR = '#'
+ALL_SHEETS = '*'
+# 읽기 스레드 수 (디스크 읽기, 캐시 해시 계산, 텍스트 파일 읽기가 겹치도록 -
+# 엑셀 XML 해석(openpyxl)은 GIL을 잡고 있으므로 스레드를 늘려도 빨라지지 않음)
+MAX_READ_WORKERS = min(4, (os.cpu_count() or 1) + 1)
+
+
+class JobCancelled(Exception):
+    """작업 구성 취소"""
+
+
+class JobProgress(NamedTuple):
+    """작업 구성 진행 상황"""
+    rows: int               # 지금까지 읽은 송장번호 수 (전체 파일/시트 합계)
+    sources_done: int       # 다 읽은 파일/시트 수
+    sources_total: int
+    elapsed: float          # 시작 후 지난 시간 (초)
+    stage: str = 'read'     # 'read': 파일 읽기, 'validate': 검증/중복 제거
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class InvoiceSource(NamedTuple):
+    """읽을 파일과 시트"""
+    file_path: Path
+    sheet_name: str
+
+    @property
+    def label(self) -> str:
+        """표시용 이름 (파일 이름, 엑셀은 시트 포함)"""
+        if self.file_path.suffix.lower() in ('.xlsx', '.xlsm'):
+            return f"{self.file_path.name}#{self.sheet_name}"
+        return self.file_path.name
+
+
+class InvoiceOrigin(NamedTuple):
+    """송장번호 출처"""
+    source: InvoiceSource
+    row: int                # 해당 파일/시트의 행 번호 (엑셀 행, 텍스트 줄 - 1부터, 빈 행도 셈)
+
+
+class SourceResult(NamedTuple):
+    """파일/시트별 읽기 결과"""
+    source: InvoiceSource
+    count: int              # 읽은 송장번호 수
+    error: Optional[str]    # 읽기 실패 시 오류 내용
+
+
+class InvoiceJob(NamedTuple):
+    """
+    작업 구성 결과
+
+    출처는 송장번호마다 객체를 만들지 않고 (파일/시트 번호, 행 번호) 배열로 보관 (origin()으로 조회)
+    """
+    invoices: List[str]             # 전송할 송장번호 (파일 순서 → 파일 안 순서, 중복 제거)
+    source_ids: array.array         # invoices와 같은 순서의 sources 번호
+    rows: array.array               # invoices와 같은 순서의 파일/시트 행 번호 (1부터)
+    rejected: List[RejectedInvoice] # 제외된 송장번호 (position은 합친 목록 기준, row는 파일/시트 행 번호)
+    rejected_origins: List[InvoiceOrigin]
+    sources: List[SourceResult]
+    elapsed: float                  # 읽기 + 검증 시간 (초)
+
+    def origin(self, position: int) -> InvoiceOrigin:
+        """invoices[position]의 출처"""
+        return InvoiceOrigin(self.sources[self.source_ids[position]].source, self.rows[position])
+
+    @property
+    def failed_sources(self) -> List[SourceResult]:
+        return [result for result in self.sources if result.error]
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(1 for item in self.rejected if item.duplicate_of is not None)
+
+
+def split_path_spec(spec: Union[str, Iterable[str], None]) -> List[str]:
+    """입력 문자열(세미콜론 구분) 또는 목록을 경로 목록으로 변환"""
+    if not spec:
+        return []
+    items = spec.split(PATH_SEPARATOR) if isinstance(spec, str) else list(spec)
+    return [item.strip().strip('"') for item in items if item and item.strip()]
+
+
+def list_excel_sheets(file_path: Path) -> List[str]:
+    """엑셀 시트 이름 목록"""
+    from openpyxl import load_workbook
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def expand_sources(spec: Union[str, Iterable[str], None], default_sheet: str = "Sheet1",
+                   base_dir: Optional[Path] = None) -> List[InvoiceSource]:
+    """
+    입력을 읽을 파일/시트 목록으로 변환 (같은 파일/시트는 한 번만)
+
+    Args:
+        spec: 경로 문자열(세미콜론 구분) 또는 경로 목록
+        default_sheet: 시트를 지정하지 않은 엑셀 파일의 시트
+        base_dir: 상대 경로 기준 폴더
+
+    Raises:
+        FileNotFoundError: 파일/폴더를 찾을 수 없을 때
+        ValueError: 지원하지 않는 형식이거나 폴더에 읽을 파일이 없을 때
+    """
+    def resolve(path_text: str) -> Path:
+        path = Path(path_text)
+        if not path.is_absolute() and base_dir is not None:
+            path = base_dir / path
+        return path
+
+    sources = []
+    for item in split_path_spec(spec):
+        # 이름에 #이 들어간 파일(a#b.xlsx)이 있으면 시트 구분자로 보지 않음
+        path = resolve(item)
+        sheet = None
+        if SHEET_SEPARATOR in item and not path.exists():
+            path_text, sheet = item.rsplit(SHEET_SEPARATOR, 1)
+            sheet = sheet.strip() or None
+            path = resolve(path_text)
+        if not path.exists():
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {path}")
+
+        if path.is_dir():
+            files = sorted(
+                (entry for entry in path.iterdir()
+                 if entry.is_file() and entry.suffix.lower() in INVOICE_READERS
+                 and not entry.name.startswith('~$')),      # 엑셀 임시 파일 제외
+                key=lambda entry: entry.name.lower()
+            )
+            if not files:
+                raise ValueError(f"폴더에 읽을 수 있는 파일이 없습니다: {path}")
+        else:
+            if path.suffix.lower() not in INVOICE_READERS:
+                supported = ', '.join(sorted(INVOICE_READERS))
+                raise ValueError(f"지원하지 않는 파일 형식입니다: {path.name} (지원 형식: {supported})")
+            files = [path]
+
+        for file_path in files:
+            if file_path.suffix.lower() in ('.xlsx', '.xlsm'):
+                if sheet == ALL_SHEETS:
+                    sheets = list_excel_sheets(file_path)
+                else:
+                    sheets = [sheet or default_sheet]
+            else:
+                sheets = [default_sheet]
+            for sheet_name in sheets:
+                source = InvoiceSource(file_path, sheet_name)
+                if source not in sources:
+                    sources.append(source)
+    return sources
+
+
+def read_source(source: InvoiceSource,
+                progress: Optional[Callable[[int], None]] = None) -> Tuple[List[str], array.array]:
+    """파일/시트 하나 읽기 (작업 스레드에서 실행, (송장번호 목록, 행 번호 배열) 반환)"""
+    reader = create_invoice_reader(str(source.file_path), sheet_name=source.sheet_name)
+    return reader.read_invoice_rows(progress=progress)
+
+
+def build_invoice_job(sources: List[InvoiceSource], carrier: Optional[str] = 'any',
+                      max_workers: int = MAX_READ_WORKERS,
+                      progress: Optional[Callable[[JobProgress], None]] = None,
+                      cancel_event: Optional[threading.Event] = None) -> InvoiceJob:
+    """
+    파일/시트를 읽어 하나의 작업으로 합치기
+
+    읽기는 스레드에서 겹쳐 진행하지만 결과는 입력 순서대로 합치므로 같은 입력이면 항상 같은 순서.
+    한 파일 읽기가 실패해도 나머지 파일은 사용 (실패 내용은 sources에 기록).
+
+    Args:
+        sources: expand_sources() 결과
+        carrier: 송장번호 검증 규칙 (invoice_validation.CARRIER_RULES)
+        max_workers: 읽기 스레드 수
+        progress: 진행 상황 콜백 (읽기 스레드에서 호출됨)
+        cancel_event: 설정되면 읽기를 멈추고 JobCancelled 발생
+
+    Raises:
+        JobCancelled: cancel_event가 설정되었을 때
+    """
+    started = time.monotonic()
+    results: List[SourceResult] = []
+    values: List[str] = []
+    source_ids = array.array('I')
+    rows = array.array('I')
+
+    # 파일/시트별 읽은 개수 (각 읽기 스레드가 자기 칸만 갱신)
+    row_counts = [0] * len(sources)
+    done = [False] * len(sources)
+    progress_lock = threading.Lock()
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled("송장번호 읽기가 취소되었습니다.")
+
+    def report(stage: str = 'read'):
+        if progress:
+            with progress_lock:
+                progress(JobProgress(sum(row_counts), sum(done), len(sources), time.monotonic() - started, stage))
+
+    def read_one(source_id: int) -> Tuple[List[str], array.array]:
+        def on_rows(count: int):
+            check_cancelled()
+            row_counts[source_id] = count
+            report()
+
+        check_cancelled()
+        try:
+            return read_source(sources[source_id], progress=on_rows)
+        finally:
+            done[source_id] = True
+            report()
+
+    workers = max(1, min(max_workers, len(sources)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="invoice-read") as executor:
+        futures = [executor.submit(read_one, source_id) for source_id in range(len(sources))]
+        for source_id, (source, future) in enumerate(zip(sources, futures)):
+            try:
+                invoices, source_rows = future.result()
+            except JobCancelled:
+                for pending in futures:
+                    pending.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"송장번호 읽기 실패: {source.label}: {e}")
+                results.append(SourceResult(source, 0, str(e)))
+                continue
+            results.append(SourceResult(source, len(invoices), None))
+            values.extend(invoices)
+            source_ids.extend(repeat(source_id, len(invoices)))
+            rows.extend(source_rows)
+
+    # 파일 사이의 중복도 제거 (먼저 나온 파일/행 유지)
+    check_cancelled()
+    report('validate')
+    validation = validate_invoices(values, carrier=carrier)
+
+    def origin_at(position: int) -> InvoiceOrigin:
+        return InvoiceOrigin(sources[source_ids[position - 1]], rows[position - 1])
+
+    rejected_origins = [origin_at(item.position) for item in validation.rejected]
+    # 중복 이유는 합친 목록 기준 순서 대신 처음 나온 파일/시트와 행 번호로 표시
+    rejected = []
+    for item, origin in zip(validation.rejected, rejected_origins):
+        item = item._replace(row=origin.row)
+        if item.duplicate_of is not None:
+            first = origin_at(item.duplicate_of)
+            item = item._replace(reason=f"중복 ({first.source.label} {first.row}행과 같음)")
+        rejected.append(item)
+    if rejected:
+        keep = bytearray(b'\x01') * len(values)
+        for item in rejected:
+            keep[item.position - 1] = 0
+        source_ids = array.array('I', compress(source_ids, keep))
+        rows = array.array('I', compress(rows, keep))
+
+    elapsed = time.monotonic() - started
+    logger.info(f"송장번호 작업 구성: 파일/시트 {len(sources)}개, {len(validation.invoices)}건 "
+                f"(제외 {len(validation.rejected)}건, {elapsed:.2f}초)")
+    return InvoiceJob(validation.invoices, source_ids, rows, rejected, rejected_origins, results, elapsed)
+
+
+def describe_rejected(job: InvoiceJob, limit: int = 20) -> List[str]:
+    """제외된 송장번호 안내 문구 (출처 포함, 앞에서 limit건)"""
+    lines = [
+        f"{origin.source.label} {origin.row}행 '{item.value}': {item.reason}"
+        for item, origin in zip(job.rejected[:limit], job.rejected_origins)
+    ]
+    if len(job.rejected) > limit:
+        lines.append(f"... 외 {len(job.rejected) - limit}건")
+    return lines
+
+
+def summarize_sources(job: InvoiceJob) -> Dict[str, int]:
+    """파일/시트별 전송 건수 (중복 제거 후)"""
+    counts = [0] * len(job.sources)
+    for source_id in job.source_ids:
+        counts[source_id] += 1
+    return {result.source.label: count for result, count in zip(job.sources, counts)}
+
+
+class InvoiceJobLoader:
+    """
+    작업 구성을 백그라운드 스레드에서 실행 (GUI용)
+
+    GUI는 root.after로 progress/done 속성을 주기적으로 확인하고, 끝나면 job 또는 error를 사용
+    (작업 스레드는 화면을 직접 변경하지 않음)
+    """
+
+    def __init__(self, spec: Union[str, Iterable[str]], default_sheet: str = "Sheet1",
+                 base_dir: Optional[Path] = None, carrier: Optional[str] = 'any'):
+        self.spec = spec
+        self.default_sheet = default_sheet
+        self.base_dir = base_dir
+        self.carrier = carrier
+        self.progress: Optional[JobProgress] = None
+        self.sources: List[InvoiceSource] = []
+        self.job: Optional[InvoiceJob] = None
+        self.error: Optional[Exception] = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """읽기 시작"""
+        self._thread = threading.Thread(target=self._run, name="invoice-job-loader", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """읽기 취소 (진행 중인 파일은 다음 진행 상황 알림 때 멈춤)"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _run(self):
+        try:
+            self.sources = expand_sources(self.spec, default_sheet=self.default_sheet, base_dir=self.base_dir)
+            self.job = build_invoice_job(self.sources, carrier=self.carrier,
+                                         progress=self._on_progress, cancel_event=self._cancel)
+        except Exception as e:
+            if not isinstance(e, JobCancelled):
+                logger.error(f"송장번호 작업 구성 실패: {e}", exc_info=True)
+            self.error = e
+        finally:
+            self._done.set()
+
+    def _on_progress(self, progress: JobProgress):
+        # 최신 상황만 보관 (GUI가 가져갈 때까지 쌓지 않음)
+        self.progress = progress
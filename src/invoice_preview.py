@@ -0,0 +1,189 @@
+"""
+송장번호 미리보기 목록 모듈
+송장번호 목록 전체를 Listbox에 넣지 않고 화면에 보이는 행만 그려서
+송장번호가 많아도 화면이 멈추거나 메모리가 늘지 않도록 함
+"""
+
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+from typing import List, Optional, Sequence
+
+# 현재 전송 위치 확인 주기 (밀리초)
+CURRENT_POLL_MS = 200
+# 현재 전송 위치 표시 색
+CURRENT_ROW_COLOR = "#fff3b0"
+# 휠 한 칸에 이동할 행 수
+WHEEL_ROWS = 3
+
+
+class VirtualInvoiceList(ttk.Frame):
+    """
+    가상 스크롤 송장번호 목록
+
+    - Listbox에는 보이는 행만 있고, 스크롤바는 전체 목록 기준으로 직접 계산
+    - set_current()는 작업 스레드에서 호출해도 되며, 화면은 메인 스레드에서 주기적으로 반영
+    """
+
+    def __init__(self, master, width: int = 28, font=("맑은 고딕", 9), **kwargs):
+        super().__init__(master, **kwargs)
+        self._items: Sequence[str] = []
+        self._top = 0                       # 맨 위에 보이는 행 (0부터)
+        self._rows = 1                      # 보이는 행 수
+        self._selected: Optional[int] = None
+        self._current: Optional[int] = None
+        self._pending_current: Optional[int] = None
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(self, width=width, font=font, activestyle='none', exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda event: self._scroll_by(-WHEEL_ROWS))
+        self.listbox.bind('<Button-5>', lambda event: self._scroll_by(WHEEL_ROWS))
+        self.listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self._move_selection(-self._rows))
+        self.listbox.bind('<Next>', lambda event: self._move_selection(self._rows))
+        self.listbox.bind('<Home>', lambda event: self._move_selection(-len(self._items)))
+        self.listbox.bind('<End>', lambda event: self._move_selection(len(self._items)))
+
+        self.after(CURRENT_POLL_MS, self._poll_current)
+
+    def set_items(self, items: Sequence[str]):
+        """표시할 송장번호 목록 변경 (목록을 복사하지 않음)"""
+        self._items = items
+        self._top = 0
+        self._selected = None
+        self._current = None
+        self._pending_current = None
+        self._render()
+
+    def clear(self):
+        """목록 비우기"""
+        self.set_items([])
+
+    def size(self) -> int:
+        return len(self._items)
+
+    def selected_index(self) -> Optional[int]:
+        """선택한 송장번호 위치 (0부터, 없으면 None)"""
+        return self._selected
+
+    def jump_to(self, index: int, select: bool = True):
+        """지정한 위치(0부터)가 보이도록 이동"""
+        if not self._items:
+            return
+        index = max(0, min(index, len(self._items) - 1))
+        if select:
+            self._selected = index
+        if not self._top <= index < self._top + self._rows:
+            # 위쪽 1/3 지점에 표시
+            self._top = index - self._rows // 3
+        self._render()
+
+    def search(self, text: str, start: Optional[int] = None) -> Optional[int]:
+        """
+        송장번호 검색 (선택한 행 다음부터, 끝까지 없으면 처음부터)
+
+        Returns:
+            찾은 위치 (0부터, 없으면 None)
+        """
+        text = text.strip()
+        total = len(self._items)
+        if not text or not total:
+            return None
+        if start is None:
+            start = self._selected + 1 if self._selected is not None else 0
+        items = self._items
+        for index in range(start, start + total):
+            index %= total
+            if text in items[index]:
+                self.jump_to(index)
+                return index
+        return None
+
+    def set_current(self, index: Optional[int]):
+        """현재 전송 위치 표시 (0부터, None이면 표시 안 함) - 작업 스레드에서 호출 가능"""
+        self._pending_current = index
+
+    def _poll_current(self):
+        if self._pending_current != self._current:
+            previous = self._current
+            self._current = self._pending_current
+            # 사용자가 다른 곳을 보고 있지 않으면 현재 위치를 따라감
+            if self._current is not None and (previous is None or self._is_visible(previous)) \
+                    and not self._is_visible(self._current):
+                self._top = self._current - self._rows // 3
+            self._render()
+        self.after(CURRENT_POLL_MS, self._poll_current)
+
+    def _is_visible(self, index: int) -> bool:
+        return self._top <= index < self._top + self._rows
+
+    def _line_height(self) -> int:
+        # Tk Listbox 행 높이 = 글꼴 줄 간격 + 1 + 선택 테두리 두께 * 2
+        font = tkfont.Font(font=self.listbox.cget('font'))
+        return font.metrics('linespace') + 1 + 2 * int(self.listbox.cget('selectborderwidth'))
+
+    def _on_configure(self, event):
+        border = 2 * (int(self.listbox.cget('borderwidth')) + int(self.listbox.cget('highlightthickness')))
+        rows = max(1, (event.height - border) // self._line_height())
+        if rows != self._rows:
+            self._rows = rows
+            self._render()
+
+    def _on_scrollbar(self, *args):
+        if not self._items:
+            return
+        if args[0] == 'moveto':
+            self._top = int(float(args[1]) * len(self._items))
+            self._render()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self._scroll_by(amount * self._rows if args[2] == 'pages' else amount)
+
+    def _on_mousewheel(self, event):
+        self._scroll_by(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+        return 'break'
+
+    def _scroll_by(self, rows: int):
+        self._top += rows
+        self._render()
+        return 'break'
+
+    def _move_selection(self, rows: int):
+        # 키보드 이동: 선택 행이 화면 밖으로 나가면 한 행씩 스크롤
+        if self._items:
+            start = self._selected if self._selected is not None else self._top
+            self._selected = max(0, min(start + rows, len(self._items) - 1))
+            self._top = min(self._selected, max(self._top, self._selected - self._rows + 1))
+            self._render()
+        return 'break'
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self._selected = self._top + selection[0]
+
+    def _render(self):
+        total = len(self._items)
+        self._top = max(0, min(self._top, total - self._rows))
+        top = self._top
+        visible: List[str] = [f"{top + offset + 1}. {invoice}"
+                              for offset, invoice in enumerate(self._items[top:top + self._rows])]
+
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *visible)
+        if self._current is not None and self._is_visible(self._current):
+            self.listbox.itemconfig(self._current - top, background=CURRENT_ROW_COLOR)
+        if self._selected is not None and self._is_visible(self._selected):
+            self.listbox.selection_set(self._selected - top)
+
+        if total:
+            self.scrollbar.set(top / total, min(1.0, (top + self._rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,233 @@
+"""
+송장번호 입력 파일 모듈
+확장자에 따라 엑셀(.xlsx) 또는 텍스트(.csv/.tsv/.txt) 읽기 클래스를 선택
+
+모든 읽기 클래스는 같은 방식으로 사용:
+    read_invoices(limit, offset, progress) -> List[str]
+    read_invoice_rows(progress) -> (List[str], 행 번호 배열)
+    iter_invoices(limit, offset) -> Iterator[str]
+    validate_data() -> bool
+(1행 1열부터 헤더 없이 첫 번째 열만 읽고, 빈 값은 건너뛰며, 문자열로 변환하여 앞자리 0 보존)
+"""
+
+import csv
+import array
+import codecs
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from excel_reader import ExcelReader, read_with_progress, read_rows_with_progress
+from invoice_cache import CachedExcelReader
+
+logger = logging.getLogger(__name__)
+
+# 인코딩 판별에 사용할 앞부분 크기
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# 구분자 판별에 사용할 앞부분 줄 수 (빈 줄 제외)
+DELIMITER_SAMPLE_LINES = 50
+# 지원하는 구분자 (판별 우선순위 순)
+DELIMITERS = ('\t', ',', ';')
+
+
+def detect_encoding(path: Path) -> str:
+    """
+    텍스트 파일 인코딩 판별
+
+    Returns:
+        'utf-8-sig' (UTF-8, BOM 있거나 없음) 또는 'cp949' (한글 Windows 기본)
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # 앞부분만 읽었으므로 마지막 글자가 잘려 있을 수 있음 (final=False)
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp949'
+
+
+def detect_delimiter(path: Path, encoding: str) -> Optional[str]:
+    """
+    구분자 판별 (.tsv는 탭, 그 외는 앞부분 DELIMITER_SAMPLE_LINES줄 중 가장 많은 줄에 나오는 구분자)
+
+    Returns:
+        탭, 쉼표, 세미콜론 중 하나 (앞부분에 구분자가 없으면 None)
+    """
+    if path.suffix.lower() == '.tsv':
+        return '\t'
+    counts = {delimiter: 0 for delimiter in DELIMITERS}
+    sampled = 0
+    with open(path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for delimiter in DELIMITERS:
+                if delimiter in line:
+                    counts[delimiter] += 1
+            sampled += 1
+            if sampled >= DELIMITER_SAMPLE_LINES:
+                break
+    # 같은 줄 수면 DELIMITERS 순서(탭, 쉼표, 세미콜론) 우선
+    delimiter = max(DELIMITERS, key=lambda d: counts[d])
+    return delimiter if counts[delimiter] else None
+
+
+def first_field(line: str) -> str:
+    """
+    한 줄의 첫 번째 값 (구분자가 없다고 판별된 파일용)
+    뒤쪽 줄에만 구분자가 있어도 첫 번째 구분자 앞까지만 사용, 따옴표는 값 양끝만 제거
+    (csv 모듈 따옴표 처리를 쓰지 않으므로 짝이 맞지 않는 따옴표가 다음 줄을 삼키지 않음)
+    """
+    positions = [line.find(delimiter) for delimiter in DELIMITERS if delimiter in line]
+    value = line[:min(positions)] if positions else line
+    value = value.strip()
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1].replace('""', '"')
+    return value
+
+
+def text_to_invoice(value: str) -> str:
+    """텍스트 값을 송장번호로 변환 (엑셀에서 앞자리 0을 지키려고 내보낸 ="0123" 형태도 처리)"""
+    value = value.strip()
+    if value.startswith('="') and value.endswith('"'):
+        value = value[2:-1].strip()
+    return value
+
+
+class TextInvoiceReader:
+    """CSV/TSV/TXT 파일에서 송장번호 읽기 (헤더 없이 1행 1열부터, 한 줄씩 읽기 - 여러 줄 값은 지원하지 않음)"""
+
+    def __init__(self, file_path: str, sheet_name: str = "Sheet1", encoding: Optional[str] = None):
+        """
+        초기화
+
+        Args:
+            file_path: 파일 경로
+            sheet_name: 사용하지 않음 (엑셀 읽기와 같은 형태로 만들기 위한 인자)
+            encoding: 파일 인코딩 (기본값: 자동 판별 - utf-8-sig 또는 cp949)
+        """
+        self.file_path = Path(file_path)
+        self.sheet_name = sheet_name
+        self.encoding = encoding
+
+    def read_invoices(self, limit: Optional[int] = None, offset: int = 0,
+                      progress: Optional[Callable[[int], None]] = None) -> List[str]:
+        """
+        송장번호 읽기
+
+        Args:
+            limit: 최대 개수 (기본값: 전체)
+            offset: 앞에서 건너뛸 송장번호 개수
+            progress: 진행 상황 콜백 (ExcelReader.read_invoices와 같음)
+
+        Raises:
+            FileNotFoundError: 파일을 찾을 수 없을 때
+        """
+        invoices = read_with_progress(self.iter_invoices(limit=limit, offset=offset), progress)
+        logger.info(f"총 {len(invoices)}개의 송장번호를 읽었습니다.")
+        return invoices
+
+    def read_invoice_rows(self, progress: Optional[Callable[[int], None]] = None) -> Tuple[List[str], array.array]:
+        """송장번호와 줄 번호 읽기 (ExcelReader.read_invoice_rows와 같음, 줄 번호는 빈 줄도 셈)"""
+        invoices, row_numbers = read_rows_with_progress(self.iter_invoice_rows(), progress)
+        logger.info(f"총 {len(invoices)}개의 송장번호를 읽었습니다.")
+        return invoices, row_numbers
+
+    def iter_invoices(self, limit: Optional[int] = None, offset: int = 0) -> Iterator[str]:
+        """송장번호를 한 개씩 읽기 (limit/offset은 빈 값을 제외한 송장번호 개수 기준)"""
+        for _, invoice in self.iter_invoice_rows(limit=limit, offset=offset):
+            yield invoice
+
+    def iter_invoice_rows(self, limit: Optional[int] = None, offset: int = 0) -> Iterator[Tuple[int, str]]:
+        """(줄 번호, 송장번호)를 한 개씩 읽기 (iter_invoices와 같고 줄 번호를 함께 반환)"""
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"파일을 찾을 수 없습니다: {self.file_path}")
+        if limit is not None and limit <= 0:
+            return
+
+        encoding = self.encoding or detect_encoding(self.file_path)
+        delimiter = detect_delimiter(self.file_path, encoding)
+        logger.info(f"텍스트 파일 읽기: {self.file_path} ({encoding}, 구분자: {delimiter!r})")
+
+        skipped = 0
+        count = 0
+        with open(self.file_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+            for line_num, line in enumerate(f, start=1):
+                if delimiter is None:
+                    value = first_field(line)
+                elif '"' not in line:
+                    # 따옴표가 없는 줄은 나누기만 하면 됨 (줄마다 csv.reader를 만들면 100만 줄에서 수 배 느림)
+                    value = line.split(delimiter, 1)[0]
+                else:
+                    # 줄마다 따로 읽어 짝이 맞지 않는 따옴표가 다음 줄을 삼키지 않도록
+                    row = next(csv.reader([line], delimiter=delimiter), None)
+                    value = row[0] if row else ''
+                invoice = text_to_invoice(value)
+                if not invoice:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                yield line_num, invoice
+                count += 1
+                if limit is not None and count >= limit:
+                    break
+
+    def validate_data(self) -> bool:
+        """데이터 검증 (송장번호가 하나라도 있는지)"""
+        try:
+            if next(self.iter_invoices(limit=1), None) is None:
+                logger.warning("읽은 송장번호가 없습니다.")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"데이터 검증 실패: {e}")
+            return False
+
+
+# 확장자별 읽기 클래스 (엑셀은 캐시 사용, 텍스트는 바로 읽는 것이 더 빠름)
+INVOICE_READERS: Dict[str, type] = {
+    '.xlsx': CachedExcelReader,
+    '.xlsm': CachedExcelReader,
+    '.csv': TextInvoiceReader,
+    '.tsv': TextInvoiceReader,
+    '.txt': TextInvoiceReader,
+}
+
+# 파일 선택 창 형식 목록
+INVOICE_FILETYPES = [
+    ("송장번호 파일", "*.xlsx *.xlsm *.csv *.tsv *.txt"),
+    ("Excel files", "*.xlsx *.xlsm"),
+    ("CSV/텍스트 파일", "*.csv *.tsv *.txt"),
+    ("All files", "*.*"),
+]
+
+
+def register_invoice_reader(extension: str, reader_class: type):
+    """확장자별 읽기 클래스 등록 (reader_class(file_path, sheet_name) 형태로 생성)"""
+    INVOICE_READERS[extension.lower()] = reader_class
+
+
+def create_invoice_reader(file_path: str, sheet_name: str = "Sheet1", cached: bool = True):
+    """
+    확장자에 맞는 송장번호 읽기 객체 생성
+
+    Args:
+        file_path: 파일 경로
+        sheet_name: 시트 이름 (엑셀만 사용)
+        cached: 엑셀 캐시 사용 여부
+
+    Raises:
+        ValueError: 지원하지 않는 확장자일 때
+    """
+    extension = Path(file_path).suffix.lower()
+    reader_class = INVOICE_READERS.get(extension)
+    if reader_class is None:
+        supported = ', '.join(sorted(INVOICE_READERS))
+        raise ValueError(f"지원하지 않는 파일 형식입니다: {extension or '(확장자 없음)'} (지원 형식: {supported})")
+    if reader_class is CachedExcelReader and not cached:
+        reader_class = ExcelReader
+    return reader_class(file_path, sheet_name)
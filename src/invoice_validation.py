@@ -0,0 +1,151 @@
+"""
+송장번호 검증 모듈
+읽어 온 송장번호를 전송 전에 정리(숫자 형식 통일), 검증(자릿수/검증번호), 중복 제거
+잘못된 송장번호는 이유와 함께 제외하여 AI BOT 전송 시간을 쓰지 않도록 함
+"""
+
+import re
+import logging
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CarrierRule(NamedTuple):
+    """택배사별 송장번호 규칙"""
+    name: str
+    lengths: Tuple[int, ...]
+    checksum: Optional[str]     # 'mod7': 마지막 자리 = 앞자리 숫자 % 7
+
+
+# 택배사별 규칙 (settings.json의 validation.carrier로 선택, 기본값 any)
+CARRIER_RULES = {
+    'any': CarrierRule('전체', tuple(range(8, 17)), None),
+    'hanjin': CarrierRule('한진택배', (10, 12), 'mod7'),
+    'cj': CarrierRule('CJ대한통운', (10, 12), 'mod7'),
+    'lotte': CarrierRule('롯데택배', (12,), 'mod7'),
+    'logen': CarrierRule('로젠택배', (11,), 'mod7'),
+    'epost': CarrierRule('우체국택배', (13,), None),
+}
+
+# 구분 기호 (공백, 하이픈) 및 엑셀 숫자 셀의 소수점 (1234567890.0)
+_SEPARATORS = re.compile(r'[\s\-]+')
+_FLOAT_SUFFIX = re.compile(r'\.0+$')
+_SCIENTIFIC = re.compile(r'^\d+(\.\d+)?[eE][+\-]?\d+$')
+
+
+class RejectedInvoice(NamedTuple):
+    """제외된 송장번호"""
+    position: int       # 읽은 순서 (1부터, 빈 셀 제외)
+    value: str          # 원래 값
+    reason: str
+    duplicate_of: Optional[int] = None  # 중복일 때 처음 나온 순서
+    row: Optional[int] = None           # 파일의 행 번호 (엑셀 행, 텍스트 줄 - 행 번호를 넘겨준 경우)
+
+    @property
+    def location(self) -> str:
+        """안내용 위치 (행 번호가 있으면 'N행', 없으면 'N번째')"""
+        return f"{self.row}행" if self.row is not None else f"{self.position}번째"
+
+
+class ValidationResult(NamedTuple):
+    """검증 결과"""
+    invoices: List[str]             # 전송할 송장번호 (정리됨, 중복 제거, 원래 순서 유지)
+    rejected: List[RejectedInvoice] # 제외된 송장번호 (형식 오류, 중복)
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(1 for item in self.rejected if item.duplicate_of is not None)
+
+
+def normalize_invoices(values: Iterable[str]) -> List[str]:
+    """
+    송장번호 형식 통일 (한 번에 처리)
+    공백/하이픈 제거, 숫자 셀이 실수로 읽힌 경우의 소수점(.0) 제거
+    """
+    separators = _SEPARATORS.sub
+    float_suffix = _FLOAT_SUFFIX.sub
+    # 대부분은 이미 숫자만 있으므로 정규식을 거치지 않음
+    return [
+        value if value.isdigit() else float_suffix('', separators('', value))
+        for value in map(str, values)
+    ]
+
+
+def mod7_check(invoice: str) -> bool:
+    """검증번호 확인 (마지막 자리 = 앞자리 숫자를 7로 나눈 나머지)"""
+    return int(invoice[:-1]) % 7 == int(invoice[-1])
+
+
+def get_carrier_rule(carrier: Optional[str]) -> CarrierRule:
+    """
+    택배사 규칙 조회
+
+    Raises:
+        ValueError: 알 수 없는 택배사일 때
+    """
+    key = (carrier or 'any').strip().lower()
+    if key not in CARRIER_RULES:
+        raise ValueError(f"알 수 없는 택배사입니다: {carrier} (사용 가능: {', '.join(CARRIER_RULES)})")
+    return CARRIER_RULES[key]
+
+
+def validate_invoices(values: List[str], carrier: Optional[str] = 'any', dedupe: bool = True,
+                      rows: Optional[Sequence[int]] = None) -> ValidationResult:
+    """
+    송장번호 정리, 검증, 중복 제거
+
+    Args:
+        values: 읽어 온 송장번호 (ExcelReader.read_invoices 등)
+        carrier: 택배사 규칙 이름 (CARRIER_RULES)
+        dedupe: 중복 제거 여부 (처음 나온 것만 유지)
+        rows: values와 같은 순서의 행 번호 (read_invoice_rows 결과, 있으면 안내에 행 번호 사용)
+
+    Returns:
+        ValidationResult
+    """
+    rule = get_carrier_rule(carrier)
+    lengths = frozenset(rule.lengths)
+    use_mod7 = rule.checksum == 'mod7'
+    if len(rule.lengths) > 2 and rule.lengths == tuple(range(rule.lengths[0], rule.lengths[-1] + 1)):
+        length_text = f"{rule.lengths[0]}~{rule.lengths[-1]}자리"
+    else:
+        length_text = f"{'/'.join(map(str, rule.lengths))}자리"
+
+    invoices = []
+    rejected = []
+    first_seen = {}
+    for position, (original, invoice) in enumerate(zip(values, normalize_invoices(values)), start=1):
+        if not (invoice.isascii() and invoice.isdigit()):
+            if _SCIENTIFIC.match(invoice):
+                reason = "지수 표기 (엑셀 셀 서식을 텍스트로 바꿔 주세요)"
+            else:
+                reason = "숫자가 아닌 문자 포함"
+        elif len(invoice) not in lengths:
+            reason = f"자릿수 오류 ({len(invoice)}자리, {rule.name}: {length_text})"
+        elif use_mod7 and not mod7_check(invoice):
+            reason = "검증번호 불일치"
+        elif dedupe and invoice in first_seen:
+            first = first_seen[invoice]
+            first_text = f"{rows[first - 1]}행과" if rows is not None else f"{first}번째와"
+            rejected.append(RejectedInvoice(position, original, f"중복 ({first_text} 같음)", first,
+                                            rows[position - 1] if rows is not None else None))
+            continue
+        else:
+            first_seen[invoice] = position
+            invoices.append(invoice)
+            continue
+        rejected.append(RejectedInvoice(position, original, reason,
+                                        row=rows[position - 1] if rows is not None else None))
+
+    if rejected:
+        logger.info(f"송장번호 검증: {len(invoices)}건 통과, {len(rejected)}건 제외")
+    return ValidationResult(invoices, rejected)
+
+
+def summarize_rejected(rejected: List[RejectedInvoice], limit: int = 20) -> List[str]:
+    """제외된 송장번호 안내 문구 (앞에서 limit건, 나머지는 건수만)"""
+    lines = [f"{item.location} '{item.value}': {item.reason}" for item in rejected[:limit]]
+    if len(rejected) > limit:
+        lines.append(f"... 외 {len(rejected) - limit}건")
+    return lines
@@ -0,0 +1,9 @@
+"""
+라이선스 임대 확인용 공개키 (프로그램에 내장)
+릴리스 빌드 전에 서버 개인키로 생성:
+    LICENSE_LEASE_PRIVATE_KEY=... python server/license_lease.py pubkey --output src/lease_public_key.py
+비어 있으면 임대를 쓰지 않고 24시간마다 온라인 확인
+(설정 파일처럼 사용자가 바꿀 수 있는 곳에 두면 임대를 위조할 수 있으므로 코드에 내장)
+"""
+
+LEASE_PUBLIC_KEY = ""
@@ -12,9 +12,10 @@ from typing import Dict, Any
 sys.path.insert(0, str(Path(__file__).parent))
 
 from bluetooth_controller import BluetoothController
-from excel_reader import ExcelReader
+from send_pacing import InvoiceSender, DEFAULT_FLOW_CONTROL, PACING_ACK, PACING_ADAPTIVE
+from invoice_jobs import expand_sources, build_invoice_job, describe_rejected
 from utils import (
-    setup_logging, random_delay, print_progress,
+    setup_logging, print_progress,
     print_success, print_error, print_info, print_warning
 )
 from colorama import Fore, Style
@@ -66,6 +67,7 @@ def get_default_config() -> Dict[str, Any]:
             "max_attempts": 3,
             "retry_delay": 2.0
         },
+        "flow_control": dict(DEFAULT_FLOW_CONTROL),
         "excel": {
             "file_path": "data/invoices.xlsx",
             "column_name": "InvoiceNumber",
@@ -131,21 +133,34 @@ def main():
     
     # 엑셀 파일 읽기
     try:
-        # 엑셀 파일 경로를 프로젝트 루트 기준으로 변환
-        excel_path = config["excel"]["file_path"]
-        if not Path(excel_path).is_absolute():
-            project_root = Path(__file__).parent.parent
-            excel_path = project_root / excel_path
-        
-        reader = ExcelReader(
-            file_path=str(excel_path),
-            sheet_name=config["excel"].get("sheet_name", "Sheet1")
+        # 명령줄 인자가 있으면 그 파일/시트/폴더를, 없으면 설정 파일의 경로를 사용
+        # (여러 개는 세미콜론으로 구분, 상대 경로는 프로젝트 루트 기준)
+        excel_path = sys.argv[1:] or config["excel"]["file_path"]
+        sources = expand_sources(
+            excel_path,
+            default_sheet=config["excel"].get("sheet_name", "Sheet1"),
+            base_dir=Path(__file__).parent.parent
         )
         
-        print_info("엑셀 파일 읽기 중...")
-        invoices = reader.read_invoices()
+        print_info(f"엑셀 파일 읽기 중... (파일/시트 {len(sources)}개)")
+        job = build_invoice_job(sources, carrier=config.get("validation", {}).get("carrier", "any"))
+        invoices = job.invoices
         total = len(invoices)
         
+        for result in job.sources:
+            if result.error:
+                print_warning(f"읽기 실패: {result.source.label}: {result.error}")
+            elif len(sources) > 1:
+                print(f"  {result.source.label}: {result.count}건")
+        if job.failed_sources and len(job.failed_sources) == len(sources):
+            raise RuntimeError(job.failed_sources[0].error)
+        
+        if job.rejected:
+            print_warning(f"송장번호 {len(job.rejected)}건을 제외했습니다. (중복 {job.duplicate_count}건)")
+            for line in describe_rejected(job):
+                print(f"  {line}")
+                logger.warning(f"제외된 송장번호: {line}")
+        
         if total == 0:
             print_error("읽은 송장번호가 없습니다.")
             logger.error("송장번호가 없음")
@@ -170,7 +185,13 @@ def main():
     print()
     print_info("다음 작업을 수행합니다:")
     print(f"  - 총 {total}건의 송장번호 처리")
-    print(f"  - 건당 딜레이: {config['delays']['min_between']}~{config['delays']['max_between']}초")
+    pacing_mode = config.get("flow_control", {}).get("mode", DEFAULT_FLOW_CONTROL["mode"])
+    if pacing_mode == PACING_ACK:
+        print("  - 전송 방식: 입력 완료 응답 확인 후 다음 송장번호 전송")
+    elif pacing_mode == PACING_ADAPTIVE:
+        print("  - 전송 방식: 입력 완료 응답 확인 + 응답 시간에 따라 간격 자동 조절")
+    else:
+        print(f"  - 건당 딜레이: {config['delays']['min_between']}~{config['delays']['max_between']}초")
     print()
     response = input("계속하시겠습니까? (y/n): ").strip().lower()
     if response != 'y':
@@ -189,37 +210,24 @@ def main():
     failed_invoices = []
     
     logger.info("자동화 시작")
+    sender = InvoiceSender.from_config(controller, config, log=print_warning)
     
     try:
         for idx, invoice in enumerate(invoices, 1):
             print_progress(idx, total, f"처리 중: {invoice}")
             
-            # 텍스트 전송
-            retry_count = 0
-            max_retries = config["retry"].get("max_attempts", 3)
-            success = False
-            
-            while retry_count < max_retries and not success:
-                if controller.send_text(invoice):
-                    success = True
-                    success_count += 1
-                    logger.info(f"[{idx}/{total}] 성공: {invoice}")
-                else:
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        logger.warning(f"[{idx}/{total}] 재시도 {retry_count}/{max_retries}: {invoice}")
-                        time.sleep(config["retry"].get("retry_delay", 2.0))
-            
-            if not success:
+            # 텍스트 전송 (입력 완료 응답 대기, 실패 시 재시도)
+            result = sender.send(invoice)
+            if result.success:
+                success_count += 1
+                logger.info(f"[{idx}/{total}] 성공: {invoice} ({result.status}, {result.elapsed:.2f}초)")
+            else:
                 fail_count += 1
-                failed_invoices.append(invoice)
-                logger.error(f"[{idx}/{total}] 실패: {invoice}")
-            
-            # 딜레이 (마지막 항목 제외)
-            if idx < total:
-                delay_min = config["delays"]["min_between"]
-                delay_max = config["delays"]["max_between"]
-                random_delay(delay_min, delay_max)
+                origin = job.origin(idx - 1)
+                failed_invoices.append((invoice, origin))
+                logger.error(f"[{idx}/{total}] 실패: {invoice} ({result.status}, {origin.source.label} {origin.row}행)")
+                if result.status == 'unknown':
+                    print_warning(f"{invoice}: AI BOT이 받았지만 입력 완료 응답이 없습니다. 모바일에서 입력 여부를 확인하세요. (다시 보내지 않음)")
         
         print()  # 진행 바 다음 줄
         print()
@@ -229,6 +237,12 @@ def main():
         print_warning("사용자에 의해 중단되었습니다.")
         logger.warning("사용자 중단")
     
+    # 기기별 전송 간격 기록 (다음 실행에서 이어서 사용)
+    pacing_summary = sender.finish()
+    if pacing_summary:
+        print_info(f"자동 간격 조절 결과: {pacing_summary}")
+        logger.info(f"자동 간격 조절 결과: {pacing_summary}")
+    
     # 결과 출력
     print("=" * 60)
     print("처리 완료!")
@@ -243,8 +257,9 @@ def main():
     if failed_invoices:
         failed_file = Path("logs") / f"failed_{time.strftime('%Y%m%d_%H%M%S')}.txt"
         with open(failed_file, 'w', encoding='utf-8') as f:
-            for invoice in failed_invoices:
-                f.write(f"{invoice}\n")
+            # 송장번호<탭>출처 (첫 번째 열만 읽으므로 이 파일을 그대로 다시 불러올 수 있음)
+            for invoice, origin in failed_invoices:
+                f.write(f"{invoice}\t{origin.source.label} {origin.row}행\n")
         print_info(f"실패한 송장번호 저장: {failed_file}")
         logger.info(f"실패 항목 {len(failed_invoices)}건 저장: {failed_file}")
     
@@ -4,13 +4,25 @@
 """
 
 import json
+import time
+import base64
 import datetime
 import requests
 import os
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Callable, Optional, Dict, Tuple
 import logging
 from hardware_id import get_hardware_id
+from http_client import post_json
+from lease_public_key import LEASE_PUBLIC_KEY
+
+# 라이선스 임대 서명 확인 (cryptography 미설치 시 임대 미사용)
+try:
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+    from cryptography.exceptions import InvalidSignature
+except ImportError:
+    Ed25519PublicKey = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +36,45 @@ if DEV_MODE_FILE.exists():
     except:
         pass
 
+LICENSE_FILE = Path(__file__).parent.parent / "config" / "license.json"
+# 임대를 쓰지 않을 때 온라인 확인 주기 (초)
+ONLINE_VERIFY_INTERVAL = 86400
+# 서버에 연결할 수 없을 때 마지막 온라인 확인 이후 허용 기간 (초)
+OFFLINE_GRACE_SECONDS = 3 * 86400
+# 남은 임대 기간이 이 비율 이하가 되면 갱신
+LEASE_REFRESH_RATIO = 0.3
+# 서버와 PC 시계 차이 허용 (초)
+LEASE_CLOCK_SKEW = 300
+# 갱신 실패 후 재시도 대기 (초, 실패할 때마다 2배)
+LEASE_RETRY_DELAY = 300
+LEASE_MAX_RETRY_DELAY = 3600
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def verify_lease(lease: Optional[Dict], public_key: Optional[str] = None) -> Optional[Dict]:
+    """
+    라이선스 임대 서명 확인
+    
+    Args:
+        public_key: base64 공개키 (기본값: LEASE_PUBLIC_KEY)
+        
+    Returns:
+        서명이 올바르면 임대 내용 {'license_key', 'hardware_id', 'license_expiry', 'issued_at', 'expires_at'}
+        (서명 오류, 형식 오류, 공개키/cryptography 없음이면 None)
+    """
+    public_key = public_key or LEASE_PUBLIC_KEY
+    if not lease or not public_key or Ed25519PublicKey is None:
+        return None
+    try:
+        payload = _b64decode(lease['payload'])
+        signature = _b64decode(lease['signature'])
+        Ed25519PublicKey.from_public_bytes(_b64decode(public_key)).verify(signature, payload)
+        data = json.loads(payload.decode('utf-8'))
+    except (InvalidSignature, KeyError, TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
 class OnlineLicenseManager:
     """온라인 라이선스 관리 클래스"""
     
@@ -35,9 +86,13 @@ class OnlineLicenseManager:
             server_url: 라이선스 서버 URL
         """
         self.server_url = server_url.rstrip('/')
-        self.license_file = Path(__file__).parent.parent / "config" / "license.json"
+        self.license_file = LICENSE_FILE
         self.license_data: Optional[Dict] = None
         self.hardware_id = get_hardware_id()
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._refresh_wake = threading.Event()
+        self._refresh_stop = threading.Event()
         self.load_license()
     
     def load_license(self):
@@ -52,20 +107,24 @@ class OnlineLicenseManager:
         else:
             self.license_data = None
     
-    def save_license(self, license_key: str, expiry_date: str):
+    def save_license(self, license_key: str, expiry_date: str, lease: Optional[Dict] = None):
         """로컬 라이선스 파일 저장"""
-        license_data = {
+        now = datetime.datetime.now().isoformat()
+        self.license_data = {
             "license_key": license_key,
             "expiry_date": expiry_date,
             "hardware_id": self.hardware_id,
-            "activated_date": datetime.datetime.now().isoformat()
+            "activated_date": now,
+            "last_verified": now,
+            "lease": lease
         }
-        
+        self.write_license_file()
+    
+    def write_license_file(self):
+        """현재 라이선스 정보를 파일에 기록"""
         self.license_file.parent.mkdir(exist_ok=True)
         with open(self.license_file, 'w', encoding='utf-8') as f:
-            json.dump(license_data, f, indent=2, ensure_ascii=False)
-        
-        self.license_data = license_data
+            json.dump(self.license_data, f, indent=2, ensure_ascii=False)
     
     def activate_license(self, license_key: str, customer_name: str = "", customer_email: str = "") -> Tuple[bool, str]:
         """
@@ -80,7 +139,7 @@ class OnlineLicenseManager:
             (성공 여부, 메시지)
         """
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/activate",
                 json={
                     "license_key": license_key.upper(),
@@ -95,7 +154,8 @@ class OnlineLicenseManager:
                 data = response.json()
                 if data.get('success'):
                     expiry_date = data.get('expiry_date')
-                    self.save_license(license_key.upper(), expiry_date)
+                    with self._lock:
+                        self.save_license(license_key.upper(), expiry_date, data.get('lease'))
                     logger.info("라이선스 활성화 성공")
                     return True, "라이선스가 활성화되었습니다."
                 else:
@@ -116,6 +176,8 @@ class OnlineLicenseManager:
         """
         라이선스 검증
         
+        서명된 임대가 유효하면 서버에 접속하지 않음 (갱신은 start_lease_refresh 스레드가 담당)
+        
         Args:
             force_online: 강제로 온라인 검증 (기본값: False, 주기적 검증)
             
@@ -130,7 +192,6 @@ class OnlineLicenseManager:
         if not self.license_data:
             return False, "라이선스가 등록되지 않았습니다."
         
-        license_key = self.license_data.get("license_key", "")
         stored_hw_id = self.license_data.get("hardware_id", "")
         
         # 하드웨어 ID 확인
@@ -147,57 +208,156 @@ class OnlineLicenseManager:
             except:
                 pass
         
-        # 온라인 검증 (매일 1회 또는 강제 검증)
-        should_verify_online = force_online
         if not force_online:
-            last_verified = self.license_data.get("last_verified", "")
-            if last_verified:
-                try:
-                    last_date = datetime.datetime.fromisoformat(last_verified)
-                    # 24시간마다 온라인 검증
-                    if (datetime.datetime.now() - last_date).total_seconds() > 86400:
-                        should_verify_online = True
-                except:
-                    should_verify_online = True
-            else:
-                should_verify_online = True
+            # 서명된 임대 기간 내: 서버 확인 없이 통과
+            if self.current_lease():
+                return True, "라이선스가 유효합니다."
+            # 임대를 쓸 수 없는 환경(공개키 미설정 등): 24시간마다 온라인 확인
+            if not self.lease_supported() and self._seconds_since_verified() < ONLINE_VERIFY_INTERVAL:
+                return True, "라이선스가 유효합니다."
         
-        if should_verify_online:
-            try:
-                response = requests.post(
-                    f"{self.server_url}/api/verify",
-                    json={
-                        "license_key": license_key,
-                        "hardware_id": self.hardware_id
-                    },
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success'):
-                        # 검증 시간 업데이트
-                        self.license_data["last_verified"] = datetime.datetime.now().isoformat()
-                        self.license_data["expiry_date"] = data.get('expiry_date', expiry_date_str)
-                        with open(self.license_file, 'w', encoding='utf-8') as f:
-                            json.dump(self.license_data, f, indent=2, ensure_ascii=False)
-                        return True, "라이선스가 유효합니다."
-                    else:
-                        return False, data.get('message', '라이선스 검증 실패')
-                else:
-                    # 온라인 검증 실패해도 로컬 검증 통과면 경고만
-                    logger.warning("온라인 검증 실패, 로컬 검증 사용")
-                    return True, "라이선스가 유효합니다. (오프라인 모드)"
-                    
-            except requests.exceptions.ConnectionError:
-                # 인터넷 연결 없으면 로컬 검증만 사용
-                logger.warning("서버 연결 실패, 로컬 검증 사용")
-                return True, "라이선스가 유효합니다. (오프라인 모드)"
-            except Exception as e:
-                logger.warning(f"온라인 검증 오류: {e}, 로컬 검증 사용")
+        status, message = self._verify_online()
+        if status == 'offline':
+            # 서버에 연결할 수 없으면 임대 기간 또는 마지막 확인 후 유예 기간 동안만 허용
+            if self.current_lease() or self._seconds_since_verified() < OFFLINE_GRACE_SECONDS:
                 return True, "라이선스가 유효합니다. (오프라인 모드)"
+            return False, "서버에 연결할 수 없습니다. 인터넷 연결 후 라이선스를 다시 확인하세요."
+        return status == 'valid', message
+    
+    def lease_supported(self) -> bool:
+        """서명된 임대를 확인할 수 있는지 (공개키, cryptography 필요)"""
+        return bool(LEASE_PUBLIC_KEY) and Ed25519PublicKey is not None
+    
+    def current_lease(self) -> Optional[Dict]:
+        """현재 유효한 임대 내용 (서명, 라이선스 키, 하드웨어 ID, 기간 모두 맞을 때만)"""
+        if not self.license_data:
+            return None
+        lease = verify_lease(self.license_data.get("lease"))
+        if not lease:
+            return None
+        if lease.get("license_key") != self.license_data.get("license_key") or lease.get("hardware_id") != self.hardware_id:
+            return None
+        now = time.time()
+        try:
+            # 발급 시각보다 이전이면 PC 시계를 되돌린 것으로 보고 거부
+            if not (float(lease["issued_at"]) - LEASE_CLOCK_SKEW <= now < float(lease["expires_at"])):
+                return None
+        except (KeyError, TypeError, ValueError):
+            return None
+        return lease
+    
+    def _seconds_since_verified(self) -> float:
+        """마지막 온라인 확인 이후 경과 시간 (기록 없으면 무한대)"""
+        last_verified = (self.license_data or {}).get("last_verified", "")
+        try:
+            return (datetime.datetime.now() - datetime.datetime.fromisoformat(last_verified)).total_seconds()
+        except (TypeError, ValueError):
+            return float('inf')
+    
+    def _verify_online(self) -> Tuple[str, str]:
+        """
+        서버 라이선스 확인 및 임대 갱신
+        
+        Returns:
+            (상태, 메시지) - 상태: 'valid', 'invalid', 'offline'(연결 실패/서버 오류)
+        """
+        license_key = self.license_data.get("license_key", "")
+        try:
+            response = post_json(
+                f"{self.server_url}/api/verify",
+                json={
+                    "license_key": license_key,
+                    "hardware_id": self.hardware_id
+                },
+                timeout=5,
+                idempotent=True
+            )
+            if response.status_code not in (200, 400):
+                logger.warning(f"온라인 검증 실패 (HTTP {response.status_code})")
+                return 'offline', "서버 오류가 발생했습니다."
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"서버 연결 실패: {e}")
+            return 'offline', "서버에 연결할 수 없습니다."
+        except ValueError:
+            return 'offline', "서버 응답을 처리할 수 없습니다."
         
-        return True, "라이선스가 유효합니다."
+        with self._lock:
+            if data.get('success'):
+                # 검증 시간, 만료일, 임대 갱신
+                self.license_data["last_verified"] = datetime.datetime.now().isoformat()
+                self.license_data["expiry_date"] = data.get('expiry_date', self.license_data.get("expiry_date", ""))
+                self.license_data["lease"] = data.get('lease')
+                if data.get('lease') and not verify_lease(data['lease']):
+                    # 서버 개인키와 내장 공개키가 맞지 않는 빌드 (lease_public_key.py 확인)
+                    logger.warning("서버가 발급한 라이선스 임대를 확인할 수 없습니다. 내장 공개키를 확인하세요.")
+                status, message = 'valid', "라이선스가 유효합니다."
+            else:
+                # 서버가 거부한 라이선스: 남은 임대도 폐기
+                self.license_data["lease"] = None
+                if data.get('expiry_date'):
+                    self.license_data["expiry_date"] = data['expiry_date']
+                status, message = 'invalid', data.get('message', '라이선스 검증 실패')
+            try:
+                self.write_license_file()
+            except OSError as e:
+                logger.error(f"라이선스 파일 저장 실패: {e}")
+        return status, message
+    
+    def start_lease_refresh(self, on_invalid: Optional[Callable[[str], None]] = None):
+        """
+        임대 갱신 스레드 시작 (임대 기간이 LEASE_REFRESH_RATIO만큼 남으면 서버 확인)
+        
+        Args:
+            on_invalid: 서버가 라이선스를 거부했을 때 호출 (메시지) - 갱신 스레드에서 호출됨
+        """
+        if DEV_MODE or (self._refresh_thread and self._refresh_thread.is_alive()):
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._lease_refresh_loop, args=(on_invalid,), name="license-lease-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+    
+    def stop_lease_refresh(self):
+        """임대 갱신 스레드 종료"""
+        self._refresh_stop.set()
+        self._refresh_wake.set()
+    
+    def _seconds_until_refresh(self) -> float:
+        lease = self.current_lease()
+        if lease:
+            period = float(lease["expires_at"]) - float(lease["issued_at"])
+            return float(lease["expires_at"]) - period * LEASE_REFRESH_RATIO - time.time()
+        return ONLINE_VERIFY_INTERVAL - self._seconds_since_verified()
+    
+    def _lease_refresh_loop(self, on_invalid):
+        failures = 0
+        while not self._refresh_stop.is_set():
+            if not self.license_data:
+                return
+            delay = self._seconds_until_refresh()
+            if delay > 0:
+                # 대기 중 extend_license 등으로 깨어나면 바로 갱신
+                woken = self._refresh_wake.wait(delay)
+                self._refresh_wake.clear()
+                if self._refresh_stop.is_set():
+                    return
+                if not woken and self._seconds_until_refresh() > 0:
+                    continue
+            
+            status, message = self._verify_online()
+            if status == 'offline':
+                failures += 1
+                self._refresh_wake.wait(min(LEASE_MAX_RETRY_DELAY, LEASE_RETRY_DELAY * (2 ** (failures - 1))))
+                self._refresh_wake.clear()
+                continue
+            failures = 0
+            if status == 'invalid':
+                logger.warning(f"라이선스 임대 갱신 거부: {message}")
+                if on_invalid:
+                    on_invalid(message)
+                return
     
     def is_licensed(self) -> bool:
         """라이선스가 유효한지 확인"""
@@ -242,7 +402,7 @@ class OnlineLicenseManager:
         license_key = self.license_data.get("license_key", "")
         
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/record_usage",
                 json={
                     "license_key": license_key,
@@ -288,7 +448,7 @@ class OnlineLicenseManager:
         license_key = self.license_data.get("license_key", "")
         
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/extend_license",
                 json={
                     "license_key": license_key,
@@ -302,9 +462,11 @@ class OnlineLicenseManager:
                 data = response.json()
                 if data.get('success'):
                     expiry_date = data.get('expiry_date')
-                    self.license_data["expiry_date"] = expiry_date
-                    with open(self.license_file, 'w', encoding='utf-8') as f:
-                        json.dump(self.license_data, f, indent=2, ensure_ascii=False)
+                    with self._lock:
+                        self.license_data["expiry_date"] = expiry_date
+                        self.write_license_file()
+                    # 임대는 이전 만료일까지만 발급되어 있으므로 바로 갱신
+                    self._refresh_wake.set()
                     logger.info("라이선스 연장 성공")
                     return True, f"라이선스가 {period_days}일 연장되었습니다."
                 else:
@@ -0,0 +1,313 @@
+"""
+송장번호 전송 속도 조절 모듈
+펌웨어의 입력 완료 응답을 기다린 뒤 다음 송장번호를 보내는 방식(ack),
+응답 시간과 재시도를 보고 간격을 자동 조절하는 방식(adaptive),
+기존의 고정 범위 랜덤 딜레이 방식(delay)을 같은 형태로 제공
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+import statistics
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from bluetooth_controller import DEFAULT_ACK_TIMEOUT, SendResult
+
+logger = logging.getLogger(__name__)
+
+# 전송 방식
+PACING_ACK = 'ack'              # 입력 완료 응답 후 다음 전송 (응답 대기 + 최소 간격)
+PACING_ADAPTIVE = 'adaptive'    # 입력 완료 응답 후 자동 조절한 간격만큼 대기
+PACING_DELAY = 'delay'          # 전송 후 min_between~max_between초 랜덤 대기
+PACING_MODES = (PACING_ACK, PACING_ADAPTIVE, PACING_DELAY)
+
+# settings.json의 flow_control 기본값
+DEFAULT_FLOW_CONTROL = {
+    "mode": PACING_ADAPTIVE,
+    "ack_timeout": DEFAULT_ACK_TIMEOUT,
+    "min_interval": 0.0,        # 전송 시작 간격 최소값 (초, 모바일 앱이 입력을 따라가지 못할 때 늘림)
+    "adaptive_min_delay": 0.0,  # adaptive 방식의 응답 후 대기 범위 (초)
+    "adaptive_max_delay": 3.0
+}
+
+# adaptive 방식 조절 값
+ADAPTIVE_INITIAL_DELAY = 1.0    # 기기 기록이 없을 때 시작 간격 (초)
+ADAPTIVE_DECREASE_STEP = 0.05   # 한 번에 성공할 때마다 줄이는 간격 (초, 덧셈 감소)
+ADAPTIVE_BACKOFF_FACTOR = 2.0   # 재시도/실패 시 간격 배수 (곱셈 증가)
+ADAPTIVE_BACKOFF_MIN_STEP = 0.25  # 간격이 0에 가까울 때도 최소 이만큼은 늘림 (초)
+ADAPTIVE_SLOW_RTT_RATIO = 1.5   # 응답 시간이 평소(최근 최소)의 이 배수를 넘으면 기기가 밀린 것으로 보고 간격 증가
+ADAPTIVE_SLOW_FACTOR = 1.25
+RTT_SMOOTHING = 0.2             # 응답 시간 지수 이동 평균 비율
+RTT_WINDOW = 20                 # 평소 응답 시간(최소값)을 구할 최근 응답 수 (우연히 빨랐던 응답은 밀려나 잊힘)
+RTT_MIN_SAMPLES = 5             # 이번 실행 응답이 이보다 적으면 지난 실행 기록을 함께 사용하고, 기록도 저장하지 않음
+
+PACING_STATE_FILE = Path(__file__).parent.parent / "config" / "pacing_state.json"
+
+
+class AdaptivePacer:
+    """
+    응답 시간/재시도 기반 전송 간격 조절 (AIMD)
+
+    - 한 번에 입력 완료: 간격을 조금씩 줄임 (덧셈 감소)
+    - 재시도/응답 없음/전송 실패: 간격을 배로 늘림 (곱셈 증가)
+    - 응답 시간이 평소보다 크게 늘어남: 간격을 조금 늘림
+    간격은 min_delay~max_delay 범위를 벗어나지 않음
+
+    평소 응답 시간은 최근 RTT_WINDOW건 중 최소값 (base_rtt 인자는 지난 실행 기록으로, 응답이 쌓이면 쓰지 않음)
+    """
+
+    def __init__(self, min_delay: float = 0.0, max_delay: float = 3.0, initial_delay: Optional[float] = None,
+                 base_rtt: Optional[float] = None):
+        self.min_delay = max(0.0, min_delay)
+        self.max_delay = max(self.min_delay, max_delay)
+        self.delay = self._clamp(ADAPTIVE_INITIAL_DELAY if initial_delay is None else initial_delay)
+        self.saved_rtt = base_rtt
+        self.rtts: "deque[float]" = deque(maxlen=RTT_WINDOW)   # 최근 한 번에 성공한 응답 시간
+        self.srtt: Optional[float] = None
+        self.sends = 0
+        self.retries = 0
+        self.failures = 0
+
+    def record(self, result: SendResult):
+        """전송 결과 반영"""
+        self.sends += 1
+        self.retries += max(0, result.attempts - 1)
+        if result.status == 'ignored':
+            # 인증/연결 문제이므로 속도와 무관
+            return
+        if not result.success:
+            self.failures += 1
+        if not result.success or result.attempts > 1:
+            self.delay = self._clamp(max(self.delay * ADAPTIVE_BACKOFF_FACTOR, self.delay + ADAPTIVE_BACKOFF_MIN_STEP))
+            return
+
+        rtt = result.elapsed
+        self.srtt = rtt if self.srtt is None else (1 - RTT_SMOOTHING) * self.srtt + RTT_SMOOTHING * rtt
+        self.rtts.append(rtt)
+        if self.srtt > self.base_rtt * ADAPTIVE_SLOW_RTT_RATIO:
+            self.delay = self._clamp(max(self.delay * ADAPTIVE_SLOW_FACTOR, self.delay + ADAPTIVE_DECREASE_STEP))
+        else:
+            self.delay = self._clamp(self.delay - ADAPTIVE_DECREASE_STEP)
+
+    @property
+    def base_rtt(self) -> Optional[float]:
+        """평소 응답 시간 (기기의 입력 자체에 걸리는 시간, 최근 응답 중 최소값)"""
+        samples = list(self.rtts)
+        if self.saved_rtt is not None and len(samples) < RTT_MIN_SAMPLES:
+            samples.append(self.saved_rtt)
+        return min(samples) if samples else None
+
+    def typical_rtt(self) -> Optional[float]:
+        """저장할 응답 시간 (최근 응답의 중앙값, 응답이 RTT_MIN_SAMPLES건 미만이면 None)"""
+        if len(self.rtts) < RTT_MIN_SAMPLES:
+            return None
+        return statistics.median(self.rtts)
+
+    def summary(self) -> str:
+        """결과 안내 문구"""
+        text = f"전송 간격 {self.delay:.2f}초"
+        if self.srtt is not None:
+            text += f", 평균 응답 {self.srtt:.2f}초"
+        if self.retries or self.failures:
+            text += f", 재시도 {self.retries}회, 실패 {self.failures}건"
+        return text
+
+    def _clamp(self, delay: float) -> float:
+        return min(self.max_delay, max(self.min_delay, delay))
+
+
+class PacingStore:
+    """기기별 전송 간격 기록 (다음 실행에서 이어서 사용)"""
+
+    def __init__(self, state_file: Path = PACING_STATE_FILE):
+        self.state_file = Path(state_file)
+        self._lock = threading.Lock()
+
+    def load(self, device: str) -> Optional[Dict]:
+        """기기 기록 ({'delay', 'base_rtt': 응답 시간 중앙값, 'updated_at'}, 없으면 None)"""
+        with self._lock:
+            return self._read().get(device)
+
+    def save(self, device: str, pacer: AdaptivePacer):
+        """기기 기록 저장 (응답이 적어 응답 시간을 정하기 어려우면 지난 기록 유지, 저장 실패는 무시)"""
+        with self._lock:
+            state = self._read()
+            rtt = pacer.typical_rtt()
+            if rtt is None:
+                rtt = (state.get(device) or {}).get('base_rtt')
+            state[device] = {
+                'delay': round(pacer.delay, 3),
+                'base_rtt': round(rtt, 3) if rtt is not None else None,
+                'updated_at': datetime.now().isoformat(timespec='seconds')
+            }
+            try:
+                self.state_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.state_file.with_suffix('.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, indent=2, ensure_ascii=False)
+                os.replace(temp_file, self.state_file)
+            except OSError as e:
+                logger.warning(f"전송 간격 기록 저장 실패: {e}")
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+
+class InvoiceSender:
+    """
+    송장번호 전송 (전송 방식에 따른 대기 + 재시도)
+
+    ack/adaptive 방식에서 펌웨어가 입력 완료 응답을 한 번도 보내지 않으면 (응답을 출력하지 않는 펌웨어)
+    첫 송장번호를 다시 보내지 않고 delay 방식으로 전환
+    """
+
+    def __init__(self, controller, mode: str = PACING_ACK, ack_timeout: float = DEFAULT_ACK_TIMEOUT,
+                 min_interval: float = 0.0, min_delay: float = 1.0, max_delay: float = 2.0,
+                 max_attempts: int = 3, retry_delay: float = 2.0,
+                 adaptive_min_delay: float = 0.0, adaptive_max_delay: float = 3.0,
+                 log: Optional[Callable[[str], None]] = None,
+                 should_continue: Optional[Callable[[], bool]] = None,
+                 store: Optional[PacingStore] = None):
+        """
+        초기화
+
+        Args:
+            controller: BluetoothController (연결된 상태)
+            mode: 'ack', 'adaptive' 또는 'delay'
+            ack_timeout: 입력 완료 응답 대기 (초)
+            min_interval: ack/adaptive 방식의 전송 시작 간격 최소값 (초)
+            min_delay, max_delay: delay 방식의 전송 간격 (초)
+            max_attempts: 송장번호당 최대 전송 횟수
+            retry_delay: 재전송 전 대기 (초)
+            adaptive_min_delay, adaptive_max_delay: adaptive 방식의 응답 후 대기 범위 (초)
+            log: 안내 메시지 콜백 (방식 전환 등)
+            should_continue: 대기/재전송 전에 확인할 함수 (False면 중단)
+            store: adaptive 방식의 기기별 간격 기록 (기본값: config/pacing_state.json)
+        """
+        if mode not in PACING_MODES:
+            raise ValueError(f"알 수 없는 전송 방식입니다: {mode} (사용 가능: {', '.join(PACING_MODES)})")
+        self.controller = controller
+        self.mode = mode
+        self.ack_timeout = ack_timeout
+        self.min_interval = min_interval
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.log = log
+        self.should_continue = should_continue
+        self._last_sent: Optional[float] = None     # 이전 전송 시작 시각
+        self._last_done: Optional[float] = None     # 이전 전송 완료(응답) 시각
+
+        self.pacer: Optional[AdaptivePacer] = None
+        self.store: Optional[PacingStore] = None
+        if mode == PACING_ADAPTIVE:
+            # 같은 기기(포트)의 지난 실행 간격에서 시작
+            self.store = store or PacingStore()
+            saved = self.store.load(self.device) or {}
+            self.pacer = AdaptivePacer(adaptive_min_delay, adaptive_max_delay,
+                                       initial_delay=saved.get('delay'), base_rtt=saved.get('base_rtt'))
+
+    @property
+    def device(self) -> str:
+        """기록 구분용 기기 이름 (AI BOT 시리얼 포트)"""
+        return str(getattr(self.controller, 'port', '') or 'default')
+
+    @classmethod
+    def from_config(cls, controller, config: Dict, **overrides) -> "InvoiceSender":
+        """settings.json 설정으로 생성 (overrides가 우선)"""
+        flow = {**DEFAULT_FLOW_CONTROL, **config.get("flow_control", {})}
+        delays = config.get("delays", {})
+        retry = config.get("retry", {})
+        options = {
+            "mode": flow["mode"],
+            "ack_timeout": float(flow["ack_timeout"]),
+            "min_interval": float(flow["min_interval"]),
+            "min_delay": float(delays.get("min_between", 1.0)),
+            "max_delay": float(delays.get("max_between", 2.0)),
+            "max_attempts": int(retry.get("max_attempts", 3)),
+            "retry_delay": float(retry.get("retry_delay", 2.0)),
+            "adaptive_min_delay": float(flow["adaptive_min_delay"]),
+            "adaptive_max_delay": float(flow["adaptive_max_delay"]),
+        }
+        options.update(overrides)
+        return cls(controller, **options)
+
+    def send(self, invoice: str) -> SendResult:
+        """송장번호 하나 전송 (이전 전송과의 간격을 맞춘 뒤 전송)"""
+        self._wait_turn()
+        self._last_sent = time.monotonic()
+        if self.mode == PACING_DELAY:
+            result = self._send_unacked(invoice)
+        else:
+            result = self._send_acked(invoice)
+            if self.mode == PACING_ADAPTIVE:
+                self.pacer.record(result)
+        self._last_done = time.monotonic()
+        return result
+
+    def finish(self) -> Optional[str]:
+        """전송 종료 (adaptive 방식은 기기별 간격 기록 저장 후 결과 안내 문구 반환)"""
+        if self.mode != PACING_ADAPTIVE or not self.pacer.sends:
+            return None
+        self.store.save(self.device, self.pacer)
+        return self.pacer.summary()
+
+    def _send_acked(self, invoice: str) -> SendResult:
+        # 응답을 받은 적이 없으면 한 번만 보내 봄 (응답 없는 펌웨어에서 같은 송장번호 중복 입력 방지)
+        probing = self.controller.ack_count == 0
+        result = self.controller.send_text_acked(
+            invoice,
+            timeout=self.ack_timeout,
+            max_attempts=1 if probing else self.max_attempts,
+            retry_delay=self.retry_delay,
+            should_continue=self.should_continue
+        )
+        # 'unknown': 받았다는 표시만 있고 완료 응답이 없는 펌웨어
+        if probing and result.status in ('timeout', 'unknown'):
+            self.mode = PACING_DELAY
+            message = (f"AI BOT 입력 완료 응답이 없어 고정 딜레이 방식({self.min_delay}~{self.max_delay}초)으로 "
+                       f"전환합니다.")
+            logger.warning(message)
+            if self.log:
+                self.log(f"⚠️ {message}")
+            # 전송은 되었으므로 기존 방식과 같이 성공으로 처리
+            return SendResult(True, 'sent', result.attempts, result.elapsed)
+        return result
+
+    def _send_unacked(self, invoice: str) -> SendResult:
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                if self.should_continue and not self.should_continue():
+                    break
+                time.sleep(self.retry_delay)
+            if self.controller.send_text(invoice):
+                return SendResult(True, 'sent', attempt, 0.0)
+            logger.warning(f"전송 실패 ({attempt}/{self.max_attempts}): {invoice}")
+        return SendResult(False, 'error', self.max_attempts, 0.0)
+
+    def _wait_turn(self):
+        if self._last_sent is None:
+            return
+        # 이전 전송 시작부터의 간격 (ack 방식은 응답을 이미 기다렸으므로 최소 간격만 맞춤)
+        if self.mode == PACING_ACK:
+            interval = self.min_interval
+        elif self.mode == PACING_ADAPTIVE:
+            # 응답 후 조절한 간격만큼 대기 (최소 간격도 지킴)
+            interval = max(self.min_interval, (self._last_done - self._last_sent) + self.pacer.delay)
+        else:
+            interval = random.uniform(self.min_delay, self.max_delay)
+        delay = interval - (time.monotonic() - self._last_sent)
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,214 @@
+"""
+세션 관리 모듈
+버전 확인, 사용자 정보 갱신, 라이선스 확인을 작업 스레드에서 주기적으로 실행하고
+결과를 스레드 안전한 큐로 GUI에 전달 (화면은 네트워크 응답을 기다리지 않음)
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from user_auth_manager import DEV_MODE, parse_version_info
+
+logger = logging.getLogger(__name__)
+
+# 작업별 실행 주기 (초)
+VERSION_CHECK_INTERVAL = 6 * 3600
+USER_INFO_INTERVAL = 10 * 60
+LICENSE_CHECK_INTERVAL = 3600
+# 실패 후 재시도 대기 (초, 실패할 때마다 2배)
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 1800
+
+
+class SessionEvent(NamedTuple):
+    """작업 결과 (GUI 큐로 전달)"""
+    kind: str               # 'version', 'user_info', 'license'
+    success: bool
+    message: str
+    data: Optional[Dict]    # version: 버전 정보, user_info: 사용자 정보, license: 라이선스 정보
+
+
+class SessionManager:
+    """서버 확인 작업을 작업 스레드에서 예약 실행"""
+
+    def __init__(self, auth_manager, client_version: str, license_manager=None):
+        """
+        초기화
+
+        Args:
+            auth_manager: UserAuthManager
+            client_version: 프로그램 버전 (버전 확인용)
+            license_manager: OnlineLicenseManager (선택사항, 라이선스 임대 확인/갱신)
+        """
+        self.auth_manager = auth_manager
+        self.client_version = client_version
+        self.license_manager = license_manager
+        self.events: "queue.Queue[SessionEvent]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._user_id: Optional[str] = None
+        # 작업별 다음 실행 시각 (monotonic, None이면 실행 안 함)
+        self._due: Dict[str, Optional[float]] = {
+            'version': 0.0,
+            'user_info': None,
+            'license': 0.0 if license_manager else None
+        }
+        self._failures: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """작업 스레드 시작 (버전 확인, 라이선스 확인은 바로 실행)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-manager", daemon=True)
+        self._thread.start()
+        if self.license_manager:
+            # 임대 만료 전 갱신은 라이선스 관리자의 갱신 스레드가 담당
+            self.license_manager.start_lease_refresh(
+                on_invalid=lambda message: self.events.put(SessionEvent('license', False, message, None))
+            )
+
+    def stop(self):
+        """작업 스레드 종료"""
+        self._stop.set()
+        self._wake.set()
+        if self.license_manager:
+            self.license_manager.stop_lease_refresh()
+
+    def set_user(self, user_id: Optional[str]):
+        """
+        로그인 사용자 변경 (로그아웃 시 None)
+        로그인 응답에 사용자 정보가 있으므로 첫 갱신은 USER_INFO_INTERVAL 뒤에 실행
+        """
+        with self._lock:
+            self._user_id = user_id
+            self._due['user_info'] = time.monotonic() + USER_INFO_INTERVAL if user_id else None
+            self._failures.pop('user_info', None)
+
+    def refresh_now(self, *kinds: str):
+        """지정한 작업을 바로 실행 (사용자 정보는 로그인 상태일 때만)"""
+        with self._lock:
+            for kind in kinds:
+                if kind == 'user_info' and not self._user_id:
+                    continue
+                if kind == 'license' and not self.license_manager:
+                    continue
+                self._due[kind] = 0.0
+        self._wake.set()
+
+    def report_user_info(self, user_id: str, user_info: Dict):
+        """
+        다른 요청(작업 전 확인 batch 등)으로 받은 사용자 정보 반영 (어느 스레드에서나 호출 가능)
+        다음 주기 갱신은 지금부터 USER_INFO_INTERVAL 뒤로 미룸
+        """
+        self._publish('user_info', True, '', user_info, user_id=user_id)
+
+    def poll_events(self, max_events: int = 50) -> List[SessionEvent]:
+        """쌓인 결과 꺼내기 (메인 스레드에서 호출, 기다리지 않음)"""
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due_kinds = [kind for kind, due in self._due.items() if due is not None and due <= now]
+                user_id = self._user_id
+            if due_kinds:
+                try:
+                    self._run_tasks(due_kinds, user_id)
+                except Exception as e:
+                    logger.error(f"세션 작업 오류: {e}", exc_info=True)
+                    for kind in due_kinds:
+                        self._reschedule(kind, False)
+
+            with self._lock:
+                upcoming = [due for due in self._due.values() if due is not None]
+            delay = max(0.0, min(upcoming) - time.monotonic()) if upcoming else 60.0
+            self._wake.wait(min(delay, 60.0))
+            self._wake.clear()
+
+    def _run_tasks(self, kinds: List[str], user_id: Optional[str]):
+        server_kinds = [kind for kind in kinds if kind == 'version' or (kind == 'user_info' and user_id)]
+        if len(server_kinds) > 1 and not DEV_MODE:
+            # 버전 확인 + 사용자 정보를 한 번의 요청으로 처리
+            self._run_batch(user_id)
+        else:
+            if 'version' in server_kinds:
+                self._run_version_check()
+            if 'user_info' in server_kinds:
+                self._run_user_info(user_id)
+        if 'license' in kinds:
+            self._run_license_check()
+
+    def _run_version_check(self):
+        success, needs_update, message, version_info = self.auth_manager.check_version(self.client_version)
+        self._publish('version', success, message, version_info)
+
+    def _run_user_info(self, user_id: str):
+        user_info = self.auth_manager.get_user_info(user_id)
+        self._publish('user_info', user_info is not None, '' if user_info else '사용자 정보 조회 실패', user_info,
+                      user_id=user_id)
+
+    def _run_batch(self, user_id: str):
+        success, message, results = self.auth_manager.batch([
+            ("check_version", {"version": self.client_version}),
+            ("user_info", {"user_id": user_id})
+        ], stop_on_error=False)
+        by_op = {result.get('op'): result for result in results}
+
+        version_result = by_op.get('check_version') or {}
+        version_data = version_result.get('data') or {}
+        if version_result.get('success'):
+            self._publish('version', True, '', parse_version_info(version_data, self.client_version))
+        else:
+            self._publish('version', False, version_data.get('message', message), None)
+
+        user_result = by_op.get('user_info') or {}
+        user_data = user_result.get('data') or {}
+        if user_result.get('success') and user_data.get('user_info'):
+            self._publish('user_info', True, '', user_data['user_info'], user_id=user_id)
+        else:
+            self._publish('user_info', False, user_data.get('message', message), None, user_id=user_id)
+
+    def _run_license_check(self):
+        # 유효한 임대가 있으면 서버에 접속하지 않음
+        valid, message = self.license_manager.verify_license()
+        self._publish('license', valid, message, self.license_manager.get_license_info())
+
+    def _publish(self, kind: str, success: bool, message: str, data: Optional[Dict], user_id: Optional[str] = None):
+        if kind == 'user_info':
+            with self._lock:
+                if user_id != self._user_id:
+                    # 조회하는 동안 로그아웃/다른 사용자로 로그인
+                    return
+        self._reschedule(kind, success)
+        self.events.put(SessionEvent(kind, success, message, data))
+
+    def _reschedule(self, kind: str, success: bool):
+        intervals = {
+            'version': VERSION_CHECK_INTERVAL,
+            'user_info': USER_INFO_INTERVAL,
+            'license': LICENSE_CHECK_INTERVAL
+        }
+        with self._lock:
+            if self._due.get(kind) is None:
+                return
+            if success:
+                self._failures.pop(kind, None)
+                delay = intervals[kind]
+            else:
+                failures = self._failures.get(kind, 0) + 1
+                self._failures[kind] = failures
+                delay = min(MAX_RETRY_DELAY, RETRY_DELAY * (2 ** (failures - 1)), intervals[kind])
+            self._due[kind] = time.monotonic() + delay
@@ -0,0 +1,134 @@
+"""
+화면 갱신 이벤트 모듈
+작업 스레드는 로그/진행 상황을 큐에 넣기만 하고, 메인 스레드가 주기적으로 모아서 한 번에 화면에 반영
+(Tk 위젯은 메인 스레드에서만 변경, 전송 속도와 관계없이 한 번에 처리하는 양이 일정)
+"""
+
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# 화면 로그 최대 줄 수 (넘으면 오래된 줄부터 삭제, 전체 로그는 파일에 저장)
+MAX_LOG_LINES = 1000
+# 한 번에 처리할 작업 요청 수
+MAX_CALLS_PER_DRAIN = 20
+
+LOG_DIR = Path(__file__).parent.parent / "logs"
+
+
+def create_file_logger(log_dir: Path = LOG_DIR) -> logging.Logger:
+    """화면 로그 전체를 저장할 파일 로거 (logs/gui_YYYYMMDD.log)"""
+    logger = logging.getLogger('hanjin_gui')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        try:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            handler = logging.FileHandler(log_dir / f"gui_{datetime.now().strftime('%Y%m%d')}.log", encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+            logger.addHandler(handler)
+        except OSError:
+            # 로그 폴더를 만들 수 없으면 화면 로그만 사용
+            logger.addHandler(logging.NullHandler())
+    return logger
+
+
+class ProgressState:
+    """진행 상황 (마지막 값만 유지)"""
+
+    def __init__(self):
+        self.text: Optional[str] = None
+        self.value: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+
+class UiEventBus:
+    """
+    로그/진행 상황/메인 스레드 작업 전달
+
+    - log(): 어느 스레드에서나 호출 가능, 파일에는 바로 기록하고 화면 반영은 drain()에서
+    - progress(): 여러 번 호출해도 마지막 값만 반영
+    - call(): 메인 스레드에서 실행할 함수 (메시지 상자, 버튼 상태 변경 등)
+    """
+
+    def __init__(self, file_logger: Optional[logging.Logger] = None, max_lines: int = MAX_LOG_LINES):
+        self.file_logger = file_logger
+        self.max_lines = max_lines
+        self._lines: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._calls: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._progress_lock = threading.Lock()
+        self._progress: Optional[ProgressState] = None
+
+    def log(self, message: str):
+        """로그 추가"""
+        line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        self._lines.put(line)
+        if self.file_logger:
+            self.file_logger.info(message)
+
+    def progress(self, text: Optional[str] = None, value: Optional[float] = None,
+                 maximum: Optional[float] = None):
+        """진행 상황 변경 (None인 항목은 그대로)"""
+        with self._progress_lock:
+            if self._progress is None:
+                self._progress = ProgressState()
+            if text is not None:
+                self._progress.text = text
+            if value is not None:
+                self._progress.value = value
+            if maximum is not None:
+                self._progress.maximum = maximum
+
+    def call(self, func: Callable, *args, **kwargs):
+        """메인 스레드에서 실행할 함수 등록"""
+        self._calls.put((func, args, kwargs))
+
+    def drain_lines(self) -> List[str]:
+        """
+        쌓인 로그 꺼내기 (메인 스레드)
+        화면에는 최대 max_lines줄만 남으므로 그보다 많이 쌓였으면 마지막 줄만 반환
+        """
+        lines = deque(maxlen=self.max_lines)
+        while True:
+            try:
+                lines.append(self._lines.get_nowait())
+            except queue.Empty:
+                break
+        return list(lines)
+
+    def drain_progress(self) -> Optional[ProgressState]:
+        """마지막 진행 상황 꺼내기 (바뀌지 않았으면 None)"""
+        with self._progress_lock:
+            state, self._progress = self._progress, None
+        return state
+
+    def drain_calls(self, max_calls: int = MAX_CALLS_PER_DRAIN) -> List[tuple]:
+        """실행할 함수 꺼내기"""
+        calls = []
+        while len(calls) < max_calls:
+            try:
+                calls.append(self._calls.get_nowait())
+            except queue.Empty:
+                break
+        return calls
+
+
+def append_log_lines(text_widget, lines: List[str], max_lines: int = MAX_LOG_LINES):
+    """
+    Text 위젯에 로그를 한 번에 추가하고 max_lines줄만 남김 (메인 스레드)
+    사용자가 위로 스크롤해 보고 있으면 맨 아래로 이동하지 않음
+    """
+    if not lines:
+        return
+    at_bottom = text_widget.yview()[1] >= 0.999
+    text_widget.insert('end', "\n".join(lines) + "\n")
+    # 마지막 줄 다음의 빈 줄이 있으므로 실제 줄 수 = end - 2
+    line_count = int(text_widget.index('end-1c').split('.')[0]) - 1
+    if line_count > max_lines:
+        text_widget.delete('1.0', f"{line_count - max_lines + 1}.0")
+    if at_bottom:
+        text_widget.see('end')
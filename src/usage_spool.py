@@ -0,0 +1,249 @@
+"""
+사용량 보관함 모듈
+사용 통계를 로컬 파일에 먼저 기록하고, 백그라운드에서 서버로 일괄 전송
+(인터넷이 끊겨도 통계가 사라지지 않고, 작업 스레드는 네트워크를 기다리지 않음)
+"""
+
+import os
+import json
+import uuid
+import logging
+import datetime
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+SPOOL_FILE = CONFIG_DIR / "usage_spool.jsonl"
+ACK_FILE = CONFIG_DIR / "usage_spool_acked.txt"
+
+
+class UsageSpool:
+    """
+    추가 전용 사용량 보관함
+
+    - usage_spool.jsonl: 기록 한 줄씩 추가 (report_id 포함)
+    - usage_spool_acked.txt: 서버 반영이 끝난 report_id 한 줄씩 추가
+    전송이 끝나면 남은 기록만 새 파일로 옮겨 정리
+    """
+
+    def __init__(self, spool_file: Path = SPOOL_FILE, ack_file: Path = ACK_FILE):
+        self.spool_file = Path(spool_file)
+        self.ack_file = Path(ack_file)
+        self._lock = threading.Lock()
+
+    def append(self, user_id: str, total_invoices: int, success_count: int, fail_count: int,
+               mac_address: Optional[str] = None, hardware_id: Optional[str] = None) -> str:
+        """
+        사용량 기록 추가 (디스크에 기록된 후 반환)
+
+        Returns:
+            report_id (서버 중복 방지 키)
+        """
+        record = {
+            "report_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "total_invoices": total_invoices,
+            "success_count": success_count,
+            "fail_count": fail_count,
+            "mac_address": mac_address.upper() if mac_address else "",
+            "hardware_id": hardware_id or "",
+            "recorded_at": datetime.datetime.now().astimezone().isoformat(timespec='seconds')
+        }
+        with self._lock:
+            self._append_lines(self.spool_file, [json.dumps(record, ensure_ascii=False)])
+        return record["report_id"]
+
+    def pending(self) -> List[Dict]:
+        """서버에 아직 반영되지 않은 기록 (추가된 순서)"""
+        with self._lock:
+            return self._pending()
+
+    def mark_done(self, report_ids: Iterable[str]):
+        """서버 반영(또는 폐기)이 끝난 기록 표시 후 보관함 정리"""
+        report_ids = [report_id for report_id in report_ids if report_id]
+        if not report_ids:
+            return
+        with self._lock:
+            self._append_lines(self.ack_file, report_ids)
+            self._compact()
+
+    def _append_lines(self, path: Path, lines: List[str]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 기록 중 종료되어 마지막 줄이 잘린 경우 새 기록이 그 줄에 붙지 않도록 줄바꿈 추가
+        prefix = ''
+        if path.exists() and path.stat().st_size > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    prefix = '\n'
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(prefix + ''.join(f"{line}\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_records(self) -> List[Dict]:
+        if not self.spool_file.exists():
+            return []
+        records = []
+        with open(self.spool_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 기록 중 종료되어 잘린 줄
+                    continue
+                if isinstance(record, dict) and record.get("report_id"):
+                    records.append(record)
+        return records
+
+    def _read_acked(self) -> set:
+        if not self.ack_file.exists():
+            return set()
+        with open(self.ack_file, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def _pending(self) -> List[Dict]:
+        acked = self._read_acked()
+        return [record for record in self._read_records() if record["report_id"] not in acked]
+
+    def _compact(self):
+        # 남은 기록만 새 파일에 쓴 뒤 교체하고 나서 완료 목록 삭제
+        # (중간에 종료되어도 완료 목록에 남은 키는 보관함에 없으므로 무해)
+        remaining = self._pending()
+        if remaining:
+            temp_file = self.spool_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record, ensure_ascii=False) + "\n" for record in remaining))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.spool_file)
+        elif self.spool_file.exists():
+            self.spool_file.unlink()
+        if self.ack_file.exists():
+            self.ack_file.unlink()
+
+
+class UsageUploader:
+    """보관함 기록을 백그라운드 스레드에서 서버로 일괄 전송"""
+
+    def __init__(self, spool: UsageSpool, auth_manager, batch_size: int = 50,
+                 interval: float = 60.0, retry_delay: float = 15.0, max_retry_delay: float = 600.0,
+                 on_result: Optional[Callable[[int, int], None]] = None):
+        """
+        초기화
+
+        Args:
+            spool: 사용량 보관함
+            auth_manager: UserAuthManager (record_usage_bulk 사용)
+            batch_size: 한 번에 보낼 최대 건수
+            interval: 보관함 확인 주기 (초)
+            retry_delay: 전송 실패 후 첫 재시도 대기 (초, 실패할 때마다 2배)
+            max_retry_delay: 재시도 대기 최대값 (초)
+            on_result: 전송 후 호출 (반영된 건수, 남은 건수) - 전송 스레드에서 호출됨
+        """
+        self.spool = spool
+        self.auth_manager = auth_manager
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.on_result = on_result
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """전송 스레드 시작"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-uploader", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """대기 중인 전송 스레드를 깨워 바로 전송"""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        """전송 스레드 종료 (남은 기록은 다음 실행 때 전송)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                drained = self.drain()
+            except Exception as e:
+                logger.error(f"사용량 전송 오류: {e}")
+                drained = False
+
+            if drained:
+                failures = 0
+                delay = self.interval
+            else:
+                failures += 1
+                delay = min(self.max_retry_delay, self.retry_delay * (2 ** (failures - 1)))
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def drain(self) -> bool:
+        """
+        보관함이 빌 때까지 전송
+
+        - 사용자 ID가 없는 기록은 보내지 않고 폐기
+        - 서버가 기록별로 거부한 기록(rejected)만 폐기, 요청 전체가 실패하면 남겨 두고 다음에 다시 전송
+        - 한 사용자 기록 전송이 실패하면 이번에는 그 사용자 기록을 건너뛰고 다른 사용자 기록을 전송
+
+        Returns:
+            모두 전송했으면 True (서버 연결 실패 등으로 남은 기록이 있으면 False)
+        """
+        failed_users = set()
+        while not self._stop.is_set():
+            pending = self.spool.pending()
+
+            # 사용자 ID가 없는 기록은 서버가 받을 수 없으므로 보내지 않고 폐기
+            orphans = [record["report_id"] for record in pending if not record.get("user_id")]
+            if orphans:
+                logger.warning(f"사용자 ID가 없는 사용량 기록 {len(orphans)}건 폐기")
+                self.spool.mark_done(orphans)
+                pending = [record for record in pending if record.get("user_id")]
+
+            # 이번 전송에서 실패한 사용자 기록은 건너뜀 (다른 사용자 기록이 막히지 않도록)
+            pending = [record for record in pending if record["user_id"] not in failed_users]
+            if not pending:
+                return not failed_users
+
+            # 같은 사용자 기록끼리 묶어서 전송 (보관함 순서 유지)
+            user_id = pending[0]["user_id"]
+            batch = [record for record in pending if record["user_id"] == user_id][:self.batch_size]
+            records = [{key: value for key, value in record.items() if key != "user_id"} for record in batch]
+
+            success, message, result = self.auth_manager.record_usage_bulk(user_id, records)
+            if result is None:
+                logger.warning(f"사용량 전송 실패 (나중에 다시 전송): {message}")
+                failed_users.add(user_id)
+                continue
+
+            # 서버가 개별로 거부한 기록만 폐기 (다시 보내도 받아들여지지 않음)
+            for rejected in result.get("rejected", []):
+                logger.warning(f"사용량 기록 거부 ({rejected.get('report_id')}): {rejected.get('message')}")
+            done = list(result.get("accepted", [])) + list(result.get("duplicates", []))
+            done += [rejected.get("report_id") for rejected in result.get("rejected", [])]
+            self.spool.mark_done(done)
+
+            if self.on_result:
+                try:
+                    self.on_result(len(result.get("accepted", [])), len(pending) - len(batch))
+                except Exception as e:
+                    logger.debug(f"사용량 전송 알림 오류: {e}")
+
+            if not set(done) & {record["report_id"] for record in batch}:
+                # 서버가 아무 기록도 처리하지 않음 (무한 반복 방지)
+                failed_users.add(user_id)
+        return False
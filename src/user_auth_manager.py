@@ -7,8 +7,9 @@ import json
 import datetime
 import requests
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
 import logging
+from http_client import post_json
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,18 @@ if DEV_MODE_FILE.exists():
     except:
         pass
 
+def parse_version_info(data: Dict, client_version: str) -> Dict:
+    """check_version 응답을 버전 정보 딕셔너리로 변환 (batch 결과에도 사용)"""
+    return {
+        'current_version': data.get('current_version', ''),
+        'min_required_version': data.get('min_required_version', ''),
+        'force_update_enabled': data.get('force_update_enabled', False),
+        'download_url': data.get('download_url', ''),
+        'update_message': data.get('update_message', ''),
+        'needs_update': data.get('needs_update', False),
+        'client_version': data.get('client_version', client_version)
+    }
+
 class UserAuthManager:
     """사용자 인증 관리 클래스"""
     
@@ -116,7 +129,7 @@ class UserAuthManager:
             }
             # PC 프로그램이므로 device_uuid는 전송하지 않음 (모바일 앱 전용)
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/login",
                 json=payload,
                 timeout=10
@@ -171,7 +184,7 @@ class UserAuthManager:
             (성공 여부, 메시지)
         """
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/logout",
                 json={"user_id": user_id},
                 timeout=5
@@ -220,10 +233,11 @@ class UserAuthManager:
             if hardware_id:
                 payload["hardware_id"] = hardware_id
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/verify_mac_address",
                 json=payload,
-                timeout=5
+                timeout=5,
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -258,10 +272,11 @@ class UserAuthManager:
             return {"user_id": user_id, "name": "개발자", "is_active": True}
         
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/user_info",
                 json={"user_id": user_id},
-                timeout=5
+                timeout=5,
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -297,7 +312,7 @@ class UserAuthManager:
                 "phone": phone
             }
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/register",
                 json=payload,
                 timeout=10
@@ -366,7 +381,7 @@ class UserAuthManager:
             if hardware_id:
                 payload["hardware_id"] = hardware_id
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/record_user_usage",
                 json=payload,
                 timeout=10
@@ -389,6 +404,51 @@ class UserAuthManager:
             logger.error(f"사용량 기록 오류: {e}")
             return False, f"오류가 발생했습니다: {str(e)}"
     
+    def record_usage_bulk(self, user_id: str, records: List[Dict]) -> Tuple[bool, str, Optional[Dict]]:
+        """
+        사용량 일괄 기록 (보관함 전송용, report_id로 중복 집계 방지)
+        
+        Args:
+            user_id: 사용자 ID
+            records: [{"report_id", "total_invoices", "success_count", "fail_count",
+                       "mac_address", "hardware_id", "recorded_at"}, ...]
+            
+        Returns:
+            (성공 여부, 메시지, 처리 결과)
+            - 처리 결과: {"accepted", "duplicates", "rejected"} - 나중에 다시 보내야 하면 None
+              (요청 전체가 거부된 경우도 None - 기록별 거부는 rejected에만 담김)
+        """
+        if not user_id:
+            return False, "사용자 ID가 필요합니다.", None
+        
+        try:
+            response = post_json(
+                f"{self.server_url}/api/record_user_usage_bulk",
+                json={"user_id": user_id, "records": records},
+                timeout=10
+            )
+            
+            try:
+                data = response.json()
+            except (ValueError, json.JSONDecodeError):
+                return False, "서버 응답을 처리할 수 없습니다.", None
+            
+            if response.status_code == 200 and data.get('success'):
+                return True, data.get('message', ''), {
+                    "accepted": data.get('accepted', []),
+                    "duplicates": data.get('duplicates', []),
+                    "rejected": data.get('rejected', [])
+                }
+            return False, data.get('message', '서버 오류가 발생했습니다.'), None
+                
+        except requests.exceptions.ConnectionError:
+            return False, "서버에 연결할 수 없습니다.", None
+        except requests.exceptions.Timeout:
+            return False, "서버 응답 시간이 초과되었습니다.", None
+        except Exception as e:
+            logger.error(f"사용량 일괄 기록 오류: {e}")
+            return False, f"오류가 발생했습니다: {str(e)}", None
+    
     def send_admin_message(self, category: str, title: str, content: str, phone: str = "") -> Tuple[bool, str]:
         """
         관리자에게 메시지 전송
@@ -418,7 +478,7 @@ class UserAuthManager:
             if phone:
                 payload["phone"] = phone
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/send_admin_message",
                 json=payload,
                 timeout=10
@@ -498,27 +558,13 @@ class UserAuthManager:
                 "user_id": user_id
             }
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/check_token_owner",
                 json=payload,
-                timeout=10
+                timeout=10,
+                idempotent=True
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success'):
-                    match = data.get('match', False)
-                    message = data.get('message', '')
-                    token_user_id = data.get('token_user_id')  # 서버에서 반환하는 토큰 소유자 ID
-                    is_expired = data.get('is_expired', False)  # 토큰 만료 여부
-                    is_user_match = data.get('is_user_match', False)  # 아이디 일치 여부
-                    # 추가 정보를 message에 포함하여 반환 (또는 별도 반환값으로 확장 가능)
-                    return True, match, message, token_user_id, is_expired, is_user_match
-                else:
-                    return False, False, data.get('message', '확인 실패'), None, False, False
-            else:
-                data = response.json()
-                return False, False, data.get('message', '서버 오류가 발생했습니다.'), None
+            return self._parse_token_owner(response.status_code, response.json())
                 
         except requests.exceptions.ConnectionError:
             logger.error("서버 연결 실패")
@@ -530,6 +576,49 @@ class UserAuthManager:
             logger.error(f"토큰 소유자 확인 오류: {e}", exc_info=True)
             return False, False, f"오류가 발생했습니다: {str(e)}", None, False, False
     
+    @staticmethod
+    def _parse_token_owner(status_code: int, data: Dict) -> Tuple[bool, bool, str, Optional[str], bool, bool]:
+        """check_token_owner 응답 처리 (batch 결과에도 사용)"""
+        if status_code == 200 and data.get('success'):
+            match = data.get('match', False)
+            message = data.get('message', '')
+            token_user_id = data.get('token_user_id')  # 서버에서 반환하는 토큰 소유자 ID
+            is_expired = data.get('is_expired', False)  # 토큰 만료 여부
+            is_user_match = data.get('is_user_match', False)  # 아이디 일치 여부
+            return True, match, message, token_user_id, is_expired, is_user_match
+        if status_code == 200:
+            return False, False, data.get('message', '확인 실패'), None, False, False
+        return False, False, data.get('message', '서버 오류가 발생했습니다.'), None, False, False
+    
+    def check_token_owner_with_user_info(self, access_token: str, user_id: str) -> Tuple[Tuple, Optional[Dict]]:
+        """
+        토큰 소유자 확인 + 사용자 정보 조회를 한 번의 요청(/api/batch)으로 처리 (작업 시작 전 호출)
+        
+        Args:
+            access_token: 액세스 토큰
+            user_id: PC 프로그램 로그인 사용자 ID
+            
+        Returns:
+            (check_token_owner()와 같은 형식의 결과, 사용자 정보 - 조회 실패 시 None)
+        """
+        if not access_token or not user_id:
+            return (False, False, "토큰과 사용자 ID가 필요합니다.", None, False, False), None
+        
+        success, message, results = self.batch([
+            ("check_token_owner", {"access_token": access_token, "user_id": user_id}),
+            ("user_info", {"user_id": user_id})
+        ], stop_on_error=False)
+        by_op = {result.get('op'): result for result in results}
+        
+        token_result = by_op.get('check_token_owner')
+        if not token_result or token_result.get('skipped'):
+            return (False, False, message or "확인 실패", None, False, False), None
+        token_owner = self._parse_token_owner(token_result.get('status') or 500, token_result.get('data') or {})
+        
+        user_result = by_op.get('user_info') or {}
+        user_info = (user_result.get('data') or {}).get('user_info') if user_result.get('success') else None
+        return token_owner, user_info
+    
     def get_payment_account_info(self) -> Tuple[bool, Optional[Dict], str]:
         """
         입금 계좌정보 조회
@@ -538,10 +627,11 @@ class UserAuthManager:
             (성공 여부, 계좌정보 딕셔너리, 메시지)
         """
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/get_payment_account_info",
                 json={},
-                timeout=10
+                timeout=10,
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -586,7 +676,7 @@ class UserAuthManager:
                 "depositor_name": depositor_name
             }
             
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/request_payment_confirmation",
                 json=payload,
                 timeout=10
@@ -630,24 +720,17 @@ class UserAuthManager:
             - version_info: 버전 정보 딕셔너리 (성공 시)
         """
         try:
-            response = requests.post(
+            response = post_json(
                 f"{self.server_url}/api/check_version",
                 json={"version": client_version},
-                timeout=10
+                timeout=10,
+                idempotent=True
             )
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get('success'):
-                    version_info = {
-                        'current_version': data.get('current_version', ''),
-                        'min_required_version': data.get('min_required_version', ''),
-                        'force_update_enabled': data.get('force_update_enabled', False),
-                        'download_url': data.get('download_url', ''),
-                        'update_message': data.get('update_message', ''),
-                        'needs_update': data.get('needs_update', False),
-                        'client_version': data.get('client_version', client_version)
-                    }
+                    version_info = parse_version_info(data, client_version)
                     needs_update = version_info['needs_update'] and version_info['force_update_enabled']
                     return True, needs_update, '', version_info
                 else:
@@ -671,3 +754,47 @@ class UserAuthManager:
             # 예외 발생 시 차단하지 않음
             return False, False, f"버전 체크 중 오류가 발생했습니다: {str(e)}", None
 
+    
+    def batch(self, operations: List[Tuple[str, Dict]], stop_on_error: bool = True) -> Tuple[bool, str, List[Dict]]:
+        """
+        여러 작업을 한 번의 요청으로 처리 (서버에서 한 트랜잭션으로 실행)
+        
+        Args:
+            operations: [(작업 이름, 요청 데이터), ...] 순서대로 실행
+                        작업: check_version, login, user_info, check_token_owner, record_user_usage
+                        예: [("check_version", {"version": "1.0.0"}), ("user_info", {"user_id": "abc"})]
+            stop_on_error: 실패한 작업 이후의 작업은 건너뜀
+            
+        Returns:
+            (성공 여부, 메시지, 작업별 결과 리스트)
+            - 작업별 결과: {"op", "success", "status", "skipped", "data"(해당 API 응답)}
+        """
+        try:
+            response = post_json(
+                f"{self.server_url}/api/batch",
+                json={
+                    "operations": [{"op": op, "params": params} for op, params in operations],
+                    "stop_on_error": stop_on_error
+                },
+                timeout=10
+            )
+            
+            try:
+                data = response.json()
+            except (ValueError, json.JSONDecodeError):
+                return False, "서버 응답을 처리할 수 없습니다.", []
+            
+            results = data.get('results', [])
+            if response.status_code == 200:
+                return bool(data.get('success')), data.get('message', ''), results
+            return False, data.get('message', '서버 오류가 발생했습니다.'), results
+                
+        except requests.exceptions.ConnectionError:
+            logger.error("서버 연결 실패 (일괄 요청)")
+            return False, "서버에 연결할 수 없습니다.", []
+        except requests.exceptions.Timeout:
+            logger.error("서버 응답 시간 초과 (일괄 요청)")
+            return False, "서버 응답 시간이 초과되었습니다.", []
+        except Exception as e:
+            logger.error(f"일괄 요청 오류: {e}", exc_info=True)
+            return False, f"오류가 발생했습니다: {str(e)}", []
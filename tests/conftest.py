@@ -0,0 +1,9 @@
+"""
+테스트 공통 설정
+src 모듈은 서로 경로 없이 import하므로 (gui_app.py와 같은 방식) src를 경로에 추가
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -0,0 +1,88 @@
+"""bluetooth_controller.BluetoothController 확인 응답 테스트 (가짜 시리얼 포트 사용)"""
+
+import threading
+import time
+
+from bluetooth_controller import BluetoothController
+
+
+class FakeSerial:
+    """전송할 때마다 replies에서 다음 응답 줄 목록을 꺼내 읽기 버퍼에 넣는 시리얼 포트"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.written = []
+        self.buffer = []
+        self.is_open = True
+
+    def write(self, data: bytes):
+        self.written.append(data.decode('utf-8').strip())
+        lines = self.replies.pop(0) if self.replies else []
+        self.buffer.extend(f"{line}\r\n".encode('utf-8') for line in lines)
+
+    def flush(self):
+        pass
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.buffer)
+
+    def readline(self) -> bytes:
+        return self.buffer.pop(0) if self.buffer else b''
+
+
+def make_controller(replies) -> BluetoothController:
+    controller = BluetoothController('COM_TEST')
+    controller.serial_conn = FakeSerial(replies)
+    return controller
+
+
+def test_ack_after_echo():
+    controller = make_controller([["→ 수신: 123", "✓ 전송 완료"]])
+    result = controller.send_text_acked("123", timeout=0.2)
+    assert (result.success, result.status, result.attempts) == (True, 'ack', 1)
+    assert controller.ack_count == 1
+
+
+def test_no_echo_is_resent():
+    controller = make_controller([[], ["→ 수신: 123", "✓ 전송 완료"]])
+    result = controller.send_text_acked("123", timeout=0.1, retry_delay=0.0)
+    assert (result.success, result.attempts) == (True, 2)
+    assert controller.serial_conn.written == ["123", "123"]
+
+
+def test_echo_without_ack_is_not_resent():
+    controller = make_controller([["→ 수신: 123"], ["→ 수신: 123", "✓ 전송 완료"]])
+    result = controller.send_text_acked("123", timeout=0.1, retry_delay=0.0)
+    assert (result.success, result.status, result.attempts) == (False, 'unknown', 1)
+    assert controller.serial_conn.written == ["123"]
+
+
+def test_echo_of_other_text_does_not_block_resend():
+    controller = make_controller([["→ 수신: 999"], ["→ 수신: 123", "✓ 전송 완료"]])
+    result = controller.send_text_acked("123", timeout=0.1, retry_delay=0.0)
+    assert (result.success, result.attempts) == (True, 2)
+
+
+def test_ignored_is_resent():
+    controller = make_controller([["키보드 입력 무시됨"], ["키보드 입력 무시됨"]])
+    result = controller.send_text_acked("123", timeout=0.1, max_attempts=2, retry_delay=0.0)
+    assert (result.success, result.status, result.attempts) == (False, 'ignored', 2)
+
+
+def test_monitor_error_clears_running_flag():
+    class BrokenSerial(FakeSerial):
+        @property
+        def in_waiting(self) -> int:
+            raise OSError("device removed")
+
+    controller = BluetoothController('COM_TEST')
+    controller.serial_conn = BrokenSerial([])
+    done = threading.Event()
+    controller.start_serial_monitoring(lambda message: done.set() if "종료" in message else None)
+    assert done.wait(2.0)
+    deadline = time.monotonic() + 1.0
+    while controller.monitor_running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert controller.monitor_running is False
+    controller.stop_serial_monitoring()
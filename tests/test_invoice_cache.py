@@ -0,0 +1,77 @@
+"""invoice_cache 테스트 (바이너리 변환, 캐시 저장소)"""
+
+import struct
+
+import pytest
+
+from invoice_cache import CACHE_MAGIC, HEADER, InvoiceCache, decode_invoices, encode_invoices
+
+
+def test_encode_decode_round_trip():
+    invoices = ['0012345678', '송장-1', '', '9' * 16]
+    decoded, rows = decode_invoices(encode_invoices(invoices, [2, 3, 7, 100000]))
+    assert decoded == invoices
+    assert list(rows) == [2, 3, 7, 100000]
+
+
+def test_default_rows_and_empty_list():
+    assert list(decode_invoices(encode_invoices(['a', 'b']))[1]) == [1, 2]
+    invoices, rows = decode_invoices(encode_invoices([]))
+    assert invoices == [] and list(rows) == []
+
+
+def test_rows_length_mismatch():
+    with pytest.raises(ValueError):
+        encode_invoices(['a', 'b'], [1])
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    HEADER.pack(b'XXXX', 2, 0),
+    HEADER.pack(CACHE_MAGIC, 1, 0),
+])
+def test_decode_rejects_bad_header(data):
+    with pytest.raises(ValueError):
+        decode_invoices(data)
+
+
+def test_decode_rejects_truncated_data():
+    data = encode_invoices(['1234567890', '0987654321'])
+    for size in (HEADER.size + 4, len(data) - 1):
+        with pytest.raises(ValueError):
+            decode_invoices(data[:size])
+
+
+def test_cache_store_load_and_invalidation(tmp_path):
+    source = tmp_path / 'a.xlsx'
+    source.write_bytes(b'first')
+    cache = InvoiceCache(tmp_path / 'cache')
+    assert cache.load(source, 'Sheet1') is None
+
+    cache.store(source, 'Sheet1', ['111', '222'], [1, 4])
+    invoices, rows = cache.load(source, 'Sheet1')
+    assert invoices == ['111', '222'] and list(rows) == [1, 4]
+    assert cache.load(source, 'Sheet2') is None
+
+    source.write_bytes(b'second file')
+    assert cache.load(source, 'Sheet1') is None
+
+
+def test_corrupt_cache_file_is_removed(tmp_path):
+    source = tmp_path / 'a.xlsx'
+    source.write_bytes(b'data')
+    cache = InvoiceCache(tmp_path / 'cache')
+    cache.store(source, 'Sheet1', ['111'])
+    cache_file = next((tmp_path / 'cache').glob('*.inv'))
+    cache_file.write_bytes(struct.pack('<4s', b'INVC'))
+    assert cache.load(source, 'Sheet1') is None
+    assert not cache_file.exists()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = InvoiceCache(tmp_path / 'cache', max_entries=2)
+    for name in ('a', 'b', 'c'):
+        source = tmp_path / f'{name}.xlsx'
+        source.write_bytes(name.encode())
+        cache.store(source, 'Sheet1', [name])
+    assert len(list((tmp_path / 'cache').glob('*.inv'))) == 2
@@ -0,0 +1,45 @@
+"""invoice_jobs 테스트 (입력 해석, 여러 파일 합치기)"""
+
+import pytest
+
+from invoice_jobs import InvoiceSource, build_invoice_job, describe_rejected, expand_sources
+
+
+def test_expand_sources_relative_to_base_dir(tmp_path):
+    (tmp_path / 'a#b.txt').write_text('1234567890\n')
+    (tmp_path / 'c.txt').write_text('1234567890\n')
+    sources = expand_sources('a#b.txt; c.txt', base_dir=tmp_path)
+    assert sources == [InvoiceSource(tmp_path / 'a#b.txt', 'Sheet1'), InvoiceSource(tmp_path / 'c.txt', 'Sheet1')]
+
+
+def test_expand_sources_folder_and_errors(tmp_path):
+    (tmp_path / 'b.txt').write_text('1\n')
+    (tmp_path / 'a.csv').write_text('1\n')
+    (tmp_path / 'skip.pdf').write_text('')
+    assert [source.file_path.name for source in expand_sources(str(tmp_path))] == ['a.csv', 'b.txt']
+    with pytest.raises(FileNotFoundError):
+        expand_sources('none.txt', base_dir=tmp_path)
+    with pytest.raises(ValueError):
+        expand_sources('skip.pdf', base_dir=tmp_path)
+
+
+def test_build_job_merges_in_order_with_rows(tmp_path):
+    (tmp_path / 'a.txt').write_text('1111111111\n\n2222222222\n')
+    (tmp_path / 'b.txt').write_text('2222222222\n3333333333\nbad\n')
+    job = build_invoice_job(expand_sources('a.txt;b.txt', base_dir=tmp_path), max_workers=2)
+    assert job.invoices == ['1111111111', '2222222222', '3333333333']
+    assert [(origin.source.file_path.name, origin.row) for origin in map(job.origin, range(3))] == [
+        ('a.txt', 1), ('a.txt', 3), ('b.txt', 2)
+    ]
+    assert describe_rejected(job) == [
+        "b.txt 1행 '2222222222': 중복 (a.txt 3행과 같음)",
+        "b.txt 3행 'bad': 숫자가 아닌 문자 포함",
+    ]
+
+
+def test_failed_source_does_not_stop_others(tmp_path):
+    (tmp_path / 'a.txt').write_text('1111111111\n')
+    sources = expand_sources('a.txt', base_dir=tmp_path) + [InvoiceSource(tmp_path / 'gone.txt', 'Sheet1')]
+    job = build_invoice_job(sources)
+    assert job.invoices == ['1111111111']
+    assert [result.source.file_path.name for result in job.failed_sources] == ['gone.txt']
@@ -0,0 +1,97 @@
+"""invoice_sources 테스트 (텍스트 파일 읽기, 형식별 읽기 클래스 선택)"""
+
+import csv
+import time
+
+import pytest
+
+from excel_reader import ExcelReader
+from invoice_cache import CachedExcelReader
+from invoice_sources import (
+    TextInvoiceReader, create_invoice_reader, detect_delimiter, detect_encoding, first_field, text_to_invoice
+)
+
+
+def write(path, text, encoding='utf-8'):
+    path.write_bytes(text.encode(encoding))
+    return path
+
+
+def test_detect_encoding(tmp_path):
+    assert detect_encoding(write(tmp_path / 'a.txt', '송장\n', 'utf-8')) == 'utf-8-sig'
+    assert detect_encoding(write(tmp_path / 'b.txt', '송장\n', 'cp949')) == 'cp949'
+
+
+def test_detect_delimiter_uses_most_common_in_sample(tmp_path):
+    assert detect_delimiter(write(tmp_path / 'a.csv', '1\n2,a\n3,b\n4;c\n'), 'utf-8') == ','
+    assert detect_delimiter(write(tmp_path / 'b.txt', '1\n2\n'), 'utf-8') is None
+    assert detect_delimiter(write(tmp_path / 'c.tsv', '1,2\n'), 'utf-8') == '\t'
+
+
+def test_first_field():
+    assert first_field('123,foo\n') == '123'
+    assert first_field('"0123"\r\n') == '0123'
+    assert first_field('"222\n') == '"222'
+
+
+def test_text_to_invoice_excel_formula_export():
+    assert text_to_invoice(' ="0123" ') == '0123'
+
+
+def test_single_column_stray_quote_does_not_swallow_lines(tmp_path):
+    path = write(tmp_path / 'a.txt', '111\n"222\n333\n\n="0444"\n')
+    reader = TextInvoiceReader(str(path))
+    assert list(reader.iter_invoice_rows()) == [(1, '111'), (2, '"222'), (3, '333'), (5, '0444')]
+
+
+def test_later_delimited_line_in_single_column_file(tmp_path):
+    path = write(tmp_path / 'a.txt', '1\n' * 60 + '123,foo\n')
+    assert list(TextInvoiceReader(str(path)).iter_invoices())[-1] == '123'
+
+
+def test_csv_quoted_and_unbalanced_quote(tmp_path):
+    path = write(tmp_path / 'a.csv', 'a,1\n"b,2",x\n"c,3\nd,4\n')
+    assert list(TextInvoiceReader(str(path)).iter_invoices()) == ['a', 'b,2', 'c,3', 'd']
+
+
+def test_million_rows_read_close_to_csv_speed(tmp_path):
+    # 줄마다 csv.reader를 만들던 방식은 파일 전체 csv.reader의 약 7배였음 (따옴표 없는 줄은 나누기만 함)
+    path = tmp_path / 'big.csv'
+    path.write_text(''.join(f"{i},b,c\n" for i in range(1_000_000)), encoding='utf-8')
+
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for _ in csv.reader(f):
+            pass
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    invoices, rows = TextInvoiceReader(str(path)).read_invoice_rows()
+    elapsed = time.perf_counter() - start
+
+    assert len(invoices) == 1_000_000 and invoices[-1] == '999999' and rows[-1] == 1_000_000
+    assert elapsed < max(1.0, baseline * 5)
+
+
+def test_limit_offset_and_rows(tmp_path):
+    path = write(tmp_path / 'a.txt', '1\n\n2\n3\n4\n')
+    reader = TextInvoiceReader(str(path))
+    assert reader.read_invoices(limit=2, offset=1) == ['2', '3']
+    invoices, rows = reader.read_invoice_rows()
+    assert invoices == ['1', '2', '3', '4']
+    assert list(rows) == [1, 3, 4, 5]
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(TextInvoiceReader(str(tmp_path / 'none.txt')).iter_invoices())
+    assert not TextInvoiceReader(str(tmp_path / 'none.txt')).validate_data()
+
+
+def test_create_invoice_reader_by_extension():
+    assert isinstance(create_invoice_reader('a.csv'), TextInvoiceReader)
+    assert isinstance(create_invoice_reader('a.XLSX'), CachedExcelReader)
+    reader = create_invoice_reader('a.xlsx', cached=False)
+    assert type(reader) is ExcelReader
+    with pytest.raises(ValueError):
+        create_invoice_reader('a.pdf')
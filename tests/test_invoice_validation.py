@@ -0,0 +1,72 @@
+"""invoice_validation 테스트"""
+
+import pytest
+
+from invoice_validation import (
+    RejectedInvoice, get_carrier_rule, mod7_check, normalize_invoices, summarize_rejected, validate_invoices
+)
+
+
+def with_mod7(prefix: str) -> str:
+    """검증번호(앞자리 % 7)를 붙인 송장번호"""
+    return prefix + str(int(prefix) % 7)
+
+
+def test_normalize_removes_separators_and_float_suffix():
+    assert normalize_invoices(['1234-5678 90', '1234567890.0', '0012345678']) == [
+        '1234567890', '1234567890', '0012345678'
+    ]
+
+
+def test_mod7_check():
+    invoice = with_mod7('123456789')
+    assert mod7_check(invoice)
+    assert not mod7_check(invoice[:-1] + str((int(invoice[-1]) + 1) % 10))
+
+
+def test_unknown_carrier_raises():
+    with pytest.raises(ValueError):
+        get_carrier_rule('unknown')
+
+
+def test_validate_rejects_format_errors_and_duplicates_in_order():
+    result = validate_invoices(['1234567890', 'abc', '1.2E+11', '123', '1234567890', '0987654321'])
+    assert result.invoices == ['1234567890', '0987654321']
+    assert [item.position for item in result.rejected] == [2, 3, 4, 5]
+    assert '숫자가 아닌' in result.rejected[0].reason
+    assert '지수 표기' in result.rejected[1].reason
+    assert '자릿수' in result.rejected[2].reason
+    assert result.rejected[3].duplicate_of == 1
+    assert result.duplicate_count == 1
+
+
+def test_validate_carrier_checksum():
+    good = with_mod7('123456789')
+    bad = good[:-1] + str((int(good[-1]) + 1) % 10)
+    result = validate_invoices([good, bad], carrier='hanjin')
+    assert result.invoices == [good]
+    assert result.rejected[0].reason == '검증번호 불일치'
+
+
+def test_validate_keeps_duplicates_when_dedupe_off():
+    assert validate_invoices(['1234567890'] * 2, dedupe=False).invoices == ['1234567890'] * 2
+
+
+def test_rows_are_used_for_location_and_duplicate_reason():
+    # 엑셀 2, 5, 9행 (사이의 빈 행은 읽지 않음)
+    result = validate_invoices(['1234567890', 'abc', '1234567890'], rows=[2, 5, 9])
+    assert [item.row for item in result.rejected] == [5, 9]
+    assert result.rejected[1].reason == '중복 (2행과 같음)'
+    assert summarize_rejected(result.rejected) == ["5행 'abc': 숫자가 아닌 문자 포함", "9행 '1234567890': 중복 (2행과 같음)"]
+
+
+def test_location_without_rows():
+    assert RejectedInvoice(3, 'x', 'r').location == '3번째'
+    assert validate_invoices(['1234567890', '1234567890']).rejected[0].reason == '중복 (1번째와 같음)'
+
+
+def test_summarize_rejected_limit():
+    rejected = [RejectedInvoice(i, 'x', 'r') for i in range(1, 6)]
+    lines = summarize_rejected(rejected, limit=2)
+    assert len(lines) == 3
+    assert lines[-1] == '... 외 3건'
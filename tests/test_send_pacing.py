@@ -0,0 +1,103 @@
+"""send_pacing.AdaptivePacer 테스트"""
+
+from bluetooth_controller import SendResult
+from send_pacing import (
+    ADAPTIVE_BACKOFF_MIN_STEP, ADAPTIVE_DECREASE_STEP, RTT_MIN_SAMPLES, RTT_WINDOW, AdaptivePacer, PacingStore
+)
+
+
+def ack(elapsed: float, attempts: int = 1) -> SendResult:
+    return SendResult(True, 'ack', attempts, elapsed)
+
+
+def test_success_decreases_delay_additively():
+    pacer = AdaptivePacer(min_delay=0.0, max_delay=3.0, initial_delay=1.0)
+    pacer.record(ack(0.2))
+    pacer.record(ack(0.2))
+    assert abs(pacer.delay - (1.0 - 2 * ADAPTIVE_DECREASE_STEP)) < 1e-9
+
+
+def test_retry_and_failure_back_off_multiplicatively():
+    pacer = AdaptivePacer(initial_delay=0.5)
+    pacer.record(ack(0.2, attempts=2))
+    assert pacer.delay == 1.0
+    pacer.record(SendResult(False, 'timeout', 3, 5.0))
+    assert pacer.delay == 2.0
+    assert (pacer.retries, pacer.failures) == (3, 1)
+
+
+def test_backoff_has_minimum_step_near_zero():
+    pacer = AdaptivePacer(initial_delay=0.0)
+    pacer.record(SendResult(False, 'timeout', 1, 5.0))
+    assert pacer.delay == ADAPTIVE_BACKOFF_MIN_STEP
+
+
+def test_ignored_does_not_change_delay():
+    pacer = AdaptivePacer(initial_delay=1.0)
+    pacer.record(SendResult(False, 'ignored', 1, 0.1))
+    assert pacer.delay == 1.0 and pacer.failures == 0
+
+
+def test_delay_stays_in_range():
+    pacer = AdaptivePacer(min_delay=0.5, max_delay=1.0, initial_delay=5.0)
+    assert pacer.delay == 1.0
+    for _ in range(50):
+        pacer.record(ack(0.1))
+    assert pacer.delay == 0.5
+    for _ in range(10):
+        pacer.record(SendResult(False, 'error', 1, 0.0))
+    assert pacer.delay == 1.0
+
+
+def test_slow_responses_increase_delay():
+    pacer = AdaptivePacer(initial_delay=1.0)
+    for _ in range(5):
+        pacer.record(ack(0.1))
+    before = pacer.delay
+    for _ in range(10):
+        pacer.record(ack(0.5))
+    assert pacer.delay > before
+
+
+def test_fast_outlier_is_forgotten():
+    pacer = AdaptivePacer(initial_delay=1.0)
+    pacer.record(ack(0.05))
+    for _ in range(RTT_WINDOW):
+        pacer.record(ack(0.5))
+    assert pacer.base_rtt == 0.5
+    before = pacer.delay
+    pacer.record(ack(0.5))
+    assert pacer.delay < before
+
+
+def test_saved_rtt_is_used_only_until_enough_samples():
+    pacer = AdaptivePacer(base_rtt=0.1)
+    pacer.record(ack(0.5))
+    assert pacer.base_rtt == 0.1
+    for _ in range(RTT_MIN_SAMPLES - 1):
+        pacer.record(ack(0.5))
+    assert pacer.base_rtt == 0.5
+
+
+def test_store_round_trip(tmp_path):
+    store = PacingStore(tmp_path / 'pacing.json')
+    pacer = AdaptivePacer(initial_delay=0.75)
+    pacer.record(ack(0.2))
+    store.save('COM3', pacer)
+    state = store.load('COM3')
+    assert state['delay'] == round(pacer.delay, 3)
+    assert store.load('COM4') is None
+
+
+def test_store_saves_median_rtt_and_keeps_previous_when_few_samples(tmp_path):
+    store = PacingStore(tmp_path / 'pacing.json')
+    pacer = AdaptivePacer()
+    for rtt in [0.05] + [0.4] * (RTT_MIN_SAMPLES - 1):
+        pacer.record(ack(rtt))
+    store.save('COM3', pacer)
+    assert store.load('COM3')['base_rtt'] == 0.4
+
+    short_run = AdaptivePacer()
+    short_run.record(ack(0.01))
+    store.save('COM3', short_run)
+    assert store.load('COM3')['base_rtt'] == 0.4
@@ -0,0 +1,92 @@
+"""usage_spool 테스트 (보관함, UsageUploader.drain)"""
+
+import pytest
+
+from usage_spool import UsageSpool, UsageUploader
+
+
+class FakeAuthManager:
+    """record_usage_bulk만 흉내 (사용자별 응답 지정)"""
+
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.calls = []
+
+    def record_usage_bulk(self, user_id, records):
+        self.calls.append((user_id, [record['report_id'] for record in records]))
+        respond = self.responses.get(user_id)
+        if respond is not None:
+            return respond(records)
+        return True, '', {'accepted': [record['report_id'] for record in records], 'duplicates': [], 'rejected': []}
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return UsageSpool(tmp_path / 'spool.jsonl', tmp_path / 'acked.txt')
+
+
+def test_append_and_mark_done(spool):
+    first = spool.append('u1', 3, 2, 1, mac_address='aa:bb')
+    second = spool.append('u1', 1, 1, 0)
+    assert [record['report_id'] for record in spool.pending()] == [first, second]
+    assert spool.pending()[0]['mac_address'] == 'AA:BB'
+    spool.mark_done([first])
+    assert [record['report_id'] for record in spool.pending()] == [second]
+
+
+def test_truncated_line_is_skipped(spool):
+    spool.append('u1', 1, 1, 0)
+    with open(spool.spool_file, 'a', encoding='utf-8') as f:
+        f.write('{"report_id": "cut')
+    report_id = spool.append('u1', 2, 2, 0)
+    assert [record['report_id'] for record in spool.pending()][-1] == report_id
+    assert len(spool.pending()) == 2
+
+
+def test_drain_sends_in_batches_per_user(spool):
+    for _ in range(3):
+        spool.append('u1', 1, 1, 0)
+    spool.append('u2', 1, 1, 0)
+    auth = FakeAuthManager()
+    assert UsageUploader(spool, auth, batch_size=2).drain()
+    assert [(user_id, len(ids)) for user_id, ids in auth.calls] == [('u1', 2), ('u1', 1), ('u2', 1)]
+    assert spool.pending() == []
+
+
+def test_drain_discards_records_without_user_id(spool):
+    spool.append('', 1, 1, 0)
+    auth = FakeAuthManager()
+    assert UsageUploader(spool, auth).drain()
+    assert auth.calls == []
+    assert spool.pending() == []
+
+
+def test_drain_keeps_batch_on_request_failure_and_continues_other_users(spool):
+    spool.append('gone', 1, 1, 0)
+    spool.append('u1', 1, 1, 0)
+    auth = FakeAuthManager({'gone': lambda records: (False, '사용자를 찾을 수 없습니다.', None)})
+    assert not UsageUploader(spool, auth).drain()
+    assert [record['user_id'] for record in spool.pending()] == ['gone']
+    assert [user_id for user_id, _ in auth.calls] == ['gone', 'u1']
+
+
+def test_drain_drops_only_individually_rejected_records(spool):
+    bad = spool.append('u1', 1, 1, 0)
+    good = spool.append('u1', 1, 1, 0)
+    later = spool.append('u1', 1, 1, 0)
+
+    def respond(records):
+        return True, '', {'accepted': [good], 'duplicates': [], 'rejected': [{'report_id': bad, 'message': '오류'}]}
+
+    auth = FakeAuthManager({'u1': respond})
+    assert not UsageUploader(spool, auth).drain()
+    # 서버가 처리하지 않은 기록은 남김
+    assert [record['report_id'] for record in spool.pending()] == [later]
+
+
+def test_drain_duplicates_count_as_done(spool):
+    report_id = spool.append('u1', 1, 1, 0)
+    auth = FakeAuthManager({'u1': lambda records: (True, '', {'accepted': [], 'duplicates': [report_id], 'rejected': []})})
+    results = []
+    assert UsageUploader(spool, auth, on_result=lambda accepted, remaining: results.append((accepted, remaining))).drain()
+    assert results == [(0, 0)]